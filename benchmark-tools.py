@@ -0,0 +1,388 @@
+#!/usr/bin/python3
+
+#Benchmarks detect-motion.py, cut-video.py, resize-video.py and resize-image.py on generated test media, and compares the results with a baseline.
+#Github: ...
+
+#default parameters
+media_dir = 'benchmark-media' #generated test media is kept here (relative to the script's folder), a file is only made again if it's missing
+results_file = 'benchmark-results.json' #results of the last run
+baseline_file = 'benchmark-baseline.json' #results to compare with, saved with --save-baseline. Only compare results from the same computer
+videos = [('events', 640, 360, 'libx264', 70), ('events', 1280, 720, 'libx264', 100), ('events', 1920, 1080, 'libx265', 40), ('events', 1280, 720, 'mpeg4', 70), ('testsrc', 1280, 720, 'libx264', 30)] #(scene, width, height, codec, seconds). 'events' is a static scene (with sensor noise) that an object crosses at known times, 'testsrc' moves everywhere
+images = [(1600, 1200, 'jpg', 24), (4000, 3000, 'jpg', 6), (1920, 1080, 'png', 6)] #(width, height, format, count)
+video_fps = 25 #frame rate of the test videos
+event_first_s = 10 #events scene: the first object crosses the frame at this time
+event_every_s = 30 #then one every n seconds (detect-motion.py ends a clip about 10 seconds after the motion ends, so keep this well apart)
+event_s = 5 #seconds each object takes to cross the frame
+detect_modes = ['full', 'proxy'] #detect-motion.py runs on each events video in these modes
+cut_video_args = [[], ['--smart']] #cut-video.py cuts each event (with 2 seconds before and after) from each events video, once with each of these arguments
+resize_video_args = [['-pxh', '360', '--no-preflight']] #resize-video.py encodes each video with each of these arguments
+resize_image_args = [['-pxw', '800', '-pxh', '800'], ['--derivatives=1920x1920:1,600x400:2,200x200:1']] #resize-image.py resizes each set of images with each of these arguments
+repeats = 1 #run each case this many times, the fastest run is kept
+throughput_margin = 0.15 #a case is a regression if its throughput is this much below the baseline's,
+rss_margin = 0.25 #or its peak memory this much above the baseline's (and at least rss_min_mb more),
+rss_min_mb = 10
+offset_margin_s = 1 #or detect-motion.py's clips start or end this many seconds (on average) from where the baseline's did, or it finds fewer of the events (recall) or more clips without an event (precision)
+
+
+'''
+Copyright (c) 2018 JP Janssen
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+import os
+import sys
+import argparse
+import textwrap
+import time
+import json
+import shutil
+import platform
+import tempfile
+import subprocess
+import cutclips
+
+#parse arguments (if any, else use default)
+parser = argparse.ArgumentParser(
+	formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog=textwrap.dedent('''\
+		description:
+			Makes test media with FFmpeg's lavfi sources (in benchmark-media, once), runs each script on it
+			and prints the throughput, peak memory and, for detect-motion.py, how well the clips match the known events.
+
+			Each case runs in a new temporary folder with a copy of the scripts, so no cache, build manifest or earlier
+			output is reused. The results are saved in benchmark-results.json. With a baseline (benchmark-baseline.json,
+			saved with --save-baseline) each case is compared with it, and regressions are listed (the exit code is then 1).
+
+				benchmark-tools.py --save-baseline
+				(change a script)
+				benchmark-tools.py
+
+			Peak memory is that of the largest process of a case (the script or an FFmpeg run it started).
+        '''))
+parser.add_argument("--case", default='', help='Only run the cases whose name contains this, e.g. detect-motion or 1280x720')
+parser.add_argument("--repeats", default=repeats, type=int, help='Default '+str(repeats)+'. Run each case this many times and keep the fastest run')
+parser.add_argument("--save-baseline", action='store_true', help='Save the results as the baseline that later runs are compared with (replaces the cases that were run)')
+parser.add_argument("--list", action='store_true', help='Print the cases and exit')
+args = parser.parse_args()
+case_filter = args.case
+repeats = max(1, args.repeats)
+
+
+#set current dir to same directory as this .py file
+abspath = os.path.abspath(__file__)
+dname = os.path.dirname(abspath)
+os.chdir(dname)
+
+
+#function returns the file name of a test video, e.g. events-1280x720-libx264-100s.mp4
+def videoFile(video):
+	scene, width, height, codec, seconds = video
+	return scene + '-' + str(width) + 'x' + str(height) + '-' + codec + '-' + str(seconds) + 's.mp4'
+
+
+#function returns the file names of a set of test images, e.g. image-1600x1200-001.jpg
+def imageFiles(image_set):
+	width, height, file_format, count = image_set
+	return ['image-' + str(width) + 'x' + str(height) + '-' + '%03d'%(i+1) + '.' + file_format for i in range(count)]
+
+
+#function returns the (start, end) times of the objects crossing an events video
+# an object must be gone a few seconds before the end (detect-motion.py ignores the last seconds)
+def eventTimes(seconds):
+	return [(float(start), float(start + event_s)) for start in range(event_first_s, int(seconds - event_s - 5) + 1, event_every_s)]
+
+
+#function returns the encoder arguments of a test video
+def codecArgs(codec):
+	if codec == 'libx264':
+		return ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23']
+	if codec == 'libx265':
+		return ['-c:v', 'libx265', '-preset', 'ultrafast', '-crf', '28', '-tag:v', 'hvc1', '-x265-params', 'log-level=error']
+	if codec == 'mpeg4':
+		return ['-c:v', 'mpeg4', '-q:v', '4']
+	return ['-c:v', codec]
+
+
+#function returns the ffmpeg command that makes a test video, with a sine tone as audio
+# events: SMPTE bars with sensor noise, a dark box crosses the frame in each event (same times as eventTimes())
+# testsrc: FFmpeg's test pattern with a scrolling gradient, motion everywhere
+def videoCommand(video, out_file):
+	scene, width, height, codec, seconds = video
+	command = ['ffmpeg', '-y', '-loglevel', 'error']
+	if scene == 'events':
+		command += ['-f', 'lavfi', '-i', 'smptehdbars=size=' + str(width) + 'x' + str(height) + ':rate=' + str(video_fps) + ':duration=' + str(seconds)]
+		command += ['-f', 'lavfi', '-i', 'color=c=0x202020:size=' + str(width // 8) + 'x' + str(height // 4) + ':rate=' + str(video_fps)]
+		command += ['-f', 'lavfi', '-i', 'sine=frequency=440:duration=' + str(seconds)]
+		last_s = max([end for start, end in eventTimes(seconds)] + [0])
+		enable = 'gte(t,' + str(event_first_s) + ')*lt(mod(t-' + str(event_first_s) + ',' + str(event_every_s) + '),' + str(event_s) + ')*lt(t,' + str(last_s) + ')'
+		x = 'mod(t-' + str(event_first_s) + ',' + str(event_every_s) + ')/' + str(event_s) + '*(W+w)-w'
+		command += ['-filter_complex', "[0][1]overlay=x='" + x + "':y=(H-h)/2:enable='" + enable + "':shortest=1,noise=alls=6:allf=t,format=yuv420p[v]", '-map', '[v]', '-map', '2:a']
+	else:
+		command += ['-f', 'lavfi', '-i', 'testsrc=size=' + str(width) + 'x' + str(height) + ':rate=' + str(video_fps) + ':duration=' + str(seconds)]
+		command += ['-f', 'lavfi', '-i', 'sine=frequency=440:duration=' + str(seconds)]
+		command += ['-pix_fmt', 'yuv420p']
+	return command + codecArgs(codec) + ['-c:a', 'aac', '-b:a', '96k', '-shortest', '-fflags', '+bitexact', out_file]
+
+
+#function returns the ffmpeg command that makes a set of test images (FFmpeg's testsrc2 with noise, each image different)
+def imageCommand(image_set, out_pattern):
+	width, height, file_format, count = image_set
+	return ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=' + str(width) + 'x' + str(height) + ':rate=1', '-vf', 'noise=alls=12:allf=u', '-frames:v', str(count), '-q:v', '2', out_pattern]
+
+
+#function makes the test media that is missing, in a temporary folder that is moved in place when it is done
+def makeMedia(cases):
+	os.makedirs(media_dir, exist_ok=True)
+	for video in videos:
+		out_file = os.path.join(media_dir, videoFile(video))
+		if os.path.isfile(out_file) or not any(videoFile(video) in case['inputs'] for case in cases):
+			continue
+		print('Making ' + out_file)
+		directory = tempfile.mkdtemp(prefix='making-', dir=media_dir)
+		command = videoCommand(video, os.path.join(directory, videoFile(video)))
+		if subprocess.call(command, stdin=subprocess.DEVNULL) != 0:
+			shutil.rmtree(directory)
+			sys.exit('Failed: ' + cutclips.commandString(command))
+		os.replace(os.path.join(directory, videoFile(video)), out_file)
+		shutil.rmtree(directory)
+	for image_set in images:
+		files = imageFiles(image_set)
+		if all(os.path.isfile(os.path.join(media_dir, x)) for x in files) or not any(files[0] in case['inputs'] for case in cases):
+			continue
+		print('Making ' + str(len(files)) + ' images ' + str(image_set[0]) + 'x' + str(image_set[1]) + ' ' + image_set[2])
+		directory = tempfile.mkdtemp(prefix='making-', dir=media_dir)
+		command = imageCommand(image_set, os.path.join(directory, 'image-' + str(image_set[0]) + 'x' + str(image_set[1]) + '-%03d.' + image_set[2]))
+		if subprocess.call(command, stdin=subprocess.DEVNULL) != 0:
+			shutil.rmtree(directory)
+			sys.exit('Failed: ' + cutclips.commandString(command))
+		for x in files:
+			os.replace(os.path.join(directory, x), os.path.join(media_dir, x))
+		shutil.rmtree(directory)
+
+
+#function returns the benchmark cases, each a dict with the script, its arguments, the input files,
+# the amount of work (seconds of video or images) and the known events (for detect-motion.py)
+def benchmarkCases():
+	cases = []
+	for video in videos:
+		name = videoFile(video)[:-4]
+		seconds = video[4]
+		events = eventTimes(seconds) if video[0] == 'events' else []
+		if video[0] == 'events':
+			for mode in detect_modes:
+				cases.append({'name': 'detect-motion ' + mode + ' ' + name, 'script': 'detect-motion.py', 'args': ['-c', '0', '-m', mode], 'inputs': [videoFile(video)], 'work': seconds, 'unit': 'x', 'events': events})
+			clips = [cutclips.secToTs(max(start - 2, 0)) + '-' + cutclips.secToTs(end + 2) for start, end in events]
+			clip_s = sum(end - start + 4 for start, end in events)
+			for extra in cut_video_args:
+				cases.append({'name': ' '.join(['cut-video'] + extra + [name]), 'script': 'cut-video.py', 'args': extra + [videoFile(video)] + clips, 'inputs': [videoFile(video)], 'work': clip_s, 'unit': 'x', 'events': []})
+		for extra in resize_video_args:
+			cases.append({'name': ' '.join(['resize-video'] + extra + [name]), 'script': 'resize-video.py', 'args': extra, 'inputs': [videoFile(video)], 'work': seconds, 'unit': 'x', 'events': []})
+	for image_set in images:
+		files = imageFiles(image_set)
+		for extra in resize_image_args:
+			name = 'image-' + str(image_set[0]) + 'x' + str(image_set[1]) + '-' + image_set[2] + '-x' + str(image_set[3])
+			cases.append({'name': ' '.join(['resize-image'] + extra + [name]), 'script': 'resize-image.py', 'args': extra, 'inputs': files, 'work': len(files), 'unit': 'images/s', 'events': []})
+	return [case for case in cases if case_filter in case['name']]
+
+
+#function waits for a process, returns its return code, CPU seconds and peak memory in MB (of the process or the largest child it waited for)
+# CPU seconds and memory are None where os.wait4 is missing (Windows)
+def waitProcess(process):
+	if not hasattr(os, 'wait4'):
+		return process.wait(), None, None
+	pid, status, usage = os.wait4(process.pid, 0)
+	process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+	rss_mb = usage.ru_maxrss / 1024 #kilobytes on Linux
+	if sys.platform == 'darwin':
+		rss_mb = usage.ru_maxrss / 1024 / 1024 #bytes on macOS
+	return process.returncode, usage.ru_utime + usage.ru_stime, rss_mb
+
+
+#function links (or copies) a file
+def linkFile(source, target):
+	try:
+		os.link(source, target)
+	except OSError:
+		shutil.copy(source, target)
+
+
+#function returns the clips detect-motion.py found, from the cut-video.py command it prints
+def detectedClips(output):
+	for line in output.splitlines():
+		if line.startswith(' cut-video.py '):
+			return list(zip(*cutclips.parseClips(line.split()[2:])))
+	return []
+
+
+#function compares detected clips with the known events
+# recall: share of the events that a clip overlaps, precision: share of the clips that overlap an event (1 without clips)
+# offsets: the average start (end) of the first (last) clip overlapping an event minus the event's start (end)
+def clipAccuracy(clips, events):
+	matched = [[clip for clip in clips if clip[0] < end and clip[1] > start] for start, end in events]
+	found = [(event, overlapping) for event, overlapping in zip(events, matched) if len(overlapping) > 0]
+	accuracy = {'events': len(events), 'clips': len(clips)}
+	accuracy['recall'] = len(found) / max(len(events), 1)
+	accuracy['precision'] = 1.0
+	if len(clips) > 0:
+		accuracy['precision'] = len([clip for clip in clips if any(clip[0] < end and clip[1] > start for start, end in events)]) / len(clips)
+	accuracy['start_offset_s'] = None
+	accuracy['end_offset_s'] = None
+	if len(found) > 0:
+		accuracy['start_offset_s'] = round(sum(overlapping[0][0] - event[0] for event, overlapping in found) / len(found), 2)
+		accuracy['end_offset_s'] = round(sum(overlapping[-1][1] - event[1] for event, overlapping in found) / len(found), 2)
+	return accuracy
+
+
+#function runs a case in a new temporary folder with a copy of the scripts, returns its result
+def runCase(case, scripts):
+	directory = os.path.abspath(tempfile.mkdtemp(prefix='benchmark-run-', dir='.'))
+	try:
+		for script in scripts:
+			shutil.copy(script, directory)
+		for input_file in case['inputs']:
+			linkFile(os.path.join(media_dir, input_file), os.path.join(directory, input_file))
+		command = [sys.executable, os.path.join(directory, case['script'])] + case['args']
+		t0 = time.time()
+		process = subprocess.Popen(command, cwd=directory, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, universal_newlines=True)
+		output = process.stdout.read()
+		returncode, cpu_s, rss_mb = waitProcess(process)
+		wall_s = time.time() - t0
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+	result = {'script': case['script'], 'returncode': returncode, 'wall_s': round(wall_s, 3), 'cpu_s': round(cpu_s, 3) if cpu_s is not None else None,
+		'peak_rss_mb': round(rss_mb, 1) if rss_mb is not None else None, 'throughput': round(case['work'] / max(wall_s, 0.001), 3), 'unit': case['unit']}
+	if len(case['events']) > 0:
+		result.update(clipAccuracy(detectedClips(output), case['events']))
+	if returncode != 0:
+		result['error'] = output.splitlines()[-20:]
+	return result
+
+
+#function returns the regressions of a result compared with the baseline's result of the same case
+def regressions(result, base):
+	found = []
+	if result['returncode'] != 0:
+		return ['failed (return code ' + str(result['returncode']) + ')'] if base['returncode'] == 0 else []
+	if result['throughput'] < base['throughput'] * (1 - throughput_margin):
+		found.append('throughput ' + '%.1f'%(100 * (result['throughput'] / base['throughput'] - 1)) + '%')
+	if result['peak_rss_mb'] is not None and base['peak_rss_mb'] is not None:
+		if result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + rss_margin) and result['peak_rss_mb'] - base['peak_rss_mb'] >= rss_min_mb:
+			found.append('peak memory +' + '%.0f'%(result['peak_rss_mb'] - base['peak_rss_mb']) + 'MB')
+	for key in ['recall', 'precision']:
+		if key in base and result.get(key, 0) < base[key]:
+			found.append(key + ' ' + '%.2f'%base[key] + ' -> ' + '%.2f'%result.get(key, 0))
+	for key in ['start_offset_s', 'end_offset_s']:
+		if base.get(key) is not None and result.get(key) is not None and abs(result[key] - base[key]) >= offset_margin_s:
+			found.append(key[:-2].replace('_', ' ') + ' ' + '%+.1f'%base[key] + 's -> ' + '%+.1f'%result[key] + 's')
+	return found
+
+
+#function returns a result as a table line
+def resultLine(name, result, name_width):
+	line = name.ljust(name_width)
+	line += ('%.1f'%result['wall_s'] + 's').rjust(9)
+	line += ('%.1f'%result['throughput'] + (' ' if result['unit'] != 'x' else '') + result['unit']).rjust(14)
+	line += (('%.0f'%result['peak_rss_mb'] + 'MB') if result['peak_rss_mb'] is not None else '').rjust(8)
+	accuracy = ''
+	if 'recall' in result:
+		accuracy += ('%.2f'%result['recall']).rjust(8) + ('%.2f'%result['precision']).rjust(10)
+		if result['start_offset_s'] is not None:
+			accuracy += ('%+.1f'%result['start_offset_s'] + '/' + '%+.1f'%result['end_offset_s'] + 's').rjust(12)
+	return line + accuracy.ljust(30)
+
+
+#function returns the computer and FFmpeg version the results are from
+def machineInfo():
+	try:
+		ffmpeg_version = subprocess.check_output(['ffmpeg', '-version'], universal_newlines=True).splitlines()[0]
+	except (OSError, subprocess.CalledProcessError):
+		ffmpeg_version = ''
+	return {'platform': platform.platform(), 'cpus': os.cpu_count(), 'python': platform.python_version(), 'ffmpeg': ffmpeg_version}
+
+
+#list the cases
+cases = benchmarkCases()
+if args.list:
+	for case in cases:
+		print(case['name'])
+	sys.exit()
+if len(cases) == 0:
+	sys.exit('No cases match ' + case_filter)
+
+
+#make the test media, and read the baseline
+makeMedia(cases)
+scripts = [x for x in sorted(os.listdir('.')) if x.endswith('.py') and x != os.path.basename(abspath)]
+baseline = {}
+if os.path.isfile(baseline_file):
+	with open(baseline_file) as file:
+		baseline = json.load(file)
+	if baseline.get('machine', {}).get('cpus') != os.cpu_count() or baseline.get('machine', {}).get('platform') != platform.platform():
+		print('The baseline is from another computer (' + str(baseline.get('machine')) + '), throughput and memory may differ')
+
+
+#run the cases
+name_width = max(len(case['name']) for case in cases) + 1
+print('Case'.ljust(name_width) + 'Time'.rjust(9) + 'Throughput'.rjust(14) + 'Peak'.rjust(8) + 'Recall'.rjust(8) + 'Precision'.rjust(10) + 'Offsets'.rjust(12))
+results = {}
+flagged = {}
+for case in cases:
+	runs = [runCase(case, scripts) for i in range(repeats)]
+	result = min(runs, key=lambda x: (x['returncode'] != 0, x['wall_s']))
+	result['peak_rss_mb'] = max(runs, key=lambda x: x['peak_rss_mb'] or 0)['peak_rss_mb']
+	results[case['name']] = result
+	line = resultLine(case['name'], result, name_width)
+	base = baseline.get('cases', {}).get(case['name'])
+	if result['returncode'] != 0:
+		line += '   FAILED'
+	elif base is not None and base['returncode'] == 0:
+		line += '   ' + '%+.0f'%(100 * (result['throughput'] / base['throughput'] - 1)) + '% vs baseline'
+	print(line)
+	if result['returncode'] != 0:
+		for x in result['error']:
+			print('  ' + x)
+	if base is not None:
+		found = regressions(result, base)
+		if len(found) > 0:
+			flagged[case['name']] = found
+
+
+#save the results (and the baseline), and list regressions
+run = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'machine': machineInfo(), 'cases': results}
+with open(results_file, 'w') as file:
+	json.dump(run, file, indent=1)
+print('Results saved in ' + results_file)
+if args.save_baseline:
+	baseline_cases = baseline.get('cases', {}) if baseline.get('machine') == run['machine'] else {}
+	baseline_cases.update((name, result) for name, result in results.items() if result['returncode'] == 0)
+	with open(baseline_file, 'w') as file:
+		json.dump({'time': run['time'], 'machine': run['machine'], 'cases': baseline_cases}, file, indent=1)
+	print('Baseline saved in ' + baseline_file)
+elif len(baseline) == 0:
+	print('No baseline to compare with, save one with --save-baseline')
+if len(flagged) > 0:
+	print(' ')
+	print('Regressions compared with the baseline (' + baseline.get('time', '') + '):')
+	for name, found in flagged.items():
+		print(' ' + name + ': ' + ', '.join(found))
+	sys.exit(1)
+if len(baseline) > 0 and not args.save_baseline:
+	print('No regressions compared with the baseline (' + baseline.get('time', '') + ')')
@@ -0,0 +1,197 @@
+#Remembers what resize-video.py and resize-image.py have made, so a new run only processes new or changed files
+#Github: ...
+
+#default parameters
+manifest_file = 'build-manifest.sqlite' #relative to the script's folder. '' to disable (outputs are then recognized by their names only)
+hash_block_size = 1 << 20 #bytes read at a time when hashing a file
+
+
+'''
+Copyright (c) 2018 JP Janssen
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+#the manifest is a SQLite database with two tables
+# builds: one row per input file and parameter set, with the input's size, modification time and content hash
+# outputs: one row per output file, with the input and parameter set it was made from, and its own size, modification time and hash
+#a re-scan only stats each file, a file is hashed only when its size or modification time changed
+#a renamed output keeps its size and modification time, so it is still recognized as an output (and not processed as an input)
+
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+
+
+lock = threading.Lock() #one connection is shared by the encode threads
+
+
+#function opens (and creates) the manifest, returns None if disabled
+def openManifest(path=manifest_file):
+	if path == '':
+		return None
+	connection = sqlite3.connect(path, check_same_thread=False)
+	connection.execute('PRAGMA journal_mode=WAL') #cheap commits, one per finished file
+	connection.execute('PRAGMA synchronous=NORMAL')
+	connection.execute('CREATE TABLE IF NOT EXISTS builds (input TEXT, params TEXT, size INTEGER, mtime_ns INTEGER, hash TEXT, PRIMARY KEY (input, params))')
+	connection.execute('CREATE TABLE IF NOT EXISTS outputs (output TEXT PRIMARY KEY, input TEXT, params TEXT, size INTEGER, mtime_ns INTEGER, hash TEXT)')
+	connection.execute('CREATE INDEX IF NOT EXISTS outputs_state ON outputs (size, mtime_ns)')
+	connection.execute('CREATE INDEX IF NOT EXISTS outputs_build ON outputs (input, params)')
+	connection.commit()
+	return connection
+
+
+#function returns the parameter set as a string, the same settings always give the same string
+def paramsKey(tool, params):
+	return json.dumps([tool, params], sort_keys=True, separators=(',', ':'))
+
+
+#function returns sha1 of a file's content
+def fileHash(path):
+	sha1 = hashlib.sha1()
+	with open(path, 'rb') as file:
+		while True:
+			block = file.read(hash_block_size)
+			if not block:
+				break
+			sha1.update(block)
+	return sha1.hexdigest()
+
+
+#function splits files into inputs and outputs of earlier runs, and decides which inputs must be processed
+# returns (plan, outputs, up_to_date): plan is a list of dicts (file, reason, size, mtime_ns, hash, outputs) in the order of files,
+# an item's outputs are the files the manifest recorded for that input (with any parameters), the only ones that may be overwritten
+# outputs are the files that were made by an earlier run (with any parameters), up_to_date the number of inputs skipped
+# an input is processed if it is new, its content changed, the parameters changed, or one of its outputs is missing
+# with skip_outputs=False, outputs of earlier runs are planned like any other input
+# with rebuild, inputs that are up to date are planned too, with the reason 'rebuild'
+def planBuild(connection, files, params, skip_outputs=True, rebuild=False):
+	stats = {}
+	for path in files:
+		try:
+			stat = os.stat(path)
+		except OSError:
+			continue
+		stats[path] = (stat.st_size, stat.st_mtime_ns)
+	with lock:
+		known_outputs = {}
+		output_states = {}
+		input_outputs = {}
+		for output, source, size, mtime_ns, output_hash in connection.execute('SELECT output, input, size, mtime_ns, hash FROM outputs'):
+			known_outputs[output] = output_hash
+			input_outputs.setdefault(source, []).append(output)
+			output_states.setdefault((size, mtime_ns), []).append((output, output_hash))
+		builds = {}
+		for row in connection.execute('SELECT input, size, mtime_ns, hash FROM builds WHERE params = ?', (params,)):
+			builds[row[0]] = row[1:]
+		built_outputs = {}
+		for row in connection.execute('SELECT input, output FROM outputs WHERE params = ?', (params,)):
+			built_outputs.setdefault(row[0], []).append(row[1])
+		other_params = set(row[0] for row in connection.execute('SELECT DISTINCT input FROM builds WHERE params != ?', (params,)))
+
+	#outputs: at a known output path, or a renamed output (same size, modification time and content)
+	outputs = []
+	renamed = []
+	for path in files:
+		if path not in stats or not skip_outputs:
+			continue
+		if path in known_outputs:
+			outputs.append(path)
+			continue
+		for output, output_hash in output_states.get(stats[path], []):
+			if not os.path.exists(output) and fileHash(path) == output_hash:
+				renamed.append((path, output))
+				outputs.append(path)
+				break
+	if len(renamed) > 0:
+		with lock:
+			connection.executemany('UPDATE outputs SET output = ? WHERE output = ?', renamed)
+			connection.commit()
+		for path, output in renamed:
+			for build_outputs in list(built_outputs.values()) + list(input_outputs.values()):
+				if output in build_outputs:
+					build_outputs[build_outputs.index(output)] = path
+
+	#inputs: compare with the build of the same parameters
+	plan = []
+	up_to_date = 0
+	touched = []
+	output_set = set(outputs)
+	for path in files:
+		if path not in stats or path in output_set:
+			continue
+		size, mtime_ns = stats[path]
+		item = {'file': path, 'reason': '', 'size': size, 'mtime_ns': mtime_ns, 'hash': None, 'outputs': input_outputs.get(path, [])}
+		build = builds.get(path)
+		if build is None:
+			item['reason'] = 'parameters changed' if path in other_params else 'new'
+		elif build[0] != size:
+			item['reason'] = 'changed'
+		elif build[1] != mtime_ns:
+			item['hash'] = fileHash(path)
+			if item['hash'] != build[2]:
+				item['reason'] = 'changed'
+			else:
+				touched.append((mtime_ns, path, params)) #same content, only the modification time changed
+		if item['reason'] == '':
+			missing = [output for output in built_outputs.get(path, []) if not os.path.isfile(output)]
+			if len(missing) > 0 or path not in built_outputs:
+				item['reason'] = 'output missing'
+		if item['reason'] == '' and rebuild:
+			item['reason'] = 'rebuild'
+		if item['reason'] == '':
+			up_to_date += 1
+			continue
+		plan.append(item)
+	if len(touched) > 0:
+		with lock:
+			connection.executemany('UPDATE builds SET mtime_ns = ? WHERE input = ? AND params = ?', touched)
+			connection.commit()
+	return plan, outputs, up_to_date
+
+
+#function returns the out_files of a planned input that exist but aren't its recorded outputs (see planBuild), they must not be overwritten
+# e.g. a user's file with the name of an output, or the output of another input
+def outputConflicts(item, out_files):
+	return [x for x in out_files if os.path.exists(x) and x not in item.get('outputs', [])]
+
+
+#function records that an input was processed with the parameters into the output files
+# item is the input's entry from planBuild(), so the recorded size and time are those from before processing
+# returns False (and records nothing) if the input changed while it was processed, so it is processed again next time
+def recordBuild(connection, item, params, out_files):
+	if item['hash'] is None:
+		item['hash'] = fileHash(item['file'])
+	stat = os.stat(item['file'])
+	if (stat.st_size, stat.st_mtime_ns) != (item['size'], item['mtime_ns']):
+		return False
+	rows = []
+	for out_file in out_files:
+		stat = os.stat(out_file)
+		rows.append((out_file, item['file'], params, stat.st_size, stat.st_mtime_ns, fileHash(out_file)))
+	with lock:
+		connection.execute('DELETE FROM outputs WHERE input = ? AND params = ?', (item['file'], params))
+		connection.executemany('INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?, ?)', rows)
+		connection.execute('INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?)', (item['file'], params, item['size'], item['mtime_ns'], item['hash']))
+		connection.commit()
+	return True
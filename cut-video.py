@@ -6,8 +6,15 @@
 
 #default parameters
 ffmpeg_loglevel = 31 #see https://ffmpeg.org/ffmpeg.html#Generic-options
+single_pass = False #True: cut all clips with one ffmpeg run that reads the file once
+smart_cut = False #True: frame-accurate cuts, only the frames before the first and after the last keyframe in a clip are re-encoded (see cutclips.py for quality)
+compare_cuts = False #True: cut each clip with stream copy, smart cut and full re-encode into a temporary folder and compare time and accuracy
+jobs_per_disk = 1 #manifest mode: files cut at the same time on each disk. files on different disks are always cut at the same time
+keyframe_index = True #index the file's keyframes once (cached, see mediaprobe.py) to snap cuts to keyframes, print the true cuts and cut clips in file order
 delete_input_file = False #DANGEROUS, use only if you have BACKUP of input file
-file_formats = ['MP4', 'M4P', 'M4B', 'M4R', 'M4V', 'M4A', 'DIVX', 'EVO', 'F4V', 'FLV', 'AVI', 'QT', 'MXF', 'MOV', 'MTS', 'M2TS', 'MPG', 'MPEG', 'VOB', 'IFO', 'WEBM']
+input_dir = '' #folder with the video file, '' for the script's folder. Clips are saved next to the video file
+recursive = False #also look for the video file in subfolders of input_dir
+file_formats = ['MP4', 'M4P', 'M4B', 'M4R', 'M4V', 'M4A', 'DIVX', 'EVO', 'F4V', 'FLV', 'AVI', 'QT', 'MXF', 'MOV', 'MTS', 'M2TS', 'MPG', 'MPEG', 'VOB', 'IFO', 'WEBM'] #any case, .mp4 and .MP4 are both found
 
 
 '''
@@ -34,11 +41,12 @@ SOFTWARE.
 
 
 import os
-import glob
 import sys
 import argparse
 import textwrap
-import math
+import cutclips
+import mediaprobe
+import mediafiles
 
 #parse arguments (if any, else use default)
 parser = argparse.ArgumentParser(
@@ -49,65 +57,65 @@ parser = argparse.ArgumentParser(
 			First argument is file name, then pairs of start and end times, as many as you like, e.g.: 
 				
 				cut-video.py myvid.mp4   4.5-2:14   5:13.7-10:00
+			
+			Or cut clips from many files listed in a manifest:
+			
+				cut-video.py --manifest clips.csv
+			
+			The manifest is a .csv (file,start,end[,output]), a .json list of {"file", "start", "end", "output"}
+			or a text file with one command per line, as printed by detect-motion.py. Finished clips are
+			listed in clips.csv.progress, so a new run continues where the last one stopped.
 					
 			Be aware that FFmpeg seeks for the nearest keyframe. Therefore the cut may not be at the exact timestamp.			
 			FFmpeg copies the bitrstream, and the new file is a lossless copy.
+			
+			The keyframes of the file are indexed once with ffprobe (cached in keyframe-index).
+			Each clip starts at the keyframe at or before its start time, and the true cut is printed.
+			
+			With --single-pass all clips are cut by one FFmpeg run that reads the input once,
+			instead of one run (and seek) per clip.
+			
+			With --smart the cuts are frame-accurate. Whole GOPs inside a clip are copied, and only the
+			frames from the start to the first keyframe and from the last keyframe to the end are re-encoded.
+			--compare cuts each clip with stream copy, smart cut and a full re-encode and prints the time each took.
         '''))
-parser.add_argument('arguments', metavar='args', type=str, nargs='+', help='file start-end [start-end ...]')
+parser.add_argument('arguments', metavar='args', type=str, nargs='*', help='file start-end [start-end ...]')
+parser.add_argument('--manifest', default='', help='Cut the clips listed in this .csv, .json or text file instead')
+parser.add_argument('--jobs-per-disk', default=jobs_per_disk, help='Default '+str(jobs_per_disk)+'. Manifest mode: number of files cut at the same time on each disk')
+parser.add_argument('-s','--single-pass', action='store_true', help='Cut all clips with one FFmpeg run. Default '+str(single_pass))
+parser.add_argument('--smart', action='store_true', help='Frame-accurate smart cut. Default '+str(smart_cut))
+parser.add_argument('--compare', action='store_true', help='Compare time and accuracy of stream copy, smart cut and full re-encode. No clips are saved. Default '+str(compare_cuts))
+parser.add_argument('--input-dir', default=input_dir, help='Folder with the video file. If not specified, the script\'s folder')
+parser.add_argument('--recursive', action='store_true', help='Also look for the video file in subfolders. Default '+str(recursive))
+parser.add_argument('-n','--no-index', action='store_true', help='Don\'t index keyframes, let FFmpeg seek blindly. Default '+str(not keyframe_index))
 args = parser.parse_args()
 inputs = args.arguments
-
-
-try_file = inputs[0]
-clip_start = []
-clip_end = []
-
-
-#function converts timestamp to seconds  
-#allow two input formats; HOURS:MM:SS or HHMMSS
-# e.g. '1:02' = '102' = 62s or '1:01:02.5' = '010102.5' = 3662.5s   
-def tsToSec(ts):
-	parts = str(ts).split(':')
-	if len(parts) == 1:
-		x = float(parts[0])
-		hr = math.floor(x / 10000)
-		min = math.floor((x - hr * 10000) / 100)
-		sec = x - hr * 10000 - min * 100
-		return float(hr*3600 + min*60 + sec)
-	if len(parts) == 2:
-		return int(parts[0]) * 60 + float(parts[1])
-	if len(parts) == 3:
-		return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
-	return -1
-	
-#function converts seconds to HOURS:MM:SS timestamp 
-def secToTs(sec):
-	hr = math.floor(sec / 3600)
-	min = math.floor((sec - hr * 3600) / 60)
-	sec = sec - hr * 3600 - min * 60
-	if hr>0:
-		return '%02d'%hr +':'+ '%02d'%min +':'+ '%04.1f'%sec
-	if min>0:
-		return '%02d'%min +':'+ '%04.1f'%sec
-	return '%04.1f'%sec
-	
-	
-#function returns shortened timestamp for file name, e.g. 12:34.5 => 1234  
-def filenameTime(sec):
-	#input is time in sec
-	hr, sec = divmod(sec,3600)
-	min, sec = divmod(sec,60)
-	if hr == 0:
-		return '%02d'%min + '%02d'%math.floor(sec)
-	return '%02d'%hr +'%02d'%min + '%02d'%math.floor(sec)
-	
-#prepare list of start and end times
-for i, input in enumerate(inputs):
-	if i == 0:
-		continue
-	times = input.split('-')
-	clip_start.append(tsToSec(times[0]))
-	clip_end.append(tsToSec(times[1]))
+if args.single_pass:
+	single_pass = True
+if args.no_index:
+	keyframe_index = False
+if args.smart:
+	smart_cut = True
+if args.compare:
+	compare_cuts = True
+jobs_per_disk = int(args.jobs_per_disk)
+if args.input_dir != input_dir:
+	input_dir = os.path.abspath(args.input_dir)
+if args.recursive:
+	recursive = True
+manifest = ''
+if args.manifest != '':
+	manifest = os.path.abspath(args.manifest)
+elif len(inputs) < 2:
+	parser.error('a file and at least one start-end time are required')
+
+
+
+try_file = ''
+clip_start, clip_end = [], []
+if manifest == '':
+	try_file = inputs[0]
+	clip_start, clip_end = cutclips.parseClips(inputs[1:])
 
 	
 #set current dir to same directory as this .py file
@@ -116,12 +124,15 @@ dname = os.path.dirname(abspath)
 os.chdir(dname)
 
 
+#cut the clips in a manifest
+if manifest != '':
+	if not cutclips.cutManifest(manifest, jobs_per_disk, smart_cut, ffmpeg_loglevel):
+		sys.exit(1)
+	sys.exit()
+
+
 #find all video files
-input_files_all = []
-for x in range(len(file_formats)):
-	for file in glob.glob('*.'+file_formats[x]):
-		input_files_all.append(file)
-input_files_all = sorted(input_files_all, key=str.lower)
+input_files_all = mediafiles.findFiles(file_formats, input_dir, recursive)
 #print("Video files in folder:")
 #for input_file in input_files_all:
 	#print(' '+input_file)
@@ -141,29 +152,23 @@ if file_found == False:
 print(' '+selected_file)
 
 
-#do this for each pair of start and end times
-for i, j in enumerate(clip_start):
-	filename, file_extension = os.path.splitext(selected_file)
-	out_file = filename +  '-'
-	clip_duration = clip_end[i] - clip_start[i]
-	if clip_start[i] >= 3600:
-		out_file += 'x' #special case if t>1h, x ensures alphabetical sorting
-	out_file += filenameTime(clip_start[i])
-	out_file += '-' + filenameTime(clip_end[i])
-	out_file += file_extension
-	out_file = out_file.lower()
-	
-	command = 'ffmpeg -loglevel '+ str(ffmpeg_loglevel) +' -ss '+ '%.3f'%clip_start[i] +' -i \"'+ selected_file +'\" -t '+ '%.3f'%clip_duration +' -c copy \"'+ out_file +'\"'
-	
-	print('Clip ' + str(i+1))
-	print(' Start:    ' + secToTs(clip_start[i]) + ' (' + '%.1f'%clip_start[i] + 's)')	
-	print(' End:      ' + secToTs(clip_end[i]) + ' (' + '%.1f'%clip_end[i] + 's)')
-	if clip_duration >= 60:
-		print(' Duration: ' + secToTs(clip_duration) + ' (' + '%.1f'%clip_duration + 's)')	
-	else:
-		print(' Duration: ' + '%.1f'%clip_duration + 's')	
-	print(' Command:  ' + command)	
-	os.system(command)	
+#index keyframes
+index = None
+if keyframe_index or smart_cut or compare_cuts:
+	index = mediaprobe.keyframeIndex(selected_file)
+	if index is not None:
+		print('Keyframe index: ' + mediaprobe.keyframeSummary(index))
+
+
+#compare cut methods, or cut the clips
+if compare_cuts:
+	if index is None:
+		sys.exit(' No keyframe index, cannot compare')
+	for i in range(len(clip_start)):
+		cutclips.printClip(i, clip_start[i], clip_end[i])
+		cutclips.compareCuts(selected_file, clip_start[i], clip_end[i], index, ffmpeg_loglevel)
+	sys.exit()
+cutclips.cutClips(selected_file, clip_start, clip_end, single_pass, ffmpeg_loglevel, index=index, smart=smart_cut)
 	
 #delete input file?
 if delete_input_file:
@@ -0,0 +1,479 @@
+#Cuts clips from a video, used by cut-video.py and detect-motion.py
+#Github: ...
+
+#default parameters
+ffmpeg_loglevel = 31 #see https://ffmpeg.org/ffmpeg.html#Generic-options
+smart_cut_crf = 16 #smart cut: quality of the re-encoded frames at the start and end of a clip (low = close to the source)
+smart_cut_preset = 'fast' #smart cut: x264/x265 preset for the re-encoded frames
+smart_cut_encoders = {'h264': 'libx264', 'hevc': 'libx265', 'vp9': 'libvpx-vp9', 'mpeg4': 'mpeg4', 'mpeg2video': 'mpeg2video', 'mjpeg': 'mjpeg'} #source codec: encoder
+
+
+'''
+Copyright (c) 2018 JP Janssen
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+import os
+import re
+import csv
+import json
+import math
+import time
+import threading
+import concurrent.futures
+import bisect
+import shutil
+import tempfile
+import subprocess
+import mediaprobe
+import ffprogress
+
+
+#function converts timestamp to seconds
+#allow two input formats; HOURS:MM:SS or HHMMSS
+# e.g. '1:02' = '102' = 62s or '1:01:02.5' = '010102.5' = 3662.5s
+def tsToSec(ts):
+	parts = str(ts).split(':')
+	if len(parts) == 1:
+		x = float(parts[0])
+		hr = math.floor(x / 10000)
+		min = math.floor((x - hr * 10000) / 100)
+		sec = x - hr * 10000 - min * 100
+		return float(hr*3600 + min*60 + sec)
+	if len(parts) == 2:
+		return int(parts[0]) * 60 + float(parts[1])
+	if len(parts) == 3:
+		return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
+	return -1
+
+#function converts seconds to HOURS:MM:SS timestamp
+def secToTs(sec):
+	hr = math.floor(sec / 3600)
+	min = math.floor((sec - hr * 3600) / 60)
+	sec = sec - hr * 3600 - min * 60
+	if hr>0:
+		return '%02d'%hr +':'+ '%02d'%min +':'+ '%04.1f'%sec
+	if min>0:
+		return '%02d'%min +':'+ '%04.1f'%sec
+	return '%04.1f'%sec
+
+
+#function returns shortened timestamp for file name, e.g. 12:34.5 => 1234
+def filenameTime(sec):
+	#input is time in sec
+	hr, sec = divmod(sec,3600)
+	min, sec = divmod(sec,60)
+	if hr == 0:
+		return '%02d'%min + '%02d'%math.floor(sec)
+	return '%02d'%hr +'%02d'%min + '%02d'%math.floor(sec)
+
+
+#function parses 'start-end' arguments into lists of start and end times in seconds
+def parseClips(arguments):
+	clip_start = []
+	clip_end = []
+	for argument in arguments:
+		times = argument.split('-')
+		clip_start.append(tsToSec(times[0]))
+		clip_end.append(tsToSec(times[1]))
+	return clip_start, clip_end
+
+
+#function returns output file name for a clip, e.g. bird-0044-0122.mp4
+def clipFileName(input_file, start, end):
+	filename, file_extension = os.path.splitext(input_file)
+	out_file = filename +  '-'
+	if start >= 3600:
+		out_file += 'x' #special case if t>1h, x ensures alphabetical sorting
+	out_file += filenameTime(start)
+	out_file += '-' + filenameTime(end)
+	out_file += file_extension
+	return out_file.lower()
+
+
+#function turns an argument list into a printable command line
+def commandString(command):
+	return subprocess.list2cmdline(command)
+
+
+#function returns ffmpeg command for one clip. seeking the input is fast, the cut starts at the keyframe at/before start
+def clipCommand(input_file, start, end, out_file, loglevel=ffmpeg_loglevel, overwrite=False):
+	command = ['ffmpeg', '-loglevel', str(loglevel)]
+	if overwrite:
+		command.append('-y')
+	return command + ['-ss', '%.3f'%start, '-i', input_file, '-t', '%.3f'%(end - start), '-c', 'copy', out_file]
+
+
+#function returns one ffmpeg command that writes all clips, the input is read (demuxed) only once
+# the input seeks to input_start, -copyts keeps file times so each output can have its own -ss/-t
+# stream copy skips packets before the first keyframe, so without a keyframe index a clip starts at the keyframe at/after start
+# output -ss is compared with decode time stamps, with B-frames the keyframe's dts (can be negative) is needed to include it
+def singlePassCommand(input_file, input_start, clip_start, clip_end, out_files, loglevel=ffmpeg_loglevel):
+	command = ['ffmpeg', '-loglevel', str(loglevel), '-ss', '%.3f'%input_start, '-copyts', '-i', input_file]
+	for start, end, out_file in zip(clip_start, clip_end, out_files):
+		command += ['-ss', '%.3f'%start, '-t', '%.3f'%(end - start), '-c', 'copy', '-avoid_negative_ts', 'make_zero', out_file]
+	return command
+
+
+#function prints start, end and duration of a clip
+# with a keyframe index the true cut (snapped to the keyframe at/before start) is printed too
+def printClip(i, start, end, out=print, cut=None):
+	duration = end - start
+	out('Clip ' + str(i+1))
+	out(' Start:    ' + secToTs(start) + ' (' + '%.1f'%start + 's)')
+	out(' End:      ' + secToTs(end) + ' (' + '%.1f'%end + 's)')
+	if duration >= 60:
+		out(' Duration: ' + secToTs(duration) + ' (' + '%.1f'%duration + 's)')
+	else:
+		out(' Duration: ' + '%.1f'%duration + 's')
+	if cut is not None:
+		out(' Cut:      ' + '%.3f'%cut['start'] + 's-' + '%.3f'%cut['end'] + 's (keyframe ' + '%.3f'%(start - cut['start']) + 's before start, GOP ' + str(cut['gop_frames']) + ' frames, byte ' + str(cut['pos']) + ')')
+
+
+#function snaps clips to the keyframe at/before each start, using a keyframe index (see mediaprobe.py)
+# returns a dict per clip with the true start and end, and the seek times for ffmpeg
+def snapClips(index, clip_start, clip_end):
+	cuts = []
+	for start, end in zip(clip_start, clip_end):
+		k = mediaprobe.keyframeBefore(index, start)
+		cuts.append({
+			'start': index['pts_time'][k],
+			'end': min(end, index['duration']),
+			'input_seek': index['pts_time'][k] + 0.0005, #input -ss seeks to the keyframe at/before
+			'output_seek': index['dts_time'][k] - 0.0005, #output -ss keeps packets from this dts on
+			'pos': index['pos'][k],
+			'gop_frames': index['gop_frames'][k],
+		})
+	return cuts
+
+
+#function runs ffmpeg with live progress and metrics (see ffprogress.py), its output is passed to out() unless out is print
+# duration is the seconds of media the command cuts, for its percent done and ETA
+def runFFmpeg(command, out=print, duration=0, outputs=None):
+	return ffprogress.runFFmpeg(command, out, os.path.basename(str(command[-1])), duration, outputs)
+
+
+#function cuts clips from input_file, returns list of output files
+# single_pass writes all clips with one ffmpeg run, otherwise ffmpeg is run (and seeks) once per clip
+# with a keyframe index, cuts are snapped to keyframes and clips are cut in the order they are stored in the file
+# smart cuts clips frame-accurately (single_pass is ignored)
+def cutClips(input_file, clip_start, clip_end, single_pass=False, loglevel=ffmpeg_loglevel, out=print, index=None, smart=False):
+	out_files = [clipFileName(input_file, start, end) for start, end in zip(clip_start, clip_end)]
+	ffprogress.planWork(sum(end - start for start, end in zip(clip_start, clip_end)))
+	if smart:
+		if index is None:
+			index = mediaprobe.keyframeIndex(input_file)
+		stream = mediaprobe.probeVideoStream(input_file)
+		if index is not None:
+			cuts = snapClips(index, clip_start, clip_end)
+			for i in sorted(range(len(out_files)), key=lambda i: cuts[i]['pos']):
+				printClip(i, clip_start[i], clip_end[i], out)
+				if not smartCut(input_file, clip_start[i], clip_end[i], out_files[i], index, stream, loglevel, out):
+					command = clipCommand(input_file, cuts[i]['input_seek'], clip_end[i], out_files[i], loglevel)
+					out(' Smart cut failed, copy from the keyframe before start: ' + commandString(command))
+					runFFmpeg(command, out, clip_end[i] - clip_start[i])
+			return out_files
+		out('No keyframe index, smart cut not possible')
+	order = list(range(len(out_files)))
+	cuts = [None] * len(out_files)
+	input_seek = list(clip_start)
+	output_seek = list(clip_start)
+	if index is not None:
+		cuts = snapClips(index, clip_start, clip_end)
+		input_seek = [cut['input_seek'] for cut in cuts]
+		output_seek = [cut['output_seek'] for cut in cuts]
+		order = sorted(order, key=lambda i: cuts[i]['pos'])
+	if single_pass and len(out_files) > 1:
+		for i in order:
+			printClip(i, clip_start[i], clip_end[i], out, cuts[i])
+		command = singlePassCommand(input_file, min(input_seek), [output_seek[i] for i in order], [clip_end[i] for i in order], [out_files[i] for i in order], loglevel)
+		out('Command:  ' + commandString(command))
+		runFFmpeg(command, out, max(clip_end) - min(clip_start), out_files)
+		return out_files
+	for i in order:
+		command = clipCommand(input_file, input_seek[i], clip_end[i], out_files[i], loglevel)
+		printClip(i, clip_start[i], clip_end[i], out, cuts[i])
+		out(' Command:  ' + commandString(command))
+		runFFmpeg(command, out, clip_end[i] - clip_start[i])
+	return out_files
+
+
+#function returns encoder arguments that match the source video stream (see mediaprobe.probeVideoStream), [] if there is no matching encoder
+def encoderArgs(stream, crf=smart_cut_crf, preset=smart_cut_preset):
+	codec = stream.get('codec_name', '')
+	if codec not in smart_cut_encoders:
+		return []
+	encoder = smart_cut_encoders[codec]
+	args = ['-c:v', encoder]
+	if encoder in ['libx264', 'libx265']:
+		args += ['-crf', str(crf), '-preset', preset]
+		profile = stream.get('profile', '').lower().replace('constrained', '').replace(' ', '')
+		if profile in ['baseline', 'main', 'high', 'high10', 'high422', 'high444', 'main10']:
+			args += ['-profile:v', profile]
+	elif encoder == 'libvpx-vp9':
+		args += ['-crf', str(crf), '-b:v', '0']
+	else:
+		args += ['-q:v', '2']
+	if stream.get('pix_fmt', '') not in ['', 'unknown']:
+		args += ['-pix_fmt', stream['pix_fmt']]
+	return args
+
+
+#function returns the commands for the parts of a smart cut, and the list file that joins them
+# whole GOPs inside the clip are copied, only the frames from start to the first keyframe and from the last keyframe to end are re-encoded
+# a clip without a keyframe inside is re-encoded completely
+def smartCutCommands(input_file, start, end, index, stream, directory, loglevel=ffmpeg_loglevel):
+	keyframes = index['pts_time']
+	first = bisect.bisect_left(keyframes, start - 0.0005) #first keyframe at/after start
+	last = bisect.bisect_right(keyframes, end + 0.0005) - 1 #last keyframe at/before end
+	base = ['ffmpeg', '-loglevel', str(loglevel), '-y']
+	encode = encoderArgs(stream) + ['-fps_mode', 'passthrough']
+	timescale = stream.get('time_base', '').partition('/')[2]
+	if timescale.isdigit():
+		encode += ['-video_track_timescale', timescale]
+	#all parts get the parameter sets (SPS/PPS) in-band, so each decodes with its own settings after the join
+	# the concat demuxer keeps only the first part's extradata
+	encoder = smart_cut_encoders.get(stream.get('codec_name', ''), '')
+	if encoder in ['libx264', 'libx265']:
+		encode += ['-' + encoder[3:] + '-params', 'repeat-headers=1']
+	copy = ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+	if stream.get('codec_name', '') in ['h264', 'hevc']:
+		copy += ['-bsf:v', stream['codec_name'] + '_mp4toannexb']
+	if timescale.isdigit():
+		copy += ['-video_track_timescale', timescale]
+	#re-encoded parts decode from the keyframe before them with file times (-copyts) and keep frames from start to end with trim
+	def encodeArgs(part_start, part_end):
+		seek = index['pts_time'][max(bisect.bisect_right(keyframes, part_start + 0.0005) - 1, 0)]
+		trim = 'trim=start=' + '%.6f'%part_start + ':end=' + '%.6f'%(part_end - 0.0005) + ',setpts=PTS-STARTPTS'
+		return ['-ss', '%.6f'%(seek + 0.0005), '-noaccurate_seek', '-copyts', '-i', input_file, '-vf', trim] + encode
+	parts = [] #(kind, start, end, ffmpeg arguments)
+	if first >= len(keyframes) or first > last:
+		parts.append(('encode', start, end, encodeArgs(start, end)))
+	else:
+		copy_start = keyframes[first]
+		copy_end = keyframes[last]
+		if copy_start - start > 0.0005:
+			parts.append(('encode', start, copy_start, encodeArgs(start, copy_start)))
+		if last > first:
+			frames = sum(index['gop_frames'][first:last])
+			parts.append(('copy', copy_start, copy_end, ['-ss', '%.6f'%(copy_start + 0.0005), '-i', input_file, '-frames:v', str(frames)] + copy))
+		if end - copy_end > 0.0005:
+			parts.append(('encode', copy_end, end, encodeArgs(copy_end, end)))
+	commands = []
+	list_lines = []
+	for i, (kind, part_start, part_end, args) in enumerate(parts):
+		part_file = 'part' + str(i) + '.mp4'
+		commands.append((kind, part_start, part_end, base + args + ['-map', '0:v:0', '-an', os.path.join(directory, part_file)]))
+		list_lines.append("file '" + part_file + "'")
+	list_file = os.path.join(directory, 'parts.txt')
+	with open(list_file, 'w') as file:
+		file.write('\n'.join(list_lines) + '\n')
+	return commands, list_file
+
+
+#function cuts one clip frame-accurately (see smartCutCommands), audio is copied from the source
+# returns False if the source codec can't be matched or ffmpeg fails
+def smartCut(input_file, start, end, out_file, index, stream, loglevel=ffmpeg_loglevel, out=print, overwrite=False):
+	if len(encoderArgs(stream)) == 0:
+		out(' Smart cut: no encoder for ' + stream.get('codec_name', 'unknown codec'))
+		return False
+	directory = tempfile.mkdtemp(prefix='smartcut-', dir=os.path.dirname(os.path.abspath(out_file)))
+	try:
+		commands, list_file = smartCutCommands(input_file, start, end, index, stream, directory, loglevel)
+		for kind, part_start, part_end, command in commands:
+			out(' ' + kind.capitalize().ljust(7) + '   ' + '%.3f'%part_start + 's-' + '%.3f'%part_end + 's: ' + commandString(command))
+			if runFFmpeg(command, out, part_end - part_start) != 0:
+				return False
+		command = ['ffmpeg', '-loglevel', str(loglevel)]
+		if overwrite:
+			command.append('-y')
+		command += ['-f', 'concat', '-safe', '0', '-i', list_file, '-ss', '%.6f'%start, '-t', '%.6f'%(end - start), '-i', input_file, '-map', '0:v', '-map', '1:a?', '-c', 'copy', out_file]
+		out(' Join:       ' + commandString(command))
+		return runFFmpeg(command, out) == 0 #duration 0, the parts already count for the planned work
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+
+
+#function cuts one clip with each method into a temporary folder and prints time, speed and accuracy
+# copy: stream copy from the keyframe before start, smart: smart cut, re-encode: the whole clip is re-encoded
+def compareCuts(input_file, start, end, index, loglevel=ffmpeg_loglevel, out=print):
+	stream = mediaprobe.probeVideoStream(input_file)
+	encode = encoderArgs(stream)
+	directory = tempfile.mkdtemp(prefix='cutcompare-', dir=os.path.dirname(os.path.abspath(input_file)))
+	file_extension = os.path.splitext(input_file)[1]
+	results = []
+	try:
+		for method in ['copy', 'smart', 're-encode']:
+			out_file = os.path.join(directory, method + file_extension)
+			t0 = time.time()
+			if method == 'copy':
+				ok = runFFmpeg(clipCommand(input_file, snapClips(index, [start], [end])[0]['input_seek'], end, out_file, loglevel), out, end - start) == 0
+			elif method == 'smart':
+				ok = smartCut(input_file, start, end, out_file, index, stream, loglevel, lambda line: None)
+			elif len(encode) > 0:
+				command = ['ffmpeg', '-loglevel', str(loglevel), '-ss', '%.6f'%start, '-i', input_file, '-t', '%.6f'%(end - start)] + encode + ['-c:a', 'copy', out_file]
+				ok = runFFmpeg(command, out, end - start) == 0
+			else:
+				ok = False
+			cut_s = time.time() - t0
+			if ok:
+				results.append((method, cut_s, mediaprobe.probeDuration(out_file)))
+			else:
+				out(' ' + method + ' cut failed')
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+	out('Method        Time     Speed  Duration     Extra')
+	for method, cut_s, duration in results:
+		line = method.ljust(10)
+		line += ('%.2f'%cut_s + 's').rjust(8)
+		line += ('%.1f'%((end - start) / max(cut_s, 0.001)) + 'x').rjust(10)
+		line += ('%.3f'%duration + 's').rjust(10)
+		line += ('%+.3f'%(duration - (end - start)) + 's').rjust(10)
+		out(line)
+
+
+#function reads a manifest of clips, returns a list of dicts with file, start, end (seconds) and output ('' for the default name)
+# .json: list of objects with file, start, end and optionally output. numbers are seconds, strings are timestamps
+# .csv: columns file, start, end and optionally output, a header row is skipped
+# other files: lines like the commands detect-motion.py prints, e.g. cut-video.py bird.mp4   44-1:22   12:42-12:59
+# relative paths are relative to the folder of the manifest
+def readManifest(manifest_file):
+	folder = os.path.dirname(os.path.abspath(manifest_file))
+	rows = []
+	def addRow(file, start, end, output=''):
+		if not isinstance(start, (int, float)):
+			start = tsToSec(start)
+		if not isinstance(end, (int, float)):
+			end = tsToSec(end)
+		if output != '':
+			output = os.path.join(folder, output)
+		rows.append({'file': os.path.join(folder, file), 'start': float(start), 'end': float(end), 'output': output})
+	if manifest_file.lower().endswith('.json'):
+		with open(manifest_file) as file:
+			for row in json.load(file):
+				addRow(row['file'], row['start'], row['end'], row.get('output', ''))
+	elif manifest_file.lower().endswith('.csv'):
+		with open(manifest_file, newline='') as file:
+			for row in csv.reader(file):
+				row = [x.strip() for x in row]
+				if len(row) < 3 or row[0] == '' or row[0].startswith('#') or row[0].lower() == 'file':
+					continue
+				addRow(row[0], row[1], row[2], row[3] if len(row) > 3 else '')
+	else:
+		with open(manifest_file) as file:
+			for line in file:
+				words = line.split()
+				if len(words) > 0 and words[0].endswith('cut-video.py'):
+					del words[0]
+				times = []
+				while len(words) > 1 and re.match(r'^[0-9:.]+-[0-9:.]+$', words[-1]):
+					times.insert(0, words.pop())
+				for clip in times:
+					start, end = clip.split('-')
+					addRow(' '.join(words), start, end)
+	return rows
+
+
+#function returns the line that marks a manifest row as done in the progress file
+def manifestKey(row):
+	return row['file'] + '|' + '%.3f'%row['start'] + '|' + '%.3f'%row['end'] + '|' + row['output']
+
+
+#function cuts all clips in a manifest, clips of one file are cut in file order with one keyframe index
+# files on the same disk are cut jobs_per_disk at a time, disks are read at the same time
+# finished clips are appended to manifest_file.progress, a new run skips them (delete the file to start over)
+def cutManifest(manifest_file, jobs_per_disk=1, smart=False, loglevel=ffmpeg_loglevel, out=print):
+	t0 = time.time()
+	rows = readManifest(manifest_file)
+	progress_file = manifest_file + '.progress'
+	done = set()
+	if os.path.isfile(progress_file):
+		with open(progress_file) as file:
+			done = set(line.rstrip('\n') for line in file)
+	groups = {}
+	for row in rows:
+		if manifestKey(row) not in done:
+			groups.setdefault(row['file'], []).append(row)
+	todo = sum(len(group) for group in groups.values())
+	ffprogress.planWork(sum(row['end'] - row['start'] for group in groups.values() for row in group))
+	out('Manifest: ' + str(len(rows)) + ' clips from ' + str(len(set(row['file'] for row in rows))) + ' files, ' + str(len(rows) - todo) + ' already done')
+	lock = threading.Lock()
+	counts = {'done': 0, 'failed': 0}
+	progress = open(progress_file, 'a')
+
+	def say(line):
+		with lock:
+			out(line)
+
+	#cuts the clips of one file
+	def cutFile(input_file, group):
+		if not os.path.isfile(input_file):
+			with lock:
+				counts['failed'] += len(group)
+				out(input_file + ': file not found, ' + str(len(group)) + ' clips skipped')
+			return
+		index = mediaprobe.keyframeIndex(input_file)
+		stream = mediaprobe.probeVideoStream(input_file)
+		cuts = [None] * len(group)
+		if index is not None:
+			cuts = snapClips(index, [row['start'] for row in group], [row['end'] for row in group])
+			order = sorted(range(len(group)), key=lambda i: cuts[i]['pos'])
+			group = [group[i] for i in order]
+			cuts = [cuts[i] for i in order]
+		for row, cut in zip(group, cuts):
+			t1 = time.time()
+			out_file = row['output'] or clipFileName(input_file, row['start'], row['end'])
+			if smart and index is not None:
+				ok = smartCut(input_file, row['start'], row['end'], out_file, index, stream, loglevel, say, overwrite=True)
+			else:
+				seek = row['start'] if cut is None else cut['input_seek']
+				ok = runFFmpeg(clipCommand(input_file, seek, row['end'], out_file, loglevel, overwrite=True), say, row['end'] - row['start']) == 0
+			with lock:
+				if ok:
+					progress.write(manifestKey(row) + '\n')
+					progress.flush()
+					counts['done'] += 1
+				else:
+					counts['failed'] += 1
+				out('[' + str(counts['done'] + counts['failed']) + '/' + str(todo) + '] ' + out_file + (' (' + '%.1f'%(time.time() - t1) + 's)' if ok else ' FAILED'))
+
+	#one executor per disk, so a busy disk doesn't hold back the others
+	disks = {}
+	for input_file in groups:
+		try:
+			disk = os.stat(os.path.dirname(input_file) or '.').st_dev
+		except OSError:
+			disk = -1
+		disks.setdefault(disk, []).append(input_file)
+	executors = [concurrent.futures.ThreadPoolExecutor(max_workers=jobs_per_disk) for disk in disks]
+	try:
+		futures = []
+		for executor, files in zip(executors, disks.values()):
+			for input_file in files:
+				futures.append(executor.submit(cutFile, input_file, groups[input_file]))
+		for future in futures:
+			future.result()
+	finally:
+		for executor in executors:
+			executor.shutdown()
+		progress.close()
+	out('Cut ' + str(counts['done']) + ' clips in ' + '%.1f'%(time.time() - t0) + 's, ' + str(counts['failed']) + ' failed')
+	return counts['failed'] == 0
@@ -5,26 +5,30 @@
 
 #basic parameters
 generate_ouput_files = 1 #set to 0 if you only want to read logs
+single_pass_cut = False #True: cut all clips of a file with one ffmpeg run that reads the file once
 ts_dec = 0 #decimals after seconds in timestamps. Zero is recommended for manual editing
-before_s = 2.5 #set start point N seconds before motion is triggered  
-after_s = 2 #set end point N seconds after motion has ended
-min_copy_break_s = 4.9 #dont stop copying if next motion trigger sooner than this
-ignore_start_s = 2 #seconds dont search for motion in beginning of input file
-ignore_end_s = 2 #seconds dont search for motion at end of input file
 print_scores = False #whether to print frame info (including scene scores)
 ffmpeg_loglevel = 31 #see https://ffmpeg.org/ffmpeg.html#Generic-optionsgenerate_ouput_files 
 delete_input_files = False #DANGEROUS, use only if you have BACKUP of input files
-file_formats = ['MP4', 'M4P', 'M4B', 'M4R', 'M4V', 'M4A', 'DIVX', 'EVO', 'F4V', 'FLV', 'AVI', 'QT', 'MXF', 'MOV', 'MTS', 'M2TS', 'MPEG', 'VOB', 'IFO']
+jobs = 1 #number of files processed at the same time. each job runs its own ffmpeg decode
+detect_mode = 'full' #'full', 'proxy' (score small gray frames, faster), 'keyframes' (only decode keyframes, fastest but coarse, segments_to_* then count keyframes) or 'diff' (frame differencing, can be limited to a masked area)
+diff_masks = {} #diff mode: mask image per camera, white = area to watch. e.g. {'feeder': 'feeder-mask.png'} uses feeder-mask.png for files with 'feeder' in the name
+compare_modes = 0 #set to 1 to only compare speed and detected clips of the modes in modes_to_compare on each file
+modes_to_compare = ['full', 'proxy', 'keyframes', 'diff']
+chunks = 1 #split each file into this many time chunks that are decoded at the same time. useful for one long file
+live_poll_s = 5 #live mode: seconds to wait before reading new data from a growing file, or reconnecting to a stream
+live_idle_s = 60 #live mode: a file that hasn't grown for this many seconds is finished
+live_state_dir = 'live-state' #live mode: detector state is saved here, so a restart resumes where it stopped
+input_dir = '' #folder with the video files, '' for the script's folder. Clips are saved next to their video file
+recursive = False #also process video files in subfolders of input_dir
+include = [] #only process files matching one of these patterns (name or path in input_dir, any case), e.g. ['*2024*', 'cam1/*']. [] for all
+exclude = [] #skip files and folders matching one of these patterns, e.g. ['*-preview.*', 'old']
+file_formats = ['MP4', 'M4P', 'M4B', 'M4R', 'M4V', 'M4A', 'DIVX', 'EVO', 'F4V', 'FLV', 'AVI', 'QT', 'MXF', 'MOV', 'MTS', 'M2TS', 'MPEG', 'VOB', 'IFO'] #any case, .mp4 and .MP4 are both found
 
 
 #advanced filter parameters
-step_len_f = 20 #compare every n frame
-min_threshold_score = 0.0095 #default threshold. a score above indicates motion
-test_duration_s = 7 #seek for a (motionless'ish) segment this long. threshold automatically adjusts up if necessary (and possible)
-max_threshold_score = 0.04
-segments_smooth = 0 #assign median score from n segments before and after to smooth out scores
-segments_to_start = 2 #this many segments in a row above threshold triggers motion start
-segments_to_end = 10 #this many segments in a row below threshold triggers motion end
+#motion analysis parameters (step_len_f, before_s, after_s, thresholds, segments_to_start/end etc.) are set in motionclips.py, resize-video.py --motion-aware uses the same
+scene_cache_dir = 'scenescore-cache' #keep scene scores here so changing the parameters above doesn't decode the video again. '' to disable
 
 
 '''
@@ -48,14 +52,19 @@ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
 
 
 import os
-import glob
-import random
-import statistics	
 import math	
 import time
 import sys
 import argparse
 import textwrap
+import json
+import hashlib
+import concurrent.futures
+import mediaprobe
+import scenescores
+import motionclips
+import cutclips
+import mediafiles
 
 
 #parse arguments (if any, else use default)
@@ -64,16 +73,44 @@ parser = argparse.ArgumentParser(
     epilog=textwrap.dedent('''\
 		description:
 			Detects motion in video files, and outputs start and end times for motion events.
-			Optionally, the script will either call cut-video.py to make copies to new files, or it will only print the command which you can then manually edit. Example:
+			Optionally, the script will either cut the clips to new files (same as cut-video.py, but without starting a new script), or it will only print the command which you can then manually edit. Example:
 			
 				cut-video.py myvid.mp4   4-2:14   5:13-12:42
 				
         '''))
 parser.add_argument("-i", "-f", "--file", default='', help='name of input file, or substring to process any matching file name. If not specified, all video files in folder are processed.')
 parser.add_argument("-c", "--copy", default=generate_ouput_files, help='Default '+str(generate_ouput_files)+'. Must be 0 or 1. If 0, only read logs (you can copy commands to copy clips). If set to 1, new, separate files are created automatically')
+parser.add_argument("-s", "--single-pass", action='store_true', help='Cut all clips of a file with one FFmpeg run that reads the file once. Default '+str(single_pass_cut))
+parser.add_argument("-j", "--jobs", default=jobs, help='Default '+str(jobs)+'. Number of files to process at the same time. Longest files are started first')
+parser.add_argument("-k", "--chunks", default=chunks, help='Default '+str(chunks)+'. Split each file into this many time chunks and decode them at the same time. Gives the same clips as decoding the file in one piece')
+parser.add_argument("-m", "--mode", default=detect_mode, choices=['full', 'proxy', 'keyframes', 'diff'], help='Default '+detect_mode+'. full scores full resolution frames. proxy scores downscaled gray frames, which is faster. keyframes only decodes keyframes, which is fastest but coarse. diff scores the difference to a background image, optionally only inside a mask')
+parser.add_argument("--mask", default='', help='Mask image for diff mode, used for all files. White is the area to watch, black is ignored (e.g. swaying trees). Overrides diff_masks')
+parser.add_argument("--compare", default=compare_modes, help='Default '+str(compare_modes)+'. If 1, decode each file in every mode ('+', '.join(modes_to_compare)+') and print a report of speed and detected clips. No files are cut')
+parser.add_argument("--input-dir", default=input_dir, help='Folder with the video files. If not specified, the script\'s folder')
+parser.add_argument("--recursive", action='store_true', help='Also process video files in subfolders. Default '+str(recursive))
+parser.add_argument("--include", action='append', default=[], help='Only process files whose name or path matches this pattern, e.g. --include "*2024*". Can be repeated')
+parser.add_argument("--exclude", action='append', default=[], help='Skip files and folders whose name or path matches this pattern, e.g. --exclude old. Can be repeated')
+parser.add_argument("--live", default='', help='Growing recording or stream URL to watch. Clip start and end points are printed as soon as they are decided (and clips cut from files if --copy is 1). The threshold is fixed at motionclips.min_threshold_score')
 args = parser.parse_args()
 process_file = args.file
 generate_ouput_files = args.copy
+if args.single_pass:
+	single_pass_cut = True
+jobs = int(args.jobs)
+chunks = int(args.chunks)
+detect_mode = args.mode
+live_source = args.live
+if live_source != '' and detect_mode == 'diff':
+	parser.error('--live can\'t use --mode diff, use full, proxy or keyframes')
+if args.mask != '':
+	diff_masks = {'': args.mask}
+compare_modes = int(args.compare)
+if args.input_dir != input_dir:
+	input_dir = os.path.abspath(args.input_dir)
+if args.recursive:
+	recursive = True
+include = include + args.include
+exclude = exclude + args.exclude
 
 
 #function converts seconds to HOURS:MM:SS timestamp
@@ -104,11 +141,7 @@ os.chdir(dname)
 
 
 #find all video files
-input_files_all = []
-for x in range(len(file_formats)):
-	for file in glob.glob('*.'+file_formats[x]):
-		input_files_all.append(file)
-input_files_all = sorted(input_files_all, key=str.lower)
+input_files_all = list(mediafiles.findFiles(file_formats, input_dir, recursive, include, exclude))
 #print("Video files in folder:")
 #for input_file in input_files_all:
 	#print(' '+input_file)
@@ -126,215 +159,163 @@ for input_file in input_files:
 	print(' '+input_file)
 
 
-#prepare list with commands for cutting each file
-commands = []
+#function cuts clips from a file in this process, like cut-video.py would with the printed (rounded) timestamps
+# cuts snap to keyframes with a keyframe index, except in a file that is still growing (live mode)
+def cutClips(input_file, copy_start_s, copy_end_s, out=print, use_index=True):
+	clip_start = [cutclips.tsToSec(secToTs(s)) for s in copy_start_s]
+	clip_end = [cutclips.tsToSec(secToTs(s)) for s in copy_end_s]
+	index = None
+	if use_index:
+		index = mediaprobe.keyframeIndex(input_file)
+	return cutclips.cutClips(input_file, clip_start, clip_end, single_pass_cut, ffmpeg_loglevel, out, index)
 
 
-#do this for each video file
-for input_file in input_files:
-	t0 = time.time()
-	print(" ")
-	print("*")
-	print("**")
-	print("***")
-	print("Processing "+input_file)
-	
-	#get scenescores from ffmpeg
-	# ffmpeg's scene change detection algo: https://www.luckydinosaur.com/u/ffmpeg-scene-change-detector
-	# writes to a txt file, parse it into lists, then delete file
-	randint = random.randint(10000,99999)
-	temp_file = "temp-scenescores-" + str(randint) + ".txt"
-	if os.path.isfile(temp_file):
-		os.remove(temp_file)
-	command = "ffmpeg -loglevel "+str(ffmpeg_loglevel)+ " -i \""+input_file+"\" -vf select='not(mod(n\,"+str(step_len_f)+"))',select='gte(scene,0)',metadata=print:file="+temp_file+" -an -f null -"
-	print(' Run command: ' + command)	
-	os.system(command)
-
-	f = []
-	f_pts = []
-	f_pts_time = []
-	f_scene_score = []
-	pts=0
-	pts_time=0
-	scene_score=0
-	with open(temp_file) as file:
-		text = file.read()	
-	i = -1
-	while True:
-		i = text.find('frame', i+1)
-		if i == -1:
-			break
-		i = text.find(':', i) + 1
-		j = text.find(' ', i)
-		f.append(int(text[i:j]))
-		i = text.find('pts', i+1)
-		i = text.find(':', i) + 1
-		j = text.find(' ', i)
-		f_pts.append(int(text[i:j]))
-		i = text.find('pts_time', i+1)
-		i = text.find(':', i) + 1
-		j = text.find('\n', i)
-		f_pts_time.append(float(text[i:j]))
-		i = text.find('scene_score', i+1)
-		i = text.find('=', i) + 1
-		j = text.find('\n', i)
-		f_scene_score.append(float(text[i:j]))
-	os.remove(temp_file)
-	
-	
+#function runs all analysis steps on the scene scores of one file
+# returns a dict with each frame's median, change, trigger and copy scores, the threshold, and copy start and end times
+def analyseScores(f_pts_time, f_scene_score):
 	#give each frame a median score from +/- N frames
-	f_median_score = []
-	for x in f:
-		f_median_score.append(statistics.median(f_scene_score[max(0,x-segments_smooth):x+segments_smooth+1]))
+	f_median_score = motionclips.medianScores(f_scene_score, motionclips.segments_smooth)
 	
 	
 	#try to increase threshold if no motionless period found 
-	file_threshold_score = min_threshold_score
-	while True:
-		longest_motionless_s = 0
-		last_change_s = 0
-		run_s = 0
-		for x in f:
-			if f_median_score[x] < file_threshold_score:
-				run_s = f_pts_time[x] - last_change_s
-			else:
-				if longest_motionless_s < run_s:
-					longest_motionless_s = run_s
-				last_change_s = f_pts_time[x]
-		if longest_motionless_s <= test_duration_s:
-			file_threshold_score += min_threshold_score
-			if file_threshold_score > max_threshold_score:
-				file_threshold_score = min_threshold_score
-				break
-		else:
-			break
+	file_threshold_score = motionclips.fileThreshold(f_median_score, f_pts_time, motionclips.min_threshold_score, motionclips.max_threshold_score, motionclips.test_duration_s)
 		
 
 	#frame's score indicates CHANGE or not [0,1]
-	f_change = []
-	for x in f:
-		if f_median_score[x] >= file_threshold_score:
-			f_change.append(1)
-		else:
-			f_change.append(0)
+	f_change = (f_median_score >= file_threshold_score).astype(int)
 	
 	
 	#frame's TRIGGER score [-1,0,+1]
-	f_trigger = []
-	x_max = len(f) - max(segments_to_start,segments_to_end)
-	for x in f:
-		if x >= x_max:
-			f_trigger.append(0)
-			continue
-		run_above = 0
-		for y in range(segments_to_start):
-			if f_median_score[x+y] > file_threshold_score:
-				run_above += 1
-		if run_above == segments_to_start:
-			f_trigger.append(1)
-		else:
-			run_above = 0
-			for y in range(segments_to_end):
-				if f_median_score[x+y] > file_threshold_score:
-					run_above += 1
-			if run_above == 0:
-				f_trigger.append(-1)
-			else:
-				f_trigger.append(0)
+	f_trigger = motionclips.triggerScores(f_median_score, file_threshold_score, motionclips.segments_to_start, motionclips.segments_to_end)
 	
 	
 	#based on trigger scores, select "smart" COPY start and end points [-1,0,+1]
-	f_copy = []
-	is_copying = 0
-	last_start_s = 0
-	last_end_s = 0
-	end_time_s = f_pts_time[len(f)-1]
-	for x in f:
-		f_copy.append(0)
-		if f_pts_time[x] < ignore_start_s:
-			continue
-		if x >= x_max or f_pts_time[x] > end_time_s - ignore_end_s:
-			if is_copying == 1:
-				#copy_end_s.append(f_pts_time[x])
-				f_copy[x] = -1
+	f_copy = motionclips.copyScores(f_pts_time, f_trigger, motionclips.segments_to_start, motionclips.segments_to_end, motionclips.ignore_start_s, motionclips.ignore_end_s, motionclips.min_copy_break_s)
+	
+	
+	#set copy start and end times, adjusted by before_s and after_s
+	copy_start_s, copy_end_s = motionclips.copyTimes(f_pts_time, f_copy, motionclips.before_s, motionclips.after_s)
+	return {'median': f_median_score, 'threshold': file_threshold_score, 'change': f_change, 'trigger': f_trigger, 'copy': f_copy, 'copy_start_s': copy_start_s, 'copy_end_s': copy_end_s}
+
+
+#function returns the diff mode mask image for a file, '' if none
+def maskFile(input_file):
+	for camera, mask_file in diff_masks.items():
+		if camera in input_file:
+			return mask_file
+	return ''
+
+
+#function returns seconds where two lists of clips overlap
+def clipOverlap(starts_a, ends_a, starts_b, ends_b):
+	overlap_s = 0
+	for start_a, end_a in zip(starts_a, ends_a):
+		for start_b, end_b in zip(starts_b, ends_b):
+			overlap_s += max(0, min(end_a, end_b) - max(start_a, start_b))
+	return overlap_s
+
+
+#function decodes one file in each detect mode, and prints decode speed and detected clips
+# the first mode is the reference. Match is time in clips found by both modes / time in clips found by either (1.00 = same clips)
+# the cache is not used, so decode times are real
+def compareModes(input_file, out=print):
+	out(" ")
+	out("Comparing detect modes for " + input_file)
+	results = []
+	for mode in modes_to_compare:
+		t0 = time.time()
+		f, f_pts, f_pts_time, f_scene_score = scenescores.sceneScores(input_file, motionclips.step_len_f, ffmpeg_loglevel, directory='', out=out, chunks=chunks, mode=mode, mask_file=maskFile(input_file))
+		decode_s = time.time() - t0
+		if len(f) == 0:
+			out(' No frames read in ' + mode + ' mode')
 			continue
-			
-		#start copy?
-		if is_copying == 0:
-			if f_pts_time[x] > end_time_s - ignore_end_s: #near end, don't make new starting point
-				continue
-			if f_trigger[x] == 1:
-				#copy_start_s.append(f_pts_time[x])
-				f_copy[x] = 1
-				last_start_s = f_pts_time[x]
-				is_copying = 1
-				continue
-				
-		#end copy?
-		if is_copying == 1:
-			if f_trigger[x] == -1:
-				can_end = 1
-				y = x
-				while True:
-					y += 1
-					if y >= x_max:
-						break
-					if f_trigger[y] == 1:
-						can_end = 0
-						break
-					if f_pts_time[y] - f_pts_time[x] > min_copy_break_s:
-						break
-				if can_end == 1:
-					#copy_end_s.append(f_pts_time[x])
-					f_copy[x] = -1
-					last_end_s = f_pts_time[x]
-					is_copying = 0
-				continue
-			
+		results.append((mode, decode_s, float(f_pts_time[len(f)-1]), len(f), analyseScores(f_pts_time, f_scene_score)))
+	if len(results) == 0:
+		return
+	ref_starts = results[0][4]['copy_start_s']
+	ref_ends = results[0][4]['copy_end_s']
+	ref_clip_s = sum(end - start for start, end in zip(ref_starts, ref_ends))
+	out('Mode         Decode    Speed  Frames  Threshold  Clips  Match')
+	for mode, decode_s, end_time_s, frames, scores in results:
+		clip_s = sum(end - start for start, end in zip(scores['copy_start_s'], scores['copy_end_s']))
+		overlap_s = clipOverlap(ref_starts, ref_ends, scores['copy_start_s'], scores['copy_end_s'])
+		union_s = ref_clip_s + clip_s - overlap_s
+		match = 1.0
+		if union_s > 0:
+			match = overlap_s / union_s
+		line = mode.ljust(10)
+		line += ('%.1f'%decode_s + 's').rjust(9)
+		line += ('%.1f'%(end_time_s / max(decode_s, 0.001)) + 'x').rjust(9)
+		line += str(frames).rjust(8)
+		line += ('%.4f'%scores['threshold']).rjust(11)
+		line += str(len(scores['copy_start_s'])).rjust(7)
+		line += ('%.2f'%match).rjust(7)
+		out(line)
+	for mode, decode_s, end_time_s, frames, scores in results:
+		clips = ''
+		for start, end in zip(scores['copy_start_s'], scores['copy_end_s']):
+			clips += '   ' + secToTs(start) + '-' + secToTs(end)
+		out(' ' + mode.ljust(10) + clips)
+
+
+#function detects motion in one video file and (optionally) cuts clips
+# all output is passed to out(), returns the cut-video.py command ('' if no motion found)
+def detectMotion(input_file, out=print):
+	t0 = time.time()
+	out(" ")
+	out("*")
+	out("**")
+	out("***")
+	out("Processing "+input_file)
 	
-	#set copy start and end times
-	copy_start_s = []
-	copy_end_s = []
-	for x in f:
-		if f_copy[x] == 1:
-			copy_start_s.append(f_pts_time[x])
-		if f_copy[x] == -1:
-			copy_end_s.append(f_pts_time[x])	
-		
-		
-	#adjust start and end times
-	for x in range(len(copy_start_s)):
-		copy_start_s[x] = max(copy_start_s[x] - before_s, 0)
-		copy_end_s[x] = min(copy_end_s[x] + after_s, end_time_s)
+	#get scenescores from ffmpeg
+	# ffmpeg's scene change detection algo: https://www.luckydinosaur.com/u/ffmpeg-scene-change-detector
+	# scores are streamed from ffmpeg's stdout and parsed while the video is decoded
+	# scores are cached (see scene_cache_dir), so re-running with new analysis parameters doesn't decode the video again
+	f, f_pts, f_pts_time, f_scene_score = scenescores.sceneScores(input_file, motionclips.step_len_f, ffmpeg_loglevel, directory=scene_cache_dir, out=out, chunks=chunks, mode=detect_mode, mask_file=maskFile(input_file))
+	if len(f) == 0:
+		out(' No frames read')
+		return ''
+	end_time_s = float(f_pts_time[len(f)-1])
+	
+	
+	scores = analyseScores(f_pts_time, f_scene_score)
+	f_median_score = scores['median']
+	file_threshold_score = scores['threshold']
+	f_change = scores['change']
+	f_trigger = scores['trigger']
+	f_copy = scores['copy']
+	copy_start_s = scores['copy_start_s']
+	copy_end_s = scores['copy_end_s']
 
 	
 	#print output values
 	if print_scores:
-		print("Frame;Time;Score;Median;Change;Trigger;Copy")
-		for x in f:
-			print(str(f[x]) + ";" + '%.4f'%(f_pts_time[x]) + ";" + '%.4f'%(f_scene_score[x]) + ";" + '%.4f'%(f_median_score[x]) + ";" + str(f_change[x]) + ";" + str(f_trigger[x]) + ';' + str(f_copy[x]))
-	print("Threshold: " + str(file_threshold_score))
-	print('Clips: ' + str(len(copy_start_s)))
+		out("Frame;Time;Score;Median;Change;Trigger;Copy")
+		for x in range(len(f)):
+			out(str(f[x]) + ";" + '%.4f'%(f_pts_time[x]) + ";" + '%.4f'%(f_scene_score[x]) + ";" + '%.4f'%(f_median_score[x]) + ";" + str(f_change[x]) + ";" + str(f_trigger[x]) + ';' + str(f_copy[x]))
+	out("Detect mode: " + detect_mode)
+	out("Threshold: " + str(file_threshold_score))
+	out('Clips: ' + str(len(copy_start_s)))
 	if len(copy_start_s) > 0:
-		print('Nr      Start       End  Duration')	
+		out('Nr      Start       End  Duration')	
 		for x in range(len(copy_start_s)):
 			line = str(x+1).ljust(3)
 			line += secToTs(copy_start_s[x]).rjust(10)
 			line += secToTs(copy_end_s[x]).rjust(10)
 			line += secToTs(copy_end_s[x]-copy_start_s[x]).rjust(10)
-			print(line)
+			out(line)
 	else:
-		print(' No motion segment found')
-		continue	
+		out(' No motion segment found')
+		return ''	
 	
 	#prepare command for cutting with cut-video.py
 	command = 'cut-video.py ' + input_file
 	for x in range(len(copy_start_s)):
 		command += '   ' + secToTs(copy_start_s[x]) + '-' + secToTs(copy_end_s[x])
-	commands.append(command)
 	if generate_ouput_files == 1:
-		print(' Run command: ' + command)
-		os.system(command)
+		out(' Cut clips: ' + command)
+		cutClips(input_file, copy_start_s, copy_end_s, out)
 	
 	
 	#delete input file?
@@ -346,8 +327,124 @@ for input_file in input_files:
 	t1 = time.time()
 	process_s = t1-t0
 	times_faster = end_time_s / process_s
-	print(input_file + ' processed in ' + '%.1f'%(process_s) + 's (' + '%.1f'%(times_faster) + 'x)')
-	
+	out(input_file + ' processed in ' + '%.1f'%(process_s) + 's (' + '%.1f'%(times_faster) + 'x)')
+	return command
+
+
+#function returns the file where live mode keeps the detector state of a source
+def liveStateFile(source):
+	return os.path.join(live_state_dir, 'live-' + hashlib.sha1(source.encode('utf-8')).hexdigest()[:16] + '.json')
+
+
+#function saves live detector state, written to a temp file first so a crash never leaves a broken state file
+def saveLiveState(state_file, state):
+	os.makedirs(live_state_dir, exist_ok=True)
+	with open(state_file + '.tmp', 'w') as file:
+		json.dump(state, file)
+	os.replace(state_file + '.tmp', state_file)
+
+
+#function prints a live clip event, and cuts the clip from a file source when it has ended
+def liveEvent(source, state, event):
+	kind, event_s = event
+	if kind == 'start':
+		state['clip_start'] = event_s
+		print('Clip start ' + secToTs(event_s).rjust(10))
+		return
+	command = 'cut-video.py ' + source + '   ' + secToTs(state['clip_start']) + '-' + secToTs(event_s)
+	print('Clip end   ' + secToTs(event_s).rjust(10) + '   ' + command)
+	if generate_ouput_files == 1 and '://' not in source:
+		cutClips(source, [state['clip_start']], [event_s], use_index=False)
+
+
+#function detects motion in a growing recording or a stream, for as long as it grows / runs
+# the decoder is restarted when a file has grown; it seeks back a few samples (to a sampled frame, see scenescores.seekArgs) so scene scores have their history
+# keyframes mode has no fixed sample phase, so it decodes the file from the start again (scores up to the last sample are skipped)
+# state is saved after each event and each decode, a restart resumes after the last analysed sample
+# streams (source with ://) are reconnected after live_poll_s, timestamps of each connection continue from the last sample
+def liveDetect(source):
+	is_stream = '://' in source
+	state_file = liveStateFile(source)
+	if os.path.isfile(state_file):
+		with open(state_file) as file:
+			state = json.load(file)
+		print('Resuming ' + source + ' after ' + secToTs(state['last_time']))
+	else:
+		state = motionclips.liveState(motionclips.min_threshold_score, motionclips.segments_smooth, motionclips.segments_to_start, motionclips.segments_to_end, motionclips.ignore_start_s, motionclips.min_copy_break_s, motionclips.before_s, motionclips.after_s)
+		state['clip_start'] = 0.0
+		state['time_offset'] = 0.0
+	fps = 0.0
+	start_s = 0.0
+	if not is_stream:
+		fps = mediaprobe.probeFrameRate(source)
+		start_s = mediaprobe.probeVideoStart(source)
+	last_size = -1
+	idle_s = 0
+	while True:
+		if not is_stream:
+			size = os.path.getsize(source)
+			if size == last_size:
+				idle_s += live_poll_s
+				if idle_s >= live_idle_s:
+					break
+				time.sleep(live_poll_s)
+				continue
+			last_size = size
+			idle_s = 0
+		command = scenescores.sceneScoreCommand(source, motionclips.step_len_f, ffmpeg_loglevel, detect_mode)
+		if not is_stream and state['last_time'] > 0 and fps > 0 and detect_mode in ('full', 'proxy'):
+			sample = int(round((state['last_time'] - start_s) * fps / motionclips.step_len_f)) - scenescores.chunk_overlap_steps - 1
+			if sample > 0:
+				command[3:3] = scenescores.seekArgs(sample, motionclips.step_len_f, fps, start_s)
+		if is_stream:
+			state['time_offset'] = max(state['last_time'], 0)
+		print(' Run command: ' + scenescores.commandString(command))
+		for frame, pts, pts_time, scene_score in scenescores.readSceneScores(source, motionclips.step_len_f, command=command):
+			if is_stream:
+				pts_time += state['time_offset']
+			if pts_time <= state['last_time']:
+				continue
+			events = motionclips.liveAddScore(state, pts_time, scene_score)
+			for event in events:
+				liveEvent(source, state, event)
+			if len(events) > 0:
+				saveLiveState(state_file, state)
+		saveLiveState(state_file, state)
+		if is_stream:
+			time.sleep(live_poll_s)
+	for event in motionclips.liveFinish(state):
+		liveEvent(source, state, event)
+	if os.path.isfile(state_file):
+		os.remove(state_file)
+	print(source + ' finished at ' + secToTs(max(state['last_time'], 0)))
+
+
+#do this for each video file
+# with several jobs, files are processed concurrently, longest first, and each file's output is printed when it is done
+if live_source != '':
+	liveDetect(live_source)
+	sys.exit()
+commands = [''] * len(input_files)
+if compare_modes == 1:
+	for input_file in input_files:
+		compareModes(input_file)
+elif jobs <= 1:
+	for i, input_file in enumerate(input_files):
+		commands[i] = detectMotion(input_file)
+else:
+	with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+		durations = list(pool.map(mediaprobe.probeDuration, input_files))
+		order = sorted(range(len(input_files)), key=lambda i: durations[i], reverse=True)
+		futures = {}
+		for i in order:
+			lines = []
+			futures[pool.submit(detectMotion, input_files[i], lines.append)] = (i, lines)
+		for future in concurrent.futures.as_completed(futures):
+			i, lines = futures[future]
+			commands[i] = future.result()
+			for line in lines:
+				print(line)
+commands = [command for command in commands if command != '']
 
 print(" ")
 print("Commands for each input file:")
@@ -0,0 +1,238 @@
+#Runs ffmpeg with -progress and prints live fps, speed and ETA, used by resize-video.py and cut-video.py
+#Github: ...
+
+#default parameters
+status_interval_s = 1 #seconds between status updates on a terminal (the line is redrawn)
+log_interval_s = 30 #seconds between status lines when the output is not a terminal (e.g. a log file)
+metrics_log = 'ffmpeg-metrics.jsonl' #one JSON line per ffmpeg run is appended here (relative to the script's folder). '' to disable
+
+
+'''
+Copyright (c) 2018 JP Janssen
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+#ffmpeg writes key=value lines to stdout (-progress pipe:1), a block of them ends with progress=continue or progress=end
+#all running jobs are shown on one status line, with the aggregate fps, speed (seconds of media per second) and ETA
+#the ETA of all work needs the total seconds of media to be processed, see planWork()
+#after each run a JSON line is appended to metrics_log: wall time, CPU time, input and output bytes, speed etc
+
+
+import os
+import sys
+import json
+import time
+import shutil
+import threading
+import subprocess
+
+
+lock = threading.Lock()
+running = {} #job id -> state of the running ffmpeg jobs
+totals = {'planned_s': 0.0, 'done_s': 0.0, 'cpu_s': 0.0, 'next_id': 0, 'status_shown': False}
+printer = {'thread': None}
+
+
+#function adds seconds of media that will be processed, for the ETA of all work
+def planWork(seconds):
+	with lock:
+		totals['planned_s'] += seconds
+
+
+#function returns the command with -progress to stdout, and without ffmpeg's own stats line
+def progressCommand(command):
+	command = [x for x in command if x != '-nostats']
+	return command[:1] + ['-progress', 'pipe:1', '-nostats'] + command[1:]
+
+
+#function returns the input files of an ffmpeg command (the files after -i)
+def inputFiles(command):
+	return [command[i+1] for i in range(len(command) - 1) if command[i] == '-i' and os.path.isfile(command[i+1])]
+
+
+#function returns seconds as h:mm:ss
+def clock(seconds):
+	seconds = int(max(seconds, 0))
+	return str(seconds // 3600) + ':' + '%02d'%(seconds // 60 % 60) + ':' + '%02d'%(seconds % 60)
+
+
+#function returns a short status of one job, e.g. 'video.mp4 43% 112fps 4.5x ETA 0:00:31'
+def jobStatus(job):
+	status = job['name']
+	if job['duration'] > 0:
+		status += ' ' + '%.0f'%min(100 * job['out_time_s'] / job['duration'], 100) + '%'
+	status += ' ' + '%.0f'%job['fps'] + 'fps ' + '%.1f'%job['speed'] + 'x'
+	if job['duration'] > 0 and job['speed'] > 0:
+		status += ' ETA ' + clock((job['duration'] - job['out_time_s']) / job['speed'])
+	return status
+
+
+#function returns the status line of all running jobs and the aggregate
+# aggregate speed is the sum of the jobs' speeds, the ETA is the media left of the planned work at that speed
+def statusLine():
+	jobs = list(running.values())
+	line = ' | '.join(jobStatus(job) for job in jobs)
+	if len(jobs) > 1 or totals['planned_s'] > 0:
+		speed = sum(job['speed'] for job in jobs)
+		line += ' | all ' + '%.0f'%sum(job['fps'] for job in jobs) + 'fps ' + '%.1f'%speed + 'x'
+		left_s = totals['planned_s'] - totals['done_s'] - sum(min(job['out_time_s'], job['duration']) for job in jobs)
+		if totals['planned_s'] > 0 and speed > 0:
+			line += ' ETA ' + clock(left_s / speed)
+	return line
+
+
+#function prints the status line while jobs are running
+# on a terminal the line is redrawn in place, else a new line is printed every log_interval_s
+def printStatus():
+	terminal = sys.stdout.isatty()
+	interval = status_interval_s if terminal else log_interval_s
+	last = time.time()
+	while True:
+		time.sleep(min(interval, 0.25))
+		with lock:
+			if len(running) == 0:
+				printer['thread'] = None
+				return
+			if time.time() - last < interval:
+				continue
+			last = time.time()
+			line = statusLine()
+			if terminal:
+				width = shutil.get_terminal_size().columns - 1
+				sys.stdout.write('\r' + line[:width].ljust(width))
+				totals['status_shown'] = True
+			else:
+				sys.stdout.write('Progress: ' + line + '\n')
+			sys.stdout.flush()
+
+
+#function ends a status line that was drawn on the terminal, so the next print starts on a new line
+def endStatus():
+	if totals['status_shown']:
+		sys.stdout.write('\n')
+		sys.stdout.flush()
+		totals['status_shown'] = False
+
+
+#function reads ffmpeg's progress blocks from a pipe into the job state
+def readProgress(pipe, job):
+	block = {}
+	for line in pipe:
+		key, _, value = line.strip().partition('=')
+		block[key] = value
+		if key != 'progress':
+			continue
+		with lock:
+			try:
+				job['out_time_s'] = max(int(block.get('out_time_us', 'N/A')) / 1e6, 0)
+			except ValueError:
+				pass
+			for key, convert in [('frame', int), ('fps', float), ('total_size', int)]:
+				try:
+					job[key] = convert(block.get(key, 'N/A'))
+				except ValueError:
+					pass
+			try:
+				job['speed'] = float(block.get('speed', 'N/A').rstrip('x'))
+			except ValueError:
+				pass
+		block = {}
+
+
+#function waits for a process, returns its return code and CPU seconds (None where os.wait4 is missing, e.g. Windows)
+def waitProcess(process):
+	if not hasattr(os, 'wait4'):
+		return process.wait(), None
+	pid, status, usage = os.wait4(process.pid, 0)
+	process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+	return process.returncode, usage.ru_utime + usage.ru_stime
+
+
+#function appends the metrics of a finished job to the metrics log
+def writeMetrics(job, command, returncode, wall_s, cpu_s, outputs):
+	if metrics_log == '':
+		return
+	output_bytes = sum(os.path.getsize(x) for x in outputs if os.path.isfile(x)) if outputs else job['total_size']
+	metrics = {
+		'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(job['started'])),
+		'tool': os.path.basename(sys.argv[0]),
+		'job': job['name'],
+		'returncode': returncode,
+		'wall_s': round(wall_s, 3),
+		'cpu_s': round(cpu_s, 3) if cpu_s is not None else None,
+		'input_bytes': sum(os.path.getsize(x) for x in inputFiles(command)),
+		'output_bytes': output_bytes,
+		'media_s': round(job['out_time_s'], 3),
+		'frames': job['frame'],
+		'fps': round(job['frame'] / max(wall_s, 0.001), 2),
+		'speed': round(job['out_time_s'] / max(wall_s, 0.001), 3),
+		'command': subprocess.list2cmdline(command),
+	}
+	with lock:
+		with open(metrics_log, 'a') as file:
+			file.write(json.dumps(metrics) + '\n')
+
+
+#function runs an ffmpeg command with -progress, shows its progress on the status line and logs its metrics
+# ffmpeg's log is passed to out() when it is done, unless out is print (then it goes to the terminal, and ffmpeg can ask before overwriting)
+# name is shown on the status line, duration (seconds of media the job processes) gives its percent done and ETA
+# outputs are the output files whose size is logged, by default the last argument of the command
+# returns ffmpeg's return code
+def runFFmpeg(command, out=print, name='', duration=0, outputs=None):
+	if outputs is None:
+		outputs = [command[-1]]
+	with lock:
+		totals['next_id'] += 1
+		job_id = totals['next_id']
+		job = {'name': name or os.path.basename(str(command[-1])), 'duration': duration, 'started': time.time(),
+			'out_time_s': 0.0, 'frame': 0, 'fps': 0.0, 'speed': 0.0, 'total_size': 0}
+	t0 = time.time()
+	command = progressCommand(command)
+	try:
+		process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=None if out is print else subprocess.PIPE, stdin=None if out is print else subprocess.DEVNULL, universal_newlines=True)
+	except OSError as error:
+		out(str(error))
+		return -1
+	with lock:
+		running[job_id] = job
+		if printer['thread'] is None:
+			printer['thread'] = threading.Thread(target=printStatus, daemon=True)
+			printer['thread'].start()
+	log = []
+	reader = None
+	if out is not print:
+		reader = threading.Thread(target=lambda: log.extend(process.stderr.read().splitlines()), daemon=True)
+		reader.start()
+	readProgress(process.stdout, job)
+	if reader is not None:
+		reader.join()
+	returncode, cpu_s = waitProcess(process)
+	wall_s = time.time() - t0
+	with lock:
+		del running[job_id]
+		totals['done_s'] += duration
+		totals['cpu_s'] += cpu_s or 0
+		if len(running) == 0:
+			endStatus()
+	for line in log:
+		out(line)
+	writeMetrics(job, command, returncode, wall_s, cpu_s, outputs)
+	return returncode
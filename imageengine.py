@@ -0,0 +1,280 @@
+#Resizes images in this process with Pillow, used by resize-image.py (ffmpeg is the fallback for what Pillow can't do)
+#Github: ...
+
+#default parameters
+resample_filter = 'LANCZOS' #Pillow resampling filter: LANCZOS, BICUBIC, BILINEAR etc
+draft_factor = 1 #a JPEG is decoded at 1/2, 1/4 or 1/8 scale (DCT scaling) if that is still at least draft_factor times the output size, then resampled. 0 decodes full size
+reducing_gap = 2.0 #a large image is first reduced by an integer factor (box average) to at least reducing_gap times the output size, then resampled. 0 resamples in one step
+jpeg_quality = 90 #quality of JPEG outputs, 1 to 95
+png_compress_level = 6 #zlib level of PNG outputs, 0 to 9
+blocks_max = 64 #memory blocks Pillow keeps for the next image instead of freeing them, 0 frees every image's memory
+pillow_cost = 5 #with engine auto: Pillow's time per decoded pixel relative to ffmpeg's per input pixel (Pillow's scaler has no SIMD)
+ffmpeg_start_pixels = 1000000 #with engine auto: starting an ffmpeg process costs as much as resizing this many pixels
+cascade_gap = 2.0 #with several output sizes, a size is resampled from a larger output already made if that is at least cascade_gap times its size, else from the decoded image
+prefetch_files = 2 #in a worker process, the next images are read into memory while one is resized (slow network shares)
+pillow_formats = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.bmp': 'BMP', '.gif': 'GIF', '.tif': 'TIFF', '.tiff': 'TIFF', '.webp': 'WEBP'} #file extension -> Pillow format
+
+
+'''
+Copyright (c) 2018 JP Janssen
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+#the output size follows ffmpeg's scale filter, so both engines make images of the same size:
+# -1 keeps the aspect ratio, both -1 keep the original size, and with fitbox 1 the image is scaled (also up) to fit the box
+# with fitbox 2 it is scaled to fill the box, and what is outside is cropped (centered)
+#an output is a dict: out_file, width, height, fitbox and quality (JPEG and WebP, 0 for jpeg_quality)
+#several outputs of one image are made from one decode (resize-image.py --derivatives), the largest first
+#a JPEG is only decoded at the resolution the resize needs (draft mode), which is most of the time saved on large photos
+#at full resolution ffmpeg's scaler is faster than Pillow's, so with auto Pillow is used for small images and reduced-size decodes
+#Pillow is optional: without it, or for animated and multi-page images, resize-image.py runs ffmpeg
+#with resize-image.py --jobs, worker processes run resizeBatch(): each worker imports Pillow once and resizes batches of images
+#ffmpeg makes several outputs from one decode too, with a split filter
+
+
+import io
+import os
+import time
+import subprocess
+import concurrent.futures
+
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
+
+if Image is not None and blocks_max > 0:
+	Image.core.set_blocks_max(blocks_max) #reuse image memory across files instead of a new allocation per image
+
+
+#function returns whether the engine can resize from the input to the output file formats
+def canResize(input_file, out_files):
+	if Image is None:
+		return False
+	return all(os.path.splitext(x)[1].lower() in pillow_formats for x in [input_file] + out_files)
+
+
+#function returns round(a * b / c) for positive numbers, as ffmpeg's av_rescale
+def rescale(a, b, c):
+	return (a * b + c // 2) // c
+
+
+#function returns the output size of ffmpeg's scale=w:h, with force_original_aspect_ratio=decrease if fitbox is 1, increase if 2
+def outputSize(in_width, in_height, width, height, fitbox):
+	w = int(width)
+	h = int(height)
+	if w < 0 and h < 0:
+		w, h = in_width, in_height
+	if w == 0:
+		w = in_width
+	if h == 0:
+		h = in_height
+	if w < 0:
+		w = rescale(h, in_width, in_height)
+	if h < 0:
+		h = rescale(w, in_height, in_width)
+	if fitbox == 1:
+		w, h = min(rescale(h, in_width, in_height), w), min(rescale(w, in_height, in_width), h)
+	elif fitbox == 2:
+		w, h = max(rescale(h, in_width, in_height), w), max(rescale(w, in_height, in_width), h)
+	return max(w, 1), max(h, 1)
+
+
+#function returns the box (left, top, right, bottom) that crops a scaled image to the box in the center as ffmpeg's crop, None if there's nothing to crop
+def cropBox(size, width, height, fitbox):
+	w = int(width)
+	h = int(height)
+	if fitbox != 2 or w <= 0 or h <= 0 or size == (w, h):
+		return None
+	left = (size[0] - w) // 2
+	top = (size[1] - h) // 2
+	return left, top, left + w, top + h
+
+
+#function returns ffmpeg's scale filter for the size (and crop filter if fitbox is 2)
+def scaleFilter(width, height, fitbox):
+	if fitbox == 2 and int(width) > 0 and int(height) > 0:
+		return 'scale=w='+str(width)+':h='+str(height)+':force_original_aspect_ratio=increase,crop='+str(width)+':'+str(height)
+	if fitbox in [1, 2]:
+		return 'scale=w='+str(width)+':h='+str(height)+':force_original_aspect_ratio=decrease'
+	return 'scale='+str(width)+':'+str(height)
+
+
+#function returns the ffmpeg command that makes the outputs, with options e.g. ['-y'] before the input
+# several outputs are made from one decode: the frames are split to a scale filter per output
+# outputs that are not GIF get the first frame only (an animated GIF can't be written to one JPEG or PNG)
+def ffmpegCommand(input_file, outputs, options=[]):
+	command = ['ffmpeg'] + options + ['-i', input_file]
+	if len(outputs) > 1:
+		graph = '[0:v]split=' + str(len(outputs)) + ''.join('[s' + str(i) + ']' for i in range(len(outputs)))
+		for i, output in enumerate(outputs):
+			graph += ';[s' + str(i) + ']' + scaleFilter(output['width'], output['height'], output['fitbox']) + '[o' + str(i) + ']'
+		command += ['-filter_complex', graph]
+	for i, output in enumerate(outputs):
+		if len(outputs) > 1:
+			command += ['-map', '[o' + str(i) + ']']
+		else:
+			command += ['-vf', scaleFilter(output['width'], output['height'], output['fitbox'])]
+		if os.path.splitext(output['out_file'])[1].lower() != '.gif':
+			command += ['-frames:v', '1']
+		command.append(output['out_file'])
+	return command
+
+
+#function returns the image converted to a mode the output format can save (JPEG has no alpha, as with ffmpeg)
+def saveMode(image, image_format):
+	if image_format == 'JPEG' and image.mode not in ['RGB', 'L', 'CMYK']:
+		return image.convert('RGB')
+	return image
+
+
+#function makes the outputs of one image from one decode
+# returns (input size, output size, draft scale, size it was resampled from) for each output,
+# or None if the engine can't read the image (then use ffmpeg)
+# with auto, also returns None if ffmpeg is expected to be faster (pillow_cost, ffmpeg_start_pixels)
+# existing out_files are only replaced if overwrite, else FileExistsError is raised
+# data is the content of input_file if it was already read into memory
+def deriveImages(input_file, outputs, overwrite=False, auto=False, data=None):
+	for output in outputs:
+		if not overwrite and os.path.exists(output['out_file']):
+			raise FileExistsError(output['out_file'])
+	try:
+		with Image.open(io.BytesIO(data) if data is not None else input_file) as image:
+			if getattr(image, 'n_frames', 1) > 1:
+				return None #animated GIF or multi-page TIFF, ffmpeg keeps the frames
+			in_size = image.size
+			sizes = [outputSize(in_size[0], in_size[1], x['width'], x['height'], x['fitbox']) for x in outputs]
+			scale = 1
+			if image.format == 'JPEG' and draft_factor > 0:
+				image.draft(image.mode, (max(x[0] for x in sizes) * draft_factor, max(x[1] for x in sizes) * draft_factor))
+				scale = in_size[0] // image.size[0]
+			if auto and image.size[0] * image.size[1] * pillow_cost > in_size[0] * in_size[1] + ffmpeg_start_pixels:
+				return None
+			icc_profile = image.info.get('icc_profile')
+			image.load()
+			if image.mode in ['P', 'PA', '1']: #resample in full color
+				image = image.convert('RGBA' if image.mode == 'PA' or image.info.get('transparency') is not None else 'RGB')
+
+			#largest first, each from the smallest uncropped image made so far that is cascade_gap times larger
+			sources = [image]
+			made = [None] * len(outputs)
+			for i in sorted(range(len(outputs)), key=lambda i: -sizes[i][0] * sizes[i][1]):
+				source = image
+				for candidate in sources:
+					if candidate.size == sizes[i] or (candidate.size[0] >= sizes[i][0] * cascade_gap and candidate.size[1] >= sizes[i][1] * cascade_gap):
+						source = candidate
+				resized = source.resize(sizes[i], getattr(Image.Resampling, resample_filter), reducing_gap=reducing_gap or None) if sizes[i] != source.size else source
+				sources.append(resized)
+				box = cropBox(sizes[i], outputs[i]['width'], outputs[i]['height'], outputs[i]['fitbox'])
+				made[i] = (resized.crop(box) if box is not None else resized, source.size)
+	except (OSError, ValueError, Image.DecompressionBombError):
+		return None
+	results = []
+	for output, (resized, source_size) in zip(outputs, made):
+		image_format = pillow_formats[os.path.splitext(output['out_file'])[1].lower()]
+		options = {}
+		if image_format in ['JPEG', 'WEBP']:
+			options['quality'] = int(output.get('quality') or jpeg_quality)
+		elif image_format == 'PNG':
+			options['compress_level'] = png_compress_level
+		if icc_profile and image_format in ['JPEG', 'PNG', 'TIFF', 'WEBP']:
+			options['icc_profile'] = icc_profile
+		try:
+			saveMode(resized, image_format).save(output['out_file'], image_format, **options)
+		except (OSError, ValueError, KeyError):
+			for x in outputs[:len(results) + 1]:
+				if os.path.isfile(x['out_file']):
+					os.remove(x['out_file'])
+			return None
+		results.append((in_size, resized.size, scale, source_size))
+	return results
+
+
+#function loads Pillow's format plugins, so a worker process does it once before its first batch
+def initWorker():
+	if Image is not None:
+		Image.init()
+
+
+#function reads a file into memory, None if it can't be read (then the resize reads it and reports the error)
+def readFile(path):
+	try:
+		with open(path, 'rb') as file:
+			return file.read()
+	except OSError:
+		return None
+
+
+#function makes the outputs of one image, with Pillow if the engine allows and it can, else with ffmpeg
+# task is a dict: input_file, outputs, overwrite, engine ('auto', 'pillow' or 'ffmpeg')
+# interactive runs ffmpeg with the terminal (it prints its log, and asks before overwriting an output), after printing the command with out()
+# else ffmpeg is quiet and never overwrites (unless overwrite), for worker processes
+# returns a dict for the report: input_file, out_files, engine ('pillow', 'ffmpeg', '' if failed), in_size, sizes, sources (sizes resampled from), scale, seconds, error
+def resizeTask(task, data=None, interactive=False, out=print):
+	t0 = time.time()
+	out_files = [x['out_file'] for x in task['outputs']]
+	result = {'input_file': task['input_file'], 'out_files': out_files, 'engine': '', 'in_size': None, 'sizes': [], 'sources': [], 'scale': 1, 'seconds': 0.0, 'error': ''}
+	exists = [x for x in out_files if os.path.exists(x)]
+	if len(exists) > 0 and not task['overwrite'] and not interactive:
+		result['error'] = ', '.join(exists) + ' already exists, not overwritten'
+		return result
+	if task['engine'] != 'ffmpeg' and canResize(task['input_file'], out_files) and (task['overwrite'] or len(exists) == 0):
+		made = deriveImages(task['input_file'], task['outputs'], task['overwrite'], task['engine'] == 'auto', data)
+		if made is not None:
+			result['engine'] = 'pillow'
+			result['in_size'], result['scale'] = made[0][0], made[0][2]
+			result['sizes'] = [x[1] for x in made]
+			result['sources'] = [x[3] for x in made]
+			result['seconds'] = time.time() - t0
+			return result
+	try:
+		if interactive:
+			command = ffmpegCommand(task['input_file'], task['outputs'], ['-y'] if task['overwrite'] else [])
+			out('Run command:')
+			out(' ' + subprocess.list2cmdline(command))
+			returncode = subprocess.call(command)
+			error = ''
+		else:
+			command = ffmpegCommand(task['input_file'], task['outputs'], ['-y' if task['overwrite'] else '-n', '-loglevel', 'error'])
+			process = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+			returncode, error = process.returncode, process.stderr.strip()
+		if returncode == 0:
+			result['engine'] = 'ffmpeg'
+		else:
+			result['error'] = error or 'ffmpeg returned ' + str(returncode)
+	except OSError as error:
+		result['error'] = str(error)
+	result['seconds'] = time.time() - t0
+	return result
+
+
+#function resizes a batch of images in a worker process, returns the results in the order of the tasks
+# the next prefetch_files inputs are read by threads while an image is resized
+def resizeBatch(tasks):
+	results = []
+	with concurrent.futures.ThreadPoolExecutor(max_workers=max(prefetch_files, 1)) as reader:
+		reads = {}
+		for i, task in enumerate(tasks):
+			for j in range(i, min(i + prefetch_files + 1, len(tasks))):
+				if j not in reads:
+					reads[j] = reader.submit(readFile, tasks[j]['input_file'])
+			results.append(resizeTask(task, reads.pop(i).result()))
+	return results
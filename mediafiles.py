@@ -0,0 +1,98 @@
+#Finds the input files of detect-motion.py, cut-video.py, resize-video.py and resize-image.py
+#Github: ...
+
+#default parameters
+skip_folders = ['.*', '__pycache__', 'scenescore-cache', 'media-info', 'keyframe-index', 'live-state', 'chunks-*', 'segments-*', 'serial-*', 'samples-*', 'benchmark-*', 'smartcut-*', 'cutcompare-*'] #folders that are never searched in subfolders: hidden folders, and the scripts' caches and temporary folders
+
+
+'''
+Copyright (c) 2018 JP Janssen
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+#each folder is read once with os.scandir, and a file's extension is looked up (in lower case) in a set of the formats
+#so .mp4, .MP4 and .Mp4 are all found, with one pass over the folder instead of one glob per format
+#files are yielded one folder at a time (sorted by name, then the subfolders), so a caller can start on the first
+#files before a large tree is listed
+
+
+import os
+import fnmatch
+
+
+#function returns whether a path (relative to the searched folder) or its name matches one of the patterns, case-insensitive
+def matches(path, patterns):
+	path = path.replace(os.sep, '/').lower()
+	name = path.rsplit('/', 1)[-1]
+	for pattern in patterns:
+		pattern = pattern.lower()
+		if fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(path, pattern):
+			return True
+	return False
+
+
+#function yields the files in a folder with one of the extensions in file_formats (e.g. ['MP4', 'MOV'], any case)
+# directory '' searches the current folder and yields bare file names, else the paths start with directory
+# recursive also searches subfolders (not symlinked ones, and not skip_folders)
+# include: only files matching one of these patterns are yielded (all if empty), exclude: files and folders matching one are skipped
+# patterns are matched against the name and the path relative to directory, e.g. '*2024*', 'cam1/*', 'old'
+def findFiles(file_formats, directory='', recursive=False, include=[], exclude=[]):
+	extensions = set('.' + x.lower().lstrip('.') for x in file_formats)
+	folders = ['']
+	while len(folders) > 0:
+		folder = folders.pop()
+		files = []
+		subfolders = []
+		try:
+			with os.scandir(os.path.join(directory, folder) or '.') as entries:
+				for entry in entries:
+					path = os.path.join(folder, entry.name)
+					try:
+						if recursive and entry.is_dir(follow_symlinks=False):
+							if not matches(entry.name, skip_folders) and not matches(path, exclude):
+								subfolders.append(path)
+							continue
+						if os.path.splitext(entry.name)[1].lower() not in extensions or not entry.is_file():
+							continue
+					except OSError:
+						continue
+					if len(include) > 0 and not matches(path, include):
+						continue
+					if matches(path, exclude):
+						continue
+					files.append(path)
+		except OSError:
+			continue
+		for path in sorted(files, key=str.lower):
+			yield os.path.join(directory, path)
+		folders.extend(sorted(subfolders, key=str.lower, reverse=True))
+
+
+#function yields lists of up to size items from an iterable (e.g. findFiles()), the first list before the iterable is used up
+def blocks(items, size):
+	block = []
+	for item in items:
+		block.append(item)
+		if len(block) >= size:
+			yield block
+			block = []
+	if len(block) > 0:
+		yield block
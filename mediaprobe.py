@@ -0,0 +1,289 @@
+#Reads information about media files with ffprobe
+#Github: ...
+
+#default parameters
+keyframe_index_dir = 'keyframe-index' #keyframe indexes are kept here, so each file is only indexed once. '' to disable
+media_info_dir = 'media-info' #codec, size, frame rate, bitrate and duration of probed files are kept here. '' to disable
+
+
+'''
+Copyright (c) 2018 JP Janssen
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+import os
+import json
+import bisect
+import hashlib
+import subprocess
+
+
+#function returns duration of a media file in seconds, 0 if unknown
+def probeDuration(input_file):
+	command = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', input_file]
+	try:
+		result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+		return float(result.stdout.strip())
+	except (OSError, ValueError):
+		return 0.0
+
+
+#function returns frame rate of the first video stream, 0 if unknown
+def probeFrameRate(input_file):
+	command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=avg_frame_rate,r_frame_rate', '-of', 'default=noprint_wrappers=1', input_file]
+	try:
+		result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+	except OSError:
+		return 0.0
+	rates = {}
+	for line in result.stdout.splitlines():
+		key, _, value = line.partition('=')
+		num, _, den = value.partition('/')
+		try:
+			rates[key] = float(num) / float(den or 1)
+		except (ValueError, ZeroDivisionError):
+			pass
+	return rates.get('avg_frame_rate') or rates.get('r_frame_rate') or 0.0
+
+
+#function returns seconds from the start of a file to its first video frame (the start that -ss counts from), 0 if unknown
+# e.g. 0.023 in a file where the audio starts before the video
+def probeVideoStart(input_file):
+	command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=start_time:format=start_time', '-of', 'json', input_file]
+	try:
+		result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+		probe = json.loads(result.stdout)
+	except (OSError, ValueError):
+		return 0.0
+	streams = probe.get('streams', [])
+	if len(streams) == 0:
+		return 0.0
+	return max(probeNumber(streams[0].get('start_time', 0)) - probeNumber(probe.get('format', {}).get('start_time', 0)), 0.0)
+
+
+#function returns the start time of a file, 0 if unknown
+# time stamps that ffmpeg starts at zero (e.g. scene scores) are this much lower than the file times of -copyts, e.g. 1.4 in many MTS files
+def probeStartTime(input_file):
+	command = ['ffprobe', '-v', 'error', '-show_entries', 'format=start_time', '-of', 'default=noprint_wrappers=1:nokey=1', input_file]
+	try:
+		result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+	except OSError:
+		return 0.0
+	return probeNumber(result.stdout.strip())
+
+
+#function returns codec, profile, pixel format, size and time base of the first video stream as a dict of strings, {} if unknown
+def probeVideoStream(input_file):
+	command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=codec_name,profile,pix_fmt,width,height,time_base,r_frame_rate', '-of', 'default=noprint_wrappers=1', input_file]
+	try:
+		result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+	except OSError:
+		return {}
+	stream = {}
+	for line in result.stdout.splitlines():
+		key, _, value = line.partition('=')
+		stream[key] = value
+	return stream
+
+
+#function returns the time stamps (pts_time) of all video packets of a file, sorted
+def probeFrameTimes(input_file):
+	command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'packet=pts_time', '-of', 'csv=p=0', input_file]
+	try:
+		result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+	except OSError:
+		return []
+	times = []
+	for line in result.stdout.splitlines():
+		try:
+			times.append(float(line.strip().strip(',')))
+		except ValueError:
+			pass
+	return sorted(times)
+
+
+#function returns a number from an ffprobe value (e.g. '1920', '30000/1001' or 'N/A'), 0 if unknown
+def probeNumber(value):
+	num, _, den = str(value).partition('/')
+	try:
+		return float(num) / float(den or 1)
+	except (ValueError, ZeroDivisionError):
+		return 0.0
+
+
+#function returns container, duration and the first video and audio streams of a file in one ffprobe run, None if it has no video
+# dict with format, duration, video_codec, pix_fmt, width, height, fps, video_kbps and audio_codec ('' if no audio)
+# video_kbps is the stream's bitrate, or the file's bitrate if the container doesn't store it per stream (e.g. mkv)
+def probeMedia(input_file):
+	command = ['ffprobe', '-v', 'error', '-show_entries', 'format=format_name,duration,bit_rate:stream=codec_type,codec_name,pix_fmt,width,height,avg_frame_rate,r_frame_rate,bit_rate', '-of', 'json', input_file]
+	try:
+		result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+		probe = json.loads(result.stdout)
+	except (OSError, ValueError):
+		return None
+	streams = probe.get('streams', [])
+	video = [stream for stream in streams if stream.get('codec_type') == 'video']
+	audio = [stream for stream in streams if stream.get('codec_type') == 'audio']
+	if len(video) == 0:
+		return None
+	video = video[0]
+	file_format = probe.get('format', {})
+	video_kbps = probeNumber(video.get('bit_rate', 0)) or probeNumber(file_format.get('bit_rate', 0))
+	return {
+		'format': file_format.get('format_name', ''),
+		'duration': probeNumber(file_format.get('duration', 0)),
+		'video_codec': video.get('codec_name', ''),
+		'pix_fmt': video.get('pix_fmt', ''),
+		'width': int(probeNumber(video.get('width', 0))),
+		'height': int(probeNumber(video.get('height', 0))),
+		'fps': probeNumber(video.get('avg_frame_rate', 0)) or probeNumber(video.get('r_frame_rate', 0)),
+		'video_kbps': video_kbps / 1000,
+		'audio_codec': audio[0].get('codec_name', '') if len(audio) > 0 else '',
+	}
+
+
+#function reads all video packets of a file with ffprobe (no decoding) and returns a keyframe index
+# for each keyframe: pts_time, dts_time, byte offset (pos) and number of frames until the next keyframe (gop_frames)
+# returns None if the file has no video keyframes
+def probeKeyframes(input_file):
+	command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'packet=pts_time,dts_time,duration_time,pos,flags', '-of', 'compact=p=0', input_file]
+	try:
+		process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+	except OSError:
+		return None
+	index = {'frames': 0, 'duration': 0.0, 'pts_time': [], 'dts_time': [], 'pos': [], 'gop_frames': []}
+	for line in process.stdout:
+		packet = {}
+		for field in line.strip().split('|'):
+			key, _, value = field.partition('=')
+			packet[key] = value
+		try:
+			dts_time = float(packet.get('dts_time', 'N/A'))
+		except ValueError:
+			dts_time = None
+		try:
+			pts_time = float(packet.get('pts_time', 'N/A'))
+		except ValueError:
+			pts_time = dts_time
+		if pts_time is None:
+			continue
+		if dts_time is None:
+			dts_time = pts_time
+		try:
+			duration_time = float(packet.get('duration_time', 'N/A'))
+		except ValueError:
+			duration_time = 0.0
+		index['duration'] = max(index['duration'], pts_time + duration_time)
+		index['frames'] += 1
+		if 'K' in packet.get('flags', ''):
+			try:
+				pos = int(packet.get('pos', 'N/A'))
+			except ValueError:
+				pos = -1
+			index['pts_time'].append(pts_time)
+			index['dts_time'].append(dts_time)
+			index['pos'].append(pos)
+			index['gop_frames'].append(0)
+		if len(index['gop_frames']) > 0:
+			index['gop_frames'][-1] += 1
+	process.wait()
+	if len(index['pts_time']) == 0:
+		return None
+	#packets are in decode order, keyframes are sorted by time for searching
+	order = sorted(range(len(index['pts_time'])), key=lambda i: index['pts_time'][i])
+	for key in ['pts_time', 'dts_time', 'pos', 'gop_frames']:
+		index[key] = [index[key][i] for i in order]
+	return index
+
+
+#function returns the cache file of an input file in a cache directory
+def cacheFile(input_file, directory):
+	return os.path.join(directory, hashlib.sha1(os.path.abspath(input_file).encode('utf-8')).hexdigest()[:16] + '.json')
+
+
+#function returns the cached data of a file, None if it is not cached or the file changed since (size or modification time)
+def readCache(cache_file, stat):
+	try:
+		with open(cache_file) as file:
+			data = json.load(file)
+		if data['size'] == stat.st_size and data['mtime_ns'] == stat.st_mtime_ns:
+			return data
+	except (OSError, ValueError, KeyError):
+		pass
+	return None
+
+
+#function saves data of a file to the cache, with the file's size and modification time
+def writeCache(cache_file, data, stat):
+	data['size'] = stat.st_size
+	data['mtime_ns'] = stat.st_mtime_ns
+	try:
+		os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+		with open(cache_file + '.tmp', 'w') as file:
+			json.dump(data, file, separators=(',', ':'))
+		os.replace(cache_file + '.tmp', cache_file)
+	except OSError:
+		pass
+
+
+#function returns probeMedia() of a file, from the cache if the file hasn't changed since it was probed
+def mediaInfo(input_file, directory=media_info_dir):
+	stat = os.stat(input_file)
+	cache_file = ''
+	if directory != '':
+		cache_file = cacheFile(input_file, directory)
+		info = readCache(cache_file, stat)
+		if info is not None:
+			return info
+	info = probeMedia(input_file)
+	if info is not None and cache_file != '':
+		writeCache(cache_file, info, stat)
+	return info
+
+
+#function returns the keyframe index of a file, from the cache if the file hasn't changed since it was indexed
+def keyframeIndex(input_file, directory=keyframe_index_dir):
+	stat = os.stat(input_file)
+	cache_file = ''
+	if directory != '':
+		cache_file = cacheFile(input_file, directory)
+		index = readCache(cache_file, stat)
+		if index is not None:
+			return index
+	index = probeKeyframes(input_file)
+	if index is not None and cache_file != '':
+		writeCache(cache_file, index, stat)
+	return index
+
+
+#function returns the number of the last keyframe at or before sec (first keyframe if there is none before)
+# times within half a millisecond count as the same, so a keyframe time printed with 3 decimals finds that keyframe
+def keyframeBefore(index, sec):
+	return max(bisect.bisect_right(index['pts_time'], sec + 0.0005) - 1, 0)
+
+
+#function returns a one line summary of a keyframe index
+def keyframeSummary(index):
+	gops = len(index['pts_time'])
+	summary = str(gops) + ' keyframes in ' + str(index['frames']) + ' frames'
+	summary += ', GOP avg ' + '%.0f'%(index['frames'] / gops) + ' frames (' + '%.2f'%(index['duration'] / gops) + 's)'
+	summary += ', max ' + str(max(index['gop_frames'])) + ' frames'
+	return summary
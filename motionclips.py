@@ -0,0 +1,267 @@
+#Finds motion clips from scene scores, used by detect-motion.py and resize-video.py --motion-aware
+#Github: ...
+
+#motion analysis parameters, shared by both scripts so they find the same motion
+step_len_f = 20 #compare every n frame
+before_s = 2.5 #set start point N seconds before motion is triggered
+after_s = 2 #set end point N seconds after motion has ended
+min_copy_break_s = 4.9 #dont stop copying if next motion trigger sooner than this
+ignore_start_s = 2 #seconds dont search for motion in beginning of input file
+ignore_end_s = 2 #seconds dont search for motion at end of input file
+min_threshold_score = 0.0095 #default threshold. a score above indicates motion
+test_duration_s = 7 #seek for a (motionless'ish) segment this long. threshold automatically adjusts up if necessary (and possible)
+max_threshold_score = 0.04
+segments_smooth = 0 #assign median score from n segments before and after to smooth out scores
+segments_to_start = 2 #this many segments in a row above threshold triggers motion start
+segments_to_end = 10 #this many segments in a row below threshold triggers motion end
+
+'''
+Copyright (c) 2018 JP Janssen
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+import statistics
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+#function gives each frame the median score from +/- n frames
+# windows are cut short at the start and end of the file
+def medianScores(scene_score, smooth=segments_smooth):
+	scene_score = numpy.asarray(scene_score, dtype=numpy.float64)
+	n = len(scene_score)
+	if smooth <= 0 or n == 0:
+		return scene_score.copy()
+	median_score = numpy.empty(n)
+	width = 2 * smooth + 1
+	if n >= width:
+		median_score[smooth:n-smooth] = numpy.median(sliding_window_view(scene_score, width), axis=1)
+	for x in list(range(min(smooth, n))) + list(range(max(n-smooth, smooth), n)):
+		median_score[x] = numpy.median(scene_score[max(0,x-smooth):x+smooth+1])
+	return median_score
+
+
+#function returns the longest motionless period (in seconds) for a given threshold
+# a period only counts if it is followed by a frame with motion
+def longestMotionless(median_score, pts_time, threshold):
+	if len(median_score) < 2:
+		return 0
+	change = ~(median_score < threshold)
+	x = numpy.arange(len(change))
+	last_change_x = numpy.maximum.accumulate(numpy.where(change, x, -1))
+	last_change_s = numpy.where(last_change_x >= 0, pts_time[numpy.maximum(last_change_x, 0)], 0)
+	run_s = pts_time - last_change_s
+	ends_run = ~change[:-1] & change[1:]
+	if not ends_run.any():
+		return 0
+	return max(0, run_s[:-1][ends_run].max())
+
+
+#function finds the file's threshold score
+# try to increase threshold if no motionless period found
+def fileThreshold(median_score, pts_time, min_threshold=min_threshold_score, max_threshold=max_threshold_score, test_duration=test_duration_s):
+	file_threshold_score = min_threshold
+	while True:
+		if longestMotionless(median_score, pts_time, file_threshold_score) <= test_duration:
+			file_threshold_score += min_threshold
+			if file_threshold_score > max_threshold:
+				file_threshold_score = min_threshold
+				break
+		else:
+			break
+	return file_threshold_score
+
+
+#function returns last frame where a trigger can be set
+def lastTriggerFrame(n, to_start=segments_to_start, to_end=segments_to_end):
+	return n - max(to_start, to_end)
+
+
+#function returns each frame's TRIGGER score [-1,0,+1]
+# +1 if n frames in a row (from this one) are above threshold, -1 if n frames in a row are not
+# window counts come from a cumulative sum, so each frame costs the same regardless of window length
+def triggerScores(median_score, threshold, to_start=segments_to_start, to_end=segments_to_end):
+	n = len(median_score)
+	trigger = numpy.zeros(n, dtype=numpy.int8)
+	x_max = lastTriggerFrame(n, to_start, to_end)
+	if x_max <= 0:
+		return trigger
+	above = numpy.concatenate(([0], numpy.cumsum(median_score > threshold)))
+	x = numpy.arange(x_max)
+	run_start = above[x+to_start] - above[x]
+	run_end = above[x+to_end] - above[x]
+	trigger[:x_max] = numpy.where(run_start == to_start, 1, numpy.where(run_end == 0, -1, 0))
+	return trigger
+
+
+#function returns each frame's COPY score [-1,0,+1], i.e. "smart" start and end points
+# a trigger of -1 only ends the copy if there is no new +1 trigger within min_copy_break_s
+# frames near the end of the file end an ongoing copy
+def copyScores(pts_time, trigger, to_start=segments_to_start, to_end=segments_to_end, ignore_start=ignore_start_s, ignore_end=ignore_end_s, copy_break=min_copy_break_s):
+	n = len(pts_time)
+	copy = numpy.zeros(n, dtype=numpy.int8)
+	if n == 0:
+		return copy
+	x_max = lastTriggerFrame(n, to_start, to_end)
+	end_time_s = pts_time[n-1]
+	x = numpy.arange(n)
+	in_range = ~(pts_time < ignore_start)
+	near_end = in_range & ((x >= x_max) | (pts_time > end_time_s - ignore_end))
+	in_range &= ~near_end
+	start_x = numpy.flatnonzero(trigger == 1)
+	can_start_x = numpy.flatnonzero(in_range & (trigger == 1))
+	can_end_x = numpy.flatnonzero(in_range & (trigger == -1))
+	near_end_x = numpy.flatnonzero(near_end)
+
+	next_x = 0
+	while True:
+		i = numpy.searchsorted(can_start_x, next_x)
+		if i == len(can_start_x):
+			break
+		start = can_start_x[i]
+		copy[start] = 1
+
+		#first -1 trigger that is not followed by a +1 trigger within min_copy_break_s
+		end = -1
+		for y in can_end_x[numpy.searchsorted(can_end_x, start, side='right'):]:
+			next_start = numpy.searchsorted(start_x, y, side='right')
+			if next_start == len(start_x):
+				end = y
+				break
+			next_start = start_x[next_start]
+			if next_start > y+1 and (pts_time[y+1:next_start] - pts_time[y]).max() > copy_break:
+				end = y
+				break
+
+		#frames near the end of the file end the copy
+		last = end if end >= 0 else n
+		copy[near_end_x[(near_end_x > start) & (near_end_x < last)]] = -1
+		if end < 0:
+			break
+		copy[end] = -1
+		next_x = end + 1
+	return copy
+
+
+#function returns copy start and end times in seconds
+def copyTimes(pts_time, copy, before=before_s, after=after_s):
+	end_time_s = float(pts_time[len(pts_time)-1])
+	copy_start_s = []
+	copy_end_s = []
+	for start, end in zip(pts_time[copy == 1].tolist(), pts_time[copy == -1].tolist()):
+		copy_start_s.append(max(start - before, 0))
+		copy_end_s.append(min(end + after, end_time_s))
+	return copy_start_s, copy_end_s
+
+
+#functions below find clips incrementally, for recordings that are still growing and for streams
+# the state is a dict that can be saved as json, so detection can resume after a restart
+# memory is bounded by the analysis window (smoothing, trigger window and min_copy_break_s), not the recording length
+# the threshold is fixed (no search for a motionless period, the whole file is not known yet)
+
+
+#function returns a new live detector state
+def liveState(threshold=min_threshold_score, smooth=segments_smooth, to_start=segments_to_start, to_end=segments_to_end, ignore_start=ignore_start_s, copy_break=min_copy_break_s, before=before_s, after=after_s):
+	return {
+		'threshold': threshold, 'smooth': smooth, 'to_start': to_start, 'to_end': to_end,
+		'ignore_start': ignore_start, 'copy_break': copy_break, 'before': before, 'after': after,
+		'samples': 0, #number of scores added
+		'last_time': -1.0, #pts_time of last score added
+		'raw': [], #last 2*smooth+1 (pts_time, score), for the median
+		'medians': [], #(pts_time, median) waiting for enough later medians to set a trigger
+		'is_copying': 0,
+		'start_time': 0.0,
+		'pending_ends': [], #pts_time of -1 triggers that end the copy unless a +1 trigger comes within copy_break
+	}
+
+
+#function adds one scene score, returns list of events ('start' or 'end', time in seconds) decided by it
+def liveAddScore(state, pts_time, score):
+	state['samples'] += 1
+	state['last_time'] = pts_time
+	smooth = state['smooth']
+	raw = state['raw']
+	raw.append((pts_time, score))
+	if len(raw) > 2 * smooth + 1:
+		del raw[0]
+	#median of the sample smooth steps back is known now
+	x = state['samples'] - 1 - smooth
+	if x < 0:
+		return []
+	first = max(0, x - smooth) - (state['samples'] - len(raw))
+	center = len(raw) - 1 - smooth
+	return liveAddMedian(state, raw[center][0], statistics.median([s for t, s in raw[first:]]))
+
+
+#function adds one median score, sets the trigger of the oldest median when enough later medians are known
+def liveAddMedian(state, pts_time, median):
+	medians = state['medians']
+	medians.append((pts_time, median))
+	if len(medians) < max(state['to_start'], state['to_end'], 1):
+		return []
+	above = [m > state['threshold'] for t, m in medians]
+	trigger = 0
+	if sum(above[:state['to_start']]) == state['to_start']:
+		trigger = 1
+	elif sum(above[:state['to_end']]) == 0:
+		trigger = -1
+	trigger_time = medians[0][0]
+	del medians[0]
+	return liveAddTrigger(state, trigger_time, trigger)
+
+
+#function runs the copy state machine for one trigger, same rules as copyScores()
+def liveAddTrigger(state, pts_time, trigger):
+	events = []
+	if pts_time < state['ignore_start']:
+		return events
+	if state['is_copying'] == 1:
+		pending_ends = state['pending_ends']
+		if trigger == 1:
+			del pending_ends[:]
+		elif len(pending_ends) > 0 and pts_time - pending_ends[0] > state['copy_break']:
+			events.append(('end', pending_ends[0] + state['after']))
+			del pending_ends[:]
+			state['is_copying'] = 0
+			return events
+		if trigger == -1:
+			pending_ends.append(pts_time)
+	elif trigger == 1:
+		state['is_copying'] = 1
+		state['start_time'] = pts_time
+		events.append(('start', max(pts_time - state['before'], 0)))
+	return events
+
+
+#function ends detection (end of recording or stream), returns the last events
+# an ongoing copy ends at its first pending end point, else at the last sample that could be analysed
+def liveFinish(state):
+	events = []
+	if state['is_copying'] == 1:
+		end_time = state['last_time']
+		if len(state['medians']) > 0:
+			end_time = state['medians'][0][0]
+		if len(state['pending_ends']) > 0:
+			end_time = state['pending_ends'][0]
+		events.append(('end', min(end_time + state['after'], state['last_time'])))
+		state['is_copying'] = 0
+		state['pending_ends'] = []
+	return events
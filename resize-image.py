@@ -8,11 +8,20 @@
 out_format = '' #default keep original, specify to force 'jpg', 'png', etc  
 height = 2160 #height in pixels, -1 keeps original aspect ratio
 width = 3840 #width in pixels, -1 keeps original aspect ratio
-fitbox = 1 #0 or 1. Whether to keep aspect ratio while neither height nor width can be more than specified
+fitbox = 1 #0, 1 or 2. 1 keeps aspect ratio while neither height nor width can be more than specified, 2 fills width x height and crops what is outside (centered)
 long_filename = True #whether to include dimensions etc in output file name
 process_outputs = False #whether to use output files from previous times script was run as new inputs
 delete_input_files = False
-file_formats = ['JPG', 'JPEG', 'PNG', 'BMP', 'GIF', 'TIF', 'TIFF']
+engine = 'auto' #'pillow' resizes in this process (imageengine.py), with ffmpeg for what Pillow can't read or if it's not installed. 'ffmpeg' runs ffmpeg for every image. 'auto' uses Pillow where it's faster (small images, and JPEGs it can decode at reduced size)
+jobs = 1 #images resized at the same time in worker processes, 0 for the number of cores
+derivatives = [] #sizes made from one decode of each image, as (width, height, fitbox, format, quality), e.g. [(-1, -1, 0, 'jpg', 90), (1920, 1920, 1), (600, 400, 2), (200, 200, 1, 'jpg', 80)]. Replaces height, width, fitbox and out_format
+batch_size = 0 #images sent to a worker at a time, 0 picks from the number of images and jobs (up to 64)
+input_dir = '' #folder with the image files, '' for the script's folder. Output files are saved next to their input files
+recursive = False #also process image files in subfolders of input_dir
+include = [] #only process files matching one of these patterns (name or path in input_dir, any case), e.g. ['*2024*', 'album/*']. [] for all
+exclude = [] #skip files and folders matching one of these patterns, e.g. ['*-thumb.*', 'old']
+files_per_block = 1000 #image files found, planned and resized at a time, so resizing starts before a large tree is listed
+file_formats = ['JPG', 'JPEG', 'PNG', 'BMP', 'GIF', 'TIF', 'TIFF'] #any case, .jpg and .JPG are both found
 
 
 '''
@@ -39,104 +48,282 @@ SOFTWARE.
 
 
 import os
-import glob
 import sys
 import argparse
 import textwrap
+import time
+import shutil
+import tempfile
+import concurrent.futures
+import buildmanifest
+import imageengine
+import mediafiles
 
-#parse arguments (if any, else use default)
-parser = argparse.ArgumentParser(
-	formatter_class=argparse.RawDescriptionHelpFormatter,
-    epilog=textwrap.dedent('''\
-		description:
-			Resizes every image file in script's directory, and optionally forces a new format, e.g. jpg or png.
-			The script calls a ffmpeg command, 
-				e.g.: ffmpeg -i image.jpg -vf scale=3840:-1 image-r.jpg
-        '''))
-parser.add_argument("-of", "--format", default=out_format, help='Default \''+out_format+'\'. Specify to force jpg, png, etc output file')
-parser.add_argument("-pxh", "--height", default=height, help='Default '+str(height)+'. Height in pixels of output file. If not specified, keep input image\'s aspect ratio. If both -pxh and -pxw are -1, original dimensions are kept')
-parser.add_argument("-pxw", "--width", default=width, help='Default '+str(width)+'. Width in pixels. If -1 or not specified, aspect ratio is kept')
-parser.add_argument("-fit", "--fitbox", default=fitbox, help='Default '+str(fitbox)+'. Must be 0 or 1. If 1, keep aspect ratio, and neither width nor height can be larger than specified values')
-parser.add_argument("-i", "-f", "--file", default='', help='name of input file, or substring to process any matching file name. If -1 or not specified, all image files in folder are processed.')
-args = parser.parse_args()
-out_format = args.format
-height = args.height
-width = args.width
-fitbox = args.fitbox
-process_file = args.file
-
-#remove any leading . from file extension
-out_format = out_format.strip('.')
-
-#set current dir to same directory as this .py file
-abspath = os.path.abspath(__file__)
-dname = os.path.dirname(abspath)
-os.chdir(dname)
-
-
-#find all image files
-input_files_all = []
-for x in range(len(file_formats)):
-	for file in glob.glob('*.'+file_formats[x]):
-		input_files_all.append(file)
-input_files_all = sorted(input_files_all, key=str.lower)
-print("Image files in folder:")
-for input_file in input_files_all:
-	print(' '+input_file)
-	
-	
-#filter out files not to process
-input_files = []
-for input_file in input_files_all:
-	if (process_outputs == False):
-		if '-fit-' in input_file:
-			continue
-		if '-r-' in input_file:
-			continue
-		if '-r.' in input_file:
-			continue
-	if (process_file != ''):
-		if process_file not in input_file:
-			continue
-	input_files.append(input_file)
-print("Process these files:")
-for input_file in input_files:
-	print(' '+input_file)
-
-
-#do this for each image file
-for input_file in input_files:
+
+#function returns the output file name of an input file, for a size spec (width, height, fitbox, format) or the set size
+def outputFile(input_file, spec=None):
+	if spec is None:
+		spec = {'width': width, 'height': height, 'fitbox': fitbox, 'format': out_format}
 	filename, file_extension = os.path.splitext(input_file)
-	if out_format != '':
-		file_extension = '.'+out_format 
+	if spec['format'] != '':
+		file_extension = '.'+spec['format'] 
 	out_file = filename
 	if (long_filename):
-		if int(height) <= -1 or int(width) <= -1:
+		if int(spec['height']) <= -1 or int(spec['width']) <= -1:
 			out_file += '-r'
-		elif fitbox == 1:
+		elif spec['fitbox'] == 1:
 			out_file += '-fit'
+		elif spec['fitbox'] == 2:
+			out_file += '-crop'
 		else:
 			out_file += '-r'
-		if int(height) > -1 and int(width) > -1:
-			out_file += '-'+str(width)+'x'+str(height)
+		if int(spec['height']) > -1 and int(spec['width']) > -1:
+			out_file += '-'+str(spec['width'])+'x'+str(spec['height'])
 		else:
-			if int(height) > -1:
-				out_file += '-'+str(height)+'h'	
-			if int(width) > -1:
-				out_file += '-'+str(width)+'w'
+			if int(spec['height']) > -1:
+				out_file += '-'+str(spec['height'])+'h'	
+			if int(spec['width']) > -1:
+				out_file += '-'+str(spec['width'])+'w'
 	else:
 		out_file = filename+"-r"
 	out_file += file_extension.lower()
+	return out_file
+
+
+#function returns the outputs of an input file (imageengine.py): one per derivative, or the set size
+def imageOutputs(input_file):
+	specs = derivatives or [{'width': width, 'height': height, 'fitbox': fitbox, 'format': out_format, 'quality': 0}]
+	return [dict(spec, out_file=outputFile(input_file, spec)) for spec in specs]
+
+
+#function prints the result of a resized file (see imageengine.resizeTask)
+def printResult(result, out=print):
+	if result['engine'] == '':
+		out(' '+result['input_file']+': '+result['error'])
+		return
+	took = ', '+'%.0f'%(result['seconds'] * 1000)+'ms'
+	if result['engine'] == 'ffmpeg':
+		out(' '+result['input_file']+' -> '+', '.join(result['out_files'])+' (ffmpeg)'+took)
+		return
+	line = ' '+result['input_file']+' '+'x'.join(map(str, result['in_size']))+(' (decoded at 1/'+str(result['scale'])+')' if result['scale'] > 1 else '')+' ->'
+	for out_file, size, source in zip(result['out_files'], result['sizes'], result['sources']):
+		line += ' '+out_file+' '+'x'.join(map(str, size))
+		if len(result['out_files']) > 1 and source != result['sources'][0]:
+			line += ' (from '+'x'.join(map(str, source))+')'
+		line += ','
+	out(line+took[1:])
+
+
+#function resizes one image to its outputs, with Pillow (engine pillow, or auto where it's faster) if it can read the image, else with ffmpeg
+# an existing output is left to ffmpeg, which asks before overwriting it (unless overwrite)
+# returns the engine that made the outputs ('pillow' or 'ffmpeg'), '' if it failed
+def resizeFile(input_file, overwrite=False, out=print):
+	result = imageengine.resizeTask({'input_file': input_file, 'outputs': imageOutputs(input_file), 'overwrite': overwrite, 'engine': engine}, interactive=True, out=out)
+	printResult(result, out)
+	return result['engine']
+
+
+#function resizes the files with each engine to a temporary folder, and prints images per second of each
+def benchmarkEngines(input_files):
+	directory = tempfile.mkdtemp(prefix='benchmark-', dir='.')
+	input_mb = sum(os.path.getsize(x) for x in input_files) / 1e6
+	print('Benchmark, '+str(len(input_files))+' images ('+'%.1f'%input_mb+'MB):')
+	speeds = {}
+	try:
+		for name in ['ffmpeg', 'pillow', 'auto']:
+			used = []
+			t0 = time.time()
+			for input_file in input_files:
+				outputs = [dict(x, out_file=os.path.join(directory, name+'-'+x['out_file'])) for x in imageOutputs(input_file)]
+				used.append(imageengine.resizeTask({'input_file': input_file, 'outputs': outputs, 'overwrite': True, 'engine': name})['engine'])
+			seconds = time.time() - t0
+			speeds[name] = len(input_files) / max(seconds, 0.001)
+			out_mb = sum(os.path.getsize(os.path.join(directory, x)) for x in os.listdir(directory) if x.startswith(name+'-')) / 1e6
+			line = ' '+name+': '+'%.2f'%seconds+'s, '+'%.1f'%speeds[name]+' images/s, outputs '+'%.1f'%out_mb+'MB'
+			if name != 'ffmpeg' and used.count('ffmpeg') > 0:
+				line += ' ('+str(used.count('ffmpeg'))+' with ffmpeg)'
+			if used.count('') > 0:
+				line += ', '+str(used.count(''))+' failed'
+			print(line)
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+	if speeds.get('ffmpeg', 0) > 0:
+		print(' pillow is '+'%.1f'%(speeds['pillow'] / speeds['ffmpeg'])+'x, auto '+'%.1f'%(speeds['auto'] / speeds['ffmpeg'])+'x the speed of ffmpeg')
+
+
+#function returns the pool of worker processes for resizeJobs(), it is started once and kept for all files
+def startWorkers(jobs):
+	return concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=imageengine.initWorker)
+
+
+#function resizes the files in the worker processes of executor (see startWorkers), and prints the results in the order of the files as they come back
+# each worker imports Pillow once and gets batches of batch_size images, so the overhead per image is small
+# calls done(input_file, resized) for each file in order
+def resizeJobs(executor, input_files, overwrite, jobs, done):
+	tasks = [{'input_file': input_file, 'outputs': imageOutputs(input_file), 'overwrite': overwrite[input_file], 'engine': engine} for input_file in input_files]
+	size = batch_size if batch_size > 0 else max(1, min(64, len(tasks) // (jobs * 4)))
+	batches = [tasks[i:i+size] for i in range(0, len(tasks), size)]
+	print('Resizing with '+str(jobs)+' worker processes, '+str(len(batches))+' batches of up to '+str(size)+' images')
+	for results in executor.map(imageengine.resizeBatch, batches):
+		for result in results:
+			printResult(result)
+			done(result['input_file'], result['engine'] != '')
+
+
+#the script runs below, not when worker processes import it (on Windows they start by importing the script)
+if __name__ == '__main__':
+	#parse arguments (if any, else use default)
+	parser = argparse.ArgumentParser(
+		formatter_class=argparse.RawDescriptionHelpFormatter,
+	    epilog=textwrap.dedent('''\
+			description:
+				Resizes every image file in script's directory, and optionally forces a new format, e.g. jpg or png.
+				Small images, and JPEGs that can be decoded at a reduced size (1/2, 1/4 or 1/8), are resized in the script's
+				process with Pillow. Other images (and all, without Pillow) are resized with a ffmpeg command,
+					e.g.: ffmpeg -i image.jpg -vf scale=3840:-1 image-r.jpg
+				--engine pillow or ffmpeg uses one engine where possible. --benchmark resizes the files with each engine and prints images per second.
+				--derivatives makes several sizes of each image from one decode, each smaller size from a larger one where quality allows.
+				--jobs 4 resizes 4 images at the same time in worker processes (batches of images are sent to each worker).
+			
+				Finished files are recorded in a build manifest (build-manifest.sqlite). A new run skips files that are
+				up to date, and resizes files that are new, changed or were resized with other settings. --rebuild resizes all.
+	        '''))
+	parser.add_argument("-of", "--format", default=out_format, help='Default \''+out_format+'\'. Specify to force jpg, png, etc output file')
+	parser.add_argument("-pxh", "--height", default=height, help='Default '+str(height)+'. Height in pixels of output file. If not specified, keep input image\'s aspect ratio. If both -pxh and -pxw are -1, original dimensions are kept')
+	parser.add_argument("-pxw", "--width", default=width, help='Default '+str(width)+'. Width in pixels. If -1 or not specified, aspect ratio is kept')
+	parser.add_argument("-fit", "--fitbox", default=fitbox, help='Default '+str(fitbox)+'. Must be 0, 1 or 2. If 1, keep aspect ratio, and neither width nor height can be larger than specified values. If 2, fill width x height and crop the rest')
+	parser.add_argument("-d", "--derivatives", default='', help='Comma separated sizes made from one decode of each image, each WIDTHxHEIGHT[:FITBOX[:FORMAT[:QUALITY]]], e.g. -1x-1,1920x1920:1,600x400:2,200x200:1:jpg:80')
+	parser.add_argument("--engine", default=engine, choices=['auto', 'pillow', 'ffmpeg'], help='Default '+engine+'. pillow resizes in this process, ffmpeg starts ffmpeg for each image, auto picks the faster per image')
+	parser.add_argument("--benchmark", action='store_true', help='Resize the files with each engine to a temporary folder, print images per second and exit')
+	parser.add_argument("-j", "--jobs", default=jobs, type=int, help='Default '+str(jobs)+'. Images resized at the same time in worker processes. 0 for the number of cores')
+	parser.add_argument("--input-dir", default=input_dir, help='Folder with the image files. If not specified, the script\'s folder')
+	parser.add_argument("--recursive", action='store_true', help='Also process image files in subfolders. Default '+str(recursive))
+	parser.add_argument("--include", action='append', default=[], help='Only process files whose name or path matches this pattern, e.g. --include "*2024*". Can be repeated')
+	parser.add_argument("--exclude", action='append', default=[], help='Skip files and folders whose name or path matches this pattern, e.g. --exclude old. Can be repeated')
+	parser.add_argument("--rebuild", action='store_true', help='Resize all files, also those that are up to date in the build manifest')
+	parser.add_argument("-i", "-f", "--file", default='', help='name of input file, or substring to process any matching file name. If -1 or not specified, all image files in folder are processed.')
+	args = parser.parse_args()
+	out_format = args.format
+	height = args.height
+	width = args.width
+	fitbox = int(args.fitbox)
+	process_file = args.file
+	rebuild = args.rebuild
+	engine = args.engine
+	jobs = args.jobs
+	if jobs <= 0:
+		jobs = os.cpu_count() or 1
+	if args.input_dir != input_dir:
+		input_dir = os.path.abspath(args.input_dir)
+	if args.recursive:
+		recursive = True
+	include = include + args.include
+	exclude = exclude + args.exclude
+
+	#remove any leading . from file extension
+	out_format = out_format.strip('.')
 	
-	if fitbox == 1:
-		command = "ffmpeg -i \""+input_file+"\" -vf scale=w="+str(width)+":h="+str(height)+":force_original_aspect_ratio=decrease \""+out_file+"\""	
-	else:
-		command = "ffmpeg -i \""+input_file+"\" -vf scale="+str(width)+":"+str(height)+" \""+out_file+"\""
-	
-	print('Run command:')	
-	print(' ' + command)	
-	os.system(command)	
+	#prepare the derivatives
+	if args.derivatives != '':
+		derivatives = []
+		for item in args.derivatives.split(','):
+			values = item.split(':')
+			values = values[0].split('x') + values[1:]
+			derivatives.append(dict((key, value) for key, value in zip(['width', 'height', 'fitbox', 'format', 'quality'], values) if value != ''))
+	derivatives = [dict(zip(['width', 'height', 'fitbox', 'format', 'quality'], x)) if not isinstance(x, dict) else x for x in derivatives]
+	derivatives = [{'width': int(x['width']), 'height': int(x['height']), 'fitbox': int(x.get('fitbox', 0)), 'format': x.get('format', '').strip('.'), 'quality': int(x.get('quality', 0))} for x in derivatives]
+
+	#set current dir to same directory as this .py file
+	abspath = os.path.abspath(__file__)
+	dname = os.path.dirname(abspath)
+	os.chdir(dname)
+
+
+	#find all image files
+	# they are processed in blocks of files_per_block, the first block is resized while the rest of a large tree is not yet listed
+	found_files = mediafiles.findFiles(file_formats, input_dir, recursive, include, exclude)
+	if args.benchmark:
+		benchmarkEngines([input_file for input_file in found_files if process_file == '' or process_file in input_file])
+		sys.exit()
+	manifest = buildmanifest.openManifest()
+	build_params = buildmanifest.paramsKey('resize-image', {'format': out_format.lower(), 'height': int(height), 'width': int(width), 'fitbox': int(fitbox)})
+	if len(derivatives) > 0:
+		build_params = buildmanifest.paramsKey('resize-image', {'derivatives': [[x['width'], x['height'], x['fitbox'], x['format'].lower(), x['quality']] for x in derivatives]})
+
+
+	#function records a resized file in the manifest, and deletes the input file if set
+	def finishFile(input_file, resized):
+		if resized:
+			resized_files.append(input_file)
+		if resized and manifest is not None:
+			if not buildmanifest.recordBuild(manifest, build_plan[input_file], build_params, [x['out_file'] for x in imageOutputs(input_file)]):
+				print(input_file + ' changed while it was resized, it will be resized again next time')
 	
-	#delete input file?
-	if delete_input_files:
-		os.remove(input_file)
+		#delete input file?
+		if delete_input_files:
+			os.remove(input_file)
+
+
+	#the worker processes are started when the first block is sent to them, and kept for the following blocks
+	t0 = time.time()
+	resized_files = []
+	processed = 0
+	executor = startWorkers(jobs) if jobs > 1 else None
+	try:
+		for input_files_all in mediafiles.blocks(found_files, files_per_block):
+			print("Image files in folder:")
+			for input_file in input_files_all:
+				print(' '+input_file)
+		
+		
+			#filter out files not to process
+			# the build manifest knows the outputs of earlier runs (also renamed ones) and which files are up to date
+			# files it doesn't know are skipped if their names look like outputs (made before there was a manifest)
+			input_files = [input_file for input_file in input_files_all if process_file == '' or process_file in input_file]
+			plan = [{'file': input_file, 'reason': 'new', 'size': 0, 'mtime_ns': 0, 'hash': None, 'outputs': []} for input_file in input_files]
+			up_to_date = 0
+			if manifest is not None:
+				plan, outputs, up_to_date = buildmanifest.planBuild(manifest, input_files, build_params, not process_outputs, rebuild)
+				if len(outputs) > 0:
+					print(str(len(outputs)) + ' outputs of earlier runs are not processed')
+			build_plan = {}
+			for item in plan:
+				input_file = item['file']
+				if (process_outputs == False and item['reason'] == 'new'):
+					if '-fit-' in input_file:
+						continue
+					if '-r-' in input_file:
+						continue
+					if '-crop-' in input_file:
+						continue
+					if '-r.' in input_file:
+						continue
+				build_plan[input_file] = item
+			input_files = list(build_plan)
+			if up_to_date > 0:
+				print(str(up_to_date) + ' files are up to date (' + buildmanifest.manifest_file + ')')
+			print("Process these files:")
+			for input_file in input_files:
+				print(' '+input_file+' ('+build_plan[input_file]['reason']+')')
+
+
+			#do this for each image file
+			# overwrite only outputs the manifest recorded for this input, any other existing file with an output's name is reported and not overwritten
+			overwrite = {}
+			for input_file in input_files:
+				conflicts = buildmanifest.outputConflicts(build_plan[input_file], [x['out_file'] for x in imageOutputs(input_file)])
+				for out_file in conflicts:
+					print(' '+out_file+' already exists and is not an output of '+input_file+' in the build manifest, it is not overwritten automatically')
+				overwrite[input_file] = len(conflicts) == 0
+			if executor is not None and len(input_files) > 1:
+				resizeJobs(executor, input_files, overwrite, min(jobs, len(input_files)), finishFile)
+			else:
+				for input_file in input_files:
+					finishFile(input_file, resizeFile(input_file, overwrite[input_file]) != '')
+			processed += len(input_files)
+	finally:
+		if executor is not None:
+			executor.shutdown()
+	if processed > 0:
+		seconds = time.time() - t0
+		print('Resized '+str(len(resized_files))+' of '+str(processed)+' images in '+'%.1f'%seconds+'s ('+'%.1f'%(len(resized_files) / max(seconds, 0.001))+' images/s)')
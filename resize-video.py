@@ -14,7 +14,30 @@ preset = 'faster' #ultrafast, superfast, veryfast, faster, fast, medium, slow, s
 long_filename = True #whether to include codec and crf value in output file name
 process_outputs = False #whether to use output files from previous times script was run as new inputs
 delete_input_files = False
-file_formats = ['MP4', 'M4P', 'M4B', 'M4R', 'M4V', 'M4A', 'DIVX', 'EVO', 'F4V', 'FLV', 'AVI', 'QT', 'MXF', 'MOV', 'MTS', 'M2TS', 'MPG', 'MPEG', 'VOB', 'IFO', 'WEBM']
+jobs = 0 #number of files encoded at the same time. 0 picks from the number of cores and the codec
+threads_per_job = 0 #encoder threads for each job. 0 picks from the number of cores and jobs
+chunks = 1 #split each file at keyframes into this many chunks that are encoded at the same time and joined. audio is encoded once
+compare_serial = False #with chunks or motion_aware, also encode each file in one piece (to a temporary file) and print the speedup
+preflight = True #probe files first (in parallel, cached), files already in the target codec, size, fps and bitrate are skipped or remuxed instead of re-encoded
+preflight_max_bpp = 0.1 #a file in the target codec is only kept if its video has at most this many bits per pixel per frame (0.1 = 6Mbps at 1080p30)
+preflight_jobs = 8 #ffprobe runs at the same time
+target_size_mb = 0 #file size in MB (1,000,000 bytes) to aim for, the CRF is picked from test encodes of samples of the file. 0 uses crf
+target_kbps = 0 #average bitrate (video and audio) to aim for instead of a file size. 0 uses target_size_mb or crf
+target_margin = 0.05 #aim this much below the target, the size predicted from the samples is not exact
+sample_count = 8 #samples spread across the file that are test encoded to find the CRF for the target
+sample_s = 3 #length of each sample in seconds
+keyint = 250 #frames between keyframes in a full encode (x264 and x265 default), each sample's first keyframe is counted at this rate
+motion_aware = False #encode static segments (no motion in detect-motion.py's scene scores) with a lower frame rate and higher CRF, in the same output file
+static_fps = 2 #frame rate of static segments
+static_crf_offset = 6 #added to the CRF in static segments
+min_static_s = 10 #shorter static segments are encoded like the active ones
+motion_mode = 'full' #scene score mode, as detect_mode in detect-motion.py. The analysis parameters (step_len_f, thresholds, ...) are the ones in motionclips.py
+ladder = [] #renditions encoded from one decode of each file, as (width, height, crf, fps, codec), e.g. [(-2, 1080, 24, -1, 'libx264'), (-2, 720, 26, -1, 'libx264'), (-2, 480, 28, 25, 'libx264')]
+input_dir = '' #folder with the video files, '' for the script's folder. Output files are saved next to their input files
+recursive = False #also process video files in subfolders of input_dir
+include = [] #only process files matching one of these patterns (name or path in input_dir, any case), e.g. ['*2024*', 'cam1/*']. [] for all
+exclude = [] #skip files and folders matching one of these patterns, e.g. ['*-preview.*', 'old']
+file_formats = ['MP4', 'M4P', 'M4B', 'M4R', 'M4V', 'M4A', 'DIVX', 'EVO', 'F4V', 'FLV', 'AVI', 'QT', 'MXF', 'MOV', 'MTS', 'M2TS', 'MPG', 'MPEG', 'VOB', 'IFO', 'WEBM'] #any case, .mp4 and .MP4 are both found
 
 
 '''
@@ -41,10 +64,21 @@ SOFTWARE.
 
 
 import os
-import glob
 import sys
 import argparse
 import textwrap
+import time
+import math
+import bisect
+import shutil
+import tempfile
+import statistics
+import subprocess
+import concurrent.futures
+import mediaprobe
+import buildmanifest
+import mediafiles
+import ffprogress
 
 #parse arguments (if any, else use default)
 parser = argparse.ArgumentParser(
@@ -57,12 +91,52 @@ parser = argparse.ArgumentParser(
 			The script calls a ffmpeg command, 
 				e.g.: ffmpeg -i video.mov -vf scale=-1:-1 -c:v libx264 -crf 24 video-r.mp4
 			See https://unix.stackexchange.com/questions/28803/how-can-i-reduce-a-videos-size-with-ffmpeg
+			
+			Several files are encoded at the same time (--jobs), each with fewer threads (--threads-per-job).
+			An encoder doesn't use many cores well, so this gives more total throughput than one encode at a time.
+			By default the split is picked from the number of cores and the codec. The longest files are started first.
+			
+			One long file can be split at keyframes into --chunks that are encoded at the same time and then joined
+			without re-encoding. Audio is encoded once for the whole file.
+			
+			--ladder encodes several renditions from one decode of the file, e.g. 1080p, 720p and 480p:
+				resize-video.py --ladder=-2x1080:24,-2x720:26,-2x480:28:25
+			Each rendition is WIDTHxHEIGHT[:CRF[:FPS[:CODEC]]], missing values are taken from the other arguments.
+			
+			Before encoding, each file is probed with ffprobe (in parallel, cached in media-info). A file that already is in the
+			target codec at or below the target size, fps and bitrate is skipped, or remuxed (-c copy) if the container differs.
+			The planned work (estimated CPU-seconds) is printed before encoding starts. --no-preflight encodes every file.
+			
+			--target-size (MB) or --target-bitrate (kbps) picks the CRF that makes the file fit. A few short samples spread
+			across the file are encoded at candidate CRFs, the file's size is predicted from them, and the file is encoded once.
+				resize-video.py --height 480 --fps 20 --target-size 20
+			
+			--motion-aware finds motion with detect-motion.py's scene scores (read from its cache if the file was analysed).
+			Static segments are encoded with a lower frame rate and a higher CRF, active segments as usual, in one output file.
+			NumPy is required for --motion-aware.
+			
+			Finished files are recorded in a build manifest (build-manifest.sqlite). A new run skips files that are
+			up to date, and encodes files that are new, changed or were encoded with other settings. --rebuild encodes all.
         '''))
 parser.add_argument("-c", "--codec", default=codec, help='Default '+codec+'. libx264 is the fastest and most widely used. For better quality and compression, consider libx265. An alternative is libvpx-vp9. The new format libaom-av1 is experimental.')
 parser.add_argument("-r", "--fps", default=fps, help='Default '+str(fps)+'. Frame rate (fps). -1 keeps original fps')
 parser.add_argument("-crf", "--crf", default=crf, help='Default '+str(crf)+'. Range 1-51. Lower value means better quality but larger file size')
+parser.add_argument("--target-size", default=target_size_mb, help='Default '+str(target_size_mb)+'. File size in MB to aim for, the CRF is picked from test encodes of samples of each file. 0 uses --crf')
+parser.add_argument("--target-bitrate", default=target_kbps, help='Default '+str(target_kbps)+'. Average bitrate in kbps (video and audio) to aim for instead of a file size. 0 uses --target-size or --crf')
 parser.add_argument("-pxh", "--height", default=height, help='Default '+str(height)+'. Height in pixels of output video, e.g. 720 or 1080. If not specified, keep input video\'s aspect ratio. If both -pxh and -pxw are -2, original dimensions are kept')
 parser.add_argument("-pxw", "--width", default=width, help='Default '+str(width)+'. Width in pixels. If -2 or not specified, aspect ratio is kept')
+parser.add_argument("-j", "--jobs", default=jobs, help='Default '+str(jobs)+'. Number of files to encode at the same time. 0 picks from the number of cores and the codec')
+parser.add_argument("-t", "--threads-per-job", default=threads_per_job, help='Default '+str(threads_per_job)+'. Encoder threads for each job. 0 picks from the number of cores and jobs')
+parser.add_argument("-k", "--chunks", default=chunks, help='Default '+str(chunks)+'. Split each file at keyframes into this many chunks, encode them at the same time and join them')
+parser.add_argument("--compare-serial", action='store_true', help='With --chunks or --motion-aware, also encode each file in one piece and print the speedup')
+parser.add_argument("-l", "--ladder", default='', help='Renditions encoded from one decode, WIDTHxHEIGHT[:CRF[:FPS[:CODEC]]] separated by commas, e.g. --ladder=-2x1080:24,-2x720:26')
+parser.add_argument("--no-preflight", action='store_true', help='Don\'t probe files first, transcode every file (also those already in the target codec, size, fps and bitrate)')
+parser.add_argument("-m", "--motion-aware", action='store_true', help='Encode static segments (no motion found) with '+str(static_fps)+' fps and CRF +'+str(static_crf_offset)+', active segments as usual')
+parser.add_argument("--input-dir", default=input_dir, help='Folder with the video files. If not specified, the script\'s folder')
+parser.add_argument("--recursive", action='store_true', help='Also process video files in subfolders. Default '+str(recursive))
+parser.add_argument("--include", action='append', default=[], help='Only process files whose name or path matches this pattern, e.g. --include "*2024*". Can be repeated')
+parser.add_argument("--exclude", action='append', default=[], help='Skip files and folders whose name or path matches this pattern, e.g. --exclude old. Can be repeated')
+parser.add_argument("--rebuild", action='store_true', help='Encode all files, also those that are up to date in the build manifest')
 parser.add_argument("-i", "-f", "--file", default='', help='name of input file, or substring to process any matching file name. If -1 or not specified, all video files in folder are processed.')
 args = parser.parse_args()
 codec = args.codec
@@ -71,20 +145,65 @@ crf = args.crf
 height = args.height
 width = args.width
 process_file = args.file
+jobs = int(args.jobs)
+threads_per_job = int(args.threads_per_job)
+chunks = int(args.chunks)
+if args.compare_serial:
+	compare_serial = True
+rebuild = args.rebuild
+target_size_mb = float(args.target_size)
+target_kbps = float(args.target_bitrate)
+if args.no_preflight:
+	preflight = False
+if args.motion_aware:
+	motion_aware = True
+if args.input_dir != input_dir:
+	input_dir = os.path.abspath(args.input_dir)
+if args.recursive:
+	recursive = True
+include = include + args.include
+exclude = exclude + args.exclude
+
+
+#function returns the encoder for a (shortened) codec argument
+def codecName(codec):
+	codec = codec.lower()
+	if ('264' in codec):
+		codec = 'libx264'
+	if ('265' in codec):
+		codec = 'libx265'
+	if ('hevc' in codec):
+		codec = 'libx265'
+	if ('vp9' in codec):
+		codec = 'libvpx-vp9'
+	if ('av1' in codec):
+		codec = 'libaom-av1'
+	return codec
 
 
 #allow shortened codec argument
-codec = codec.lower()
-if ('264' in codec):
-	codec = 'libx264'
-if ('265' in codec):
-	codec = 'libx265'
-if ('hevc' in codec):
-	codec = 'libx265'
-if ('vp9' in codec):
-	codec = 'libvpx-vp9'
-if ('av1' in codec):
-	codec = 'libaom-av1'
+codec = codecName(codec)
+
+
+#function returns a rendition (output settings) as a dict, missing values are taken from the arguments
+def rendition(width=width, height=height, crf=crf, fps=fps, codec=codec):
+	return {'width': int(width), 'height': int(height), 'crf': int(crf), 'fps': int(fps), 'codec': codecName(codec)}
+
+
+#function returns the motion analysis parameters of motionclips.py, part of the build parameters of motion-aware encodes
+def motionAnalysisParams():
+	import motionclips #NumPy is only needed in motion-aware mode
+	return [motionclips.step_len_f, motionclips.before_s, motionclips.after_s, motionclips.min_copy_break_s, motionclips.ignore_start_s, motionclips.ignore_end_s, motionclips.min_threshold_score, motionclips.test_duration_s, motionclips.max_threshold_score, motionclips.segments_smooth, motionclips.segments_to_start, motionclips.segments_to_end]
+
+
+#prepare the ladder of renditions
+if args.ladder != '':
+	ladder = []
+	for item in args.ladder.split(','):
+		values = item.split(':')
+		values = values[0].split('x') + values[1:]
+		ladder.append(dict((key, value) for key, value in zip(['width', 'height', 'crf', 'fps', 'codec'], values) if value != ''))
+ladder = [rendition(**x) if isinstance(x, dict) else rendition(*x) for x in ladder]
 
 
 #set current dir to same directory as this .py file
@@ -94,20 +213,28 @@ os.chdir(dname)
 
 
 #find all video files
-input_files_all = []
-for x in range(len(file_formats)):
-	for file in glob.glob('*.'+file_formats[x]):
-		input_files_all.append(file)
-input_files_all = sorted(input_files_all, key=str.lower)
+input_files_all = list(mediafiles.findFiles(file_formats, input_dir, recursive, include, exclude))
 print("Video files in folder:")
 for input_file in input_files_all:
 	print(' '+input_file)
 	
 	
 #filter out files not to process
-input_files = []
-for input_file in input_files_all:
-	if (process_outputs == False):
+# the build manifest knows the outputs of earlier runs (also renamed ones) and which files are up to date
+# files it doesn't know are skipped if their names look like outputs (made before there was a manifest)
+manifest = buildmanifest.openManifest()
+build_params = buildmanifest.paramsKey('resize-video', {'renditions': ladder if len(ladder) > 0 else [rendition()], 'preset': preset, 'preflight_max_bpp': preflight_max_bpp if preflight and len(ladder) == 0 else 0, 'target': [target_size_mb, target_kbps, target_margin] if len(ladder) == 0 else 0, 'motion_aware': [static_fps, static_crf_offset, min_static_s, motion_mode, motionAnalysisParams()] if motion_aware and len(ladder) == 0 else 0})
+input_files = [input_file for input_file in input_files_all if process_file == '' or process_file in input_file]
+plan = [{'file': input_file, 'reason': 'new', 'size': 0, 'mtime_ns': 0, 'hash': None, 'outputs': []} for input_file in input_files]
+up_to_date = 0
+if manifest is not None:
+	plan, outputs, up_to_date = buildmanifest.planBuild(manifest, input_files, build_params, not process_outputs, rebuild)
+	if len(outputs) > 0:
+		print(str(len(outputs)) + ' outputs of earlier runs are not processed')
+build_plan = {}
+for item in plan:
+	input_file = item['file']
+	if (process_outputs == False and item['reason'] == 'new'):
 		if '-x264-' in input_file:
 			continue
 		if '-x265-' in input_file:
@@ -118,28 +245,54 @@ for input_file in input_files_all:
 			continue
 		if '-r.' in input_file:
 			continue
-	if (process_file != ''):
-		if process_file not in input_file:
-			continue
-	input_files.append(input_file)
+	build_plan[input_file] = item
+input_files = list(build_plan)
+if up_to_date > 0:
+	print(str(up_to_date) + ' files are up to date (' + buildmanifest.manifest_file + ')')
 print("Process these files:")
 for input_file in input_files:
-	print(' '+input_file)
+	print(' '+input_file+' ('+build_plan[input_file]['reason']+')')
 
 
-#do this for each video file
-for input_file in input_files:
+#ffprobe codec name of each encoder's output
+codec_names = {'libx264': 'h264', 'libx265': 'hevc', 'libvpx-vp9': 'vp9', 'libaom-av1': 'av1'}
+#audio codecs that are copied when a file is remuxed to the output container (None: all), others are encoded with the container's default
+remux_audio = {'.mp4': ['aac', 'mp3', 'ac3', 'eac3', 'alac', 'opus', 'flac'], '.webm': ['opus', 'vorbis'], '.mkv': None}
+#rough encoding speed in output pixels per CPU-second at preset 'faster', for the estimate of planned work (slower presets take longer)
+encode_speed = {'libx264': 40e6, 'libx265': 8e6, 'libvpx-vp9': 6e6, 'libaom-av1': 1e6}
+
+
+#threads one encode uses well, more threads add little speed (for 1080p, less for smaller frames)
+encoder_threads = {'libx264': 8, 'libx265': 8, 'libvpx-vp9': 4, 'libaom-av1': 4}
+
+
+#function returns number of jobs and threads per job
+# jobs: enough encodes to use all cores with the threads one encode uses well, but not more than there are files
+# threads: cores are shared between the jobs, 0 (ffmpeg picks) if one job has all cores
+def jobSplit(files, jobs=jobs, threads_per_job=threads_per_job):
+	cores = os.cpu_count() or 1
+	if jobs <= 0:
+		threads = threads_per_job if threads_per_job > 0 else encoder_threads.get(codec, 8)
+		jobs = max(1, cores // threads)
+	jobs = max(1, min(jobs, files))
+	if threads_per_job <= 0 and jobs > 1:
+		threads_per_job = max(1, cores // jobs)
+	return jobs, threads_per_job
+
+
+#function returns name of the output file
+def outputFile(input_file, r=None):
+	if r is None:
+		r = rendition()
+	codec, width, height, fps, crf = r['codec'], r['width'], r['height'], r['fps'], r['crf']
 	filename, file_extension = os.path.splitext(input_file)
-	codec_info = ''
 	codec_short = codec[-4:]
 	out_file = filename
 	file_type = 'mp4'
 	if (codec == 'libvpx-vp9'):
-		codec_info = ' -b:v 0'
 		codec_short = 'vp9'
 		file_type = 'webm'
 	elif (codec == 'libaom-av1'):
-		codec_info = ' -b:v 0 -strict experimental'
 		codec_short = 'av1'
 		file_type = 'mkv'
 	elif (codec == 'libx264'):
@@ -160,19 +313,569 @@ for input_file in input_files:
 		out_file += "-"+codec_short+"-"+str(crf)+'.'+file_type
 	else:
 		out_file = filename+"-r."+file_type
+	return out_file
+
+
+#function returns the codec arguments for ffmpeg
+def codecArgs(threads=0, r=None):
+	if r is None:
+		r = rendition()
+	codec = r['codec']
+	args = ['-c:v', codec, '-crf', str(r['crf'])]
+	if (codec == 'libvpx-vp9'):
+		args += ['-b:v', '0']
+	elif (codec == 'libaom-av1'):
+		args += ['-b:v', '0', '-strict', 'experimental']
+	args += ['-preset', preset]
+	if r.get('bframes') is not None:
+		args += ['-bf', str(r['bframes'])]
+	if threads > 0:
+		args += ['-threads', str(threads)]
+	return args
+
+
+#function returns the ffmpeg output arguments that encode a file (fps, scale and codec)
+def encodeArgs(threads=0, r=None):
+	if r is None:
+		r = rendition()
+	args = []
+	if r['fps'] > -1:
+		args += ['-r', str(r['fps'])]
+	args += ['-vf', 'scale='+str(r['width'])+':'+str(r['height'])]
+	return args + codecArgs(threads, r)
+
+
+#function returns the ffmpeg command that encodes a file
+def encodeCommand(input_file, out_file, threads=0, r=None):
+	return ['ffmpeg', '-i', input_file] + encodeArgs(threads, r) + [out_file]
+
+
+#function returns the ffmpeg command that copies the video (and audio if the output container supports it) to a new container
+def remuxCommand(input_file, out_file, info):
+	command = ['ffmpeg', '-i', input_file, '-map', '0:v:0', '-map', '0:a:0?', '-c:v', 'copy']
+	audio_codecs = remux_audio.get(os.path.splitext(out_file)[1])
+	if audio_codecs is None or info['audio_codec'] in audio_codecs:
+		command += ['-c:a', 'copy']
+	command.append(out_file)
+	return command
+
+
+#function returns the ffmpeg command that encodes all renditions of the ladder from one decode
+# the decoded frames are split to a scale (and encode) branch per rendition in one filter graph
+def ladderCommand(input_file, renditions, threads=0):
+	graph = '[0:v]split=' + str(len(renditions)) + ''.join('[s'+str(i)+']' for i in range(len(renditions)))
+	for i, r in enumerate(renditions):
+		graph += ';[s'+str(i)+']scale='+str(r['width'])+':'+str(r['height'])+'[v'+str(i)+']'
+	command = ['ffmpeg', '-i', input_file, '-filter_complex', graph]
+	for i, r in enumerate(renditions):
+		command += ['-map', '[v'+str(i)+']', '-map', '0:a:0?']
+		if r['fps'] > -1:
+			command += ['-r', str(r['fps'])]
+		command += codecArgs(threads, r)
+		command.append(outputFile(input_file, r))
+	return command
+
+
+#function returns the average bitrate in kbps to aim for, 0 if there is no target
+def targetKbps(duration):
+	if target_kbps > 0:
+		return target_kbps
+	if target_size_mb > 0:
+		return target_size_mb * 8000 / max(duration, 0.001)
+	return 0
+
+
+#function encodes length seconds of a file from start, returns ffmpeg's return code
+def encodeSample(input_file, start, length, sample_file, threads=0, r=None):
+	command = ['ffmpeg', '-loglevel', 'error', '-y', '-ss', '%.3f'%start, '-i', input_file, '-t', '%.3f'%length]
+	return ffprogress.runFFmpeg(command + encodeArgs(threads, r) + [sample_file], lambda line: None, input_file + ' sample')
+
+
+#function returns the size in bytes of the packets of a file, and of its first video keyframe
+def packetSizes(input_file):
+	command = ['ffprobe', '-v', 'error', '-show_entries', 'packet=codec_type,size,flags', '-of', 'csv=p=0', input_file]
+	result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+	size, keyframe = 0, 0
+	for line in result.stdout.splitlines():
+		fields = line.split(',')
+		try:
+			size += int(fields[1])
+		except (IndexError, ValueError):
+			continue
+		if keyframe == 0 and fields[0] == 'video' and 'K' in fields[2]:
+			keyframe = int(fields[1])
+	return size, keyframe
+
+
+#function test encodes samples spread across a file, returns their predicted size in bytes and length in seconds
+# a short file is encoded whole, so its size is known exactly
+# each sample starts with a keyframe, which a full encode only has every keyint frames, so it only counts at that rate
+# the size of the packets is used, not of the sample file (the container's overhead is large for a short file)
+# a sample that fails to encode (or has no packets) is left out, returns None if no sample could be encoded
+def sampleSize(input_file, duration, directory, threads=0, r=None):
+	extension = os.path.splitext(outputFile(input_file, r))[1]
+	if duration <= sample_count * sample_s:
+		sample_file = os.path.join(directory, 'whole' + extension)
+		if encodeSample(input_file, 0, duration, sample_file, threads, r) != 0 or not os.path.isfile(sample_file) or os.path.getsize(sample_file) == 0:
+			return None
+		return os.path.getsize(sample_file), duration
+	fps = r['fps'] if r['fps'] > 0 else (media_info.get(input_file) or {}).get('fps') or 25
+	size = 0
+	length = 0
+	for i in range(sample_count):
+		sample_file = os.path.join(directory, 'sample' + str(i) + extension)
+		if encodeSample(input_file, duration * (i + 0.5) / sample_count - sample_s / 2, sample_s, sample_file, threads, r) != 0:
+			continue
+		packets, keyframe = packetSizes(sample_file)
+		if packets == 0:
+			continue
+		size += packets - keyframe + keyframe * min(1, sample_s * fps / keyint)
+		length += sample_s
+	if length == 0:
+		return None
+	return size, length
+
+
+#function returns the highest quality (lowest) CRF whose predicted file size fits the target
+# the file size is predicted from test encodes of samples at candidate CRFs
+# the bitrate roughly halves for every 6 CRF steps, so the first new candidate is 6*log2(predicted/target) steps from the last,
+# later ones use the slope between the last two candidates, inside the range still left between the largest CRF that was too big and the smallest that fits
+# if the samples can't be encoded, the size can't be predicted and the set CRF is used
+def targetCrf(input_file, threads=0, out=print):
+	r = rendition()
+	crf = r['crf']
+	duration = (media_info.get(input_file) or {}).get('duration') or mediaprobe.probeDuration(input_file)
+	target_bytes = targetKbps(duration) * 125 * duration * (1 - target_margin)
+	lowest, highest = 0, 63 if r['codec'] in ['libvpx-vp9', 'libaom-av1'] else 51
+	predicted = {}
+	tried = []
+	directory = tempfile.mkdtemp(prefix='samples-', dir='.')
+	try:
+		while r['crf'] not in predicted:
+			sample = sampleSize(input_file, duration, directory, threads, r)
+			if sample is None or sample[0] <= 0:
+				out(' Warning: samples at CRF ' + str(r['crf']) + ' could not be encoded, the size can\'t be predicted. CRF ' + str(crf) + ' is used')
+				return crf
+			size, length = sample
+			predicted[r['crf']] = size / max(length, 0.001) * duration
+			tried.append(r['crf'])
+			out(' Target ' + '%.2f'%(target_bytes / 1e6) + 'MB: CRF ' + str(r['crf']) + ' predicts ' + '%.2f'%(predicted[r['crf']] / 1e6) + 'MB')
+			fits = [x for x in predicted if predicted[x] <= target_bytes]
+			too_big = [x for x in predicted if predicted[x] > target_bytes]
+			low = max(too_big) + 1 if len(too_big) > 0 else lowest
+			high = min(fits) - 1 if len(fits) > 0 else highest
+			if low > high:
+				break
+			slope = -6.0 #CRF steps per doubling of the size
+			if len(tried) > 1 and predicted[tried[-2]] > 0 and predicted[tried[-1]] != predicted[tried[-2]]:
+				slope = min((tried[-1] - tried[-2]) / math.log2(predicted[tried[-1]] / predicted[tried[-2]]), -1.0)
+			step = slope * math.log2(target_bytes / predicted[r['crf']])
+			step = int(round(step)) or (1 if step > 0 else -1)
+			r['crf'] = min(max(r['crf'] + step, low), high)
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+	fits = [x for x in predicted if predicted[x] <= target_bytes]
+	if len(fits) == 0:
+		out(' Target can\'t be reached with the highest CRF ' + str(max(predicted)))
+		return max(predicted)
+	return min(fits)
+
+
+#function returns the rendition of a file, with the CRF picked for the target size if there is one
+def fileRendition(input_file, threads=0, out=print):
+	r = rendition()
+	if target_size_mb > 0 or target_kbps > 0:
+		r['crf'] = targetCrf(input_file, threads, out)
+	return r
+
+
+#function returns the ffmpeg option that overwrites the outputs of a file (-y) or leaves them (-n)
+# an existing output is overwritten if the build manifest recorded it for this input (made by this script from an older version of the input or other settings)
+# any other existing file with an output's name is reported and not overwritten
+def overwriteArgs(input_file, out_files, out=print):
+	conflicts = buildmanifest.outputConflicts(build_plan.get(input_file, {}), out_files)
+	for out_file in conflicts:
+		out(' ' + out_file + ' already exists and is not an output of ' + input_file + ' in the build manifest, not overwritten')
+	return ['-n'] if len(conflicts) > 0 else ['-y']
+
+
+#function records a finished file in the build manifest
+def recordBuild(input_file, out_files, out=print):
+	if manifest is None or input_file not in build_plan:
+		return
+	if not buildmanifest.recordBuild(manifest, build_plan[input_file], build_params, out_files):
+		out(input_file + ' changed while it was encoded, it will be encoded again next time')
+
+
+#function encodes one file, all output is passed to out()
+def encodeFile(input_file, threads=0, out=print):
+	if len(ladder) > 0:
+		command = ladderCommand(input_file, ladder, threads)
+		out_files = [outputFile(input_file, r) for r in ladder]
+	elif preflight_plan.get(input_file, ('transcode',))[0] == 'remux':
+		command = remuxCommand(input_file, outputFile(input_file), media_info[input_file])
+		out_files = [outputFile(input_file)]
+	else:
+		r = fileRendition(input_file, threads, out)
+		command = encodeCommand(input_file, outputFile(input_file, r), threads, r)
+		out_files = [outputFile(input_file, r)]
+	command[1:1] = overwriteArgs(input_file, out_files, out)
+	out('Run command:')	
+	out(' ' + subprocess.list2cmdline(command))	
+	if ffprogress.runFFmpeg(command, out, input_file, durations.get(input_file, 0), out_files) == 0:
+		if targetKbps(1) > 0 and len(out_files) == 1 and len(ladder) == 0:
+			out(' Size ' + '%.2f'%(os.path.getsize(out_files[0]) / 1e6) + 'MB, target ' + '%.2f'%(targetKbps(durations[input_file]) * 125 * durations[input_file] / 1e6) + 'MB')
+		recordBuild(input_file, out_files, out)
 	
-	command = "ffmpeg -i \""+input_file+"\"" 
-	if int(fps) > -1:
-		command += " -r "+str(fps)
-	command += " -vf scale="+str(width)+":"+str(height)
-	command += " -c:v "+codec+" -crf "+str(crf)+codec_info
-	command += " -preset "+preset
-	command += " \""+out_file+"\""
+	#delete input file?
+	if delete_input_files:
+		os.remove(input_file)
+
+
+#function returns chunk boundaries in seconds, the file split at the keyframes at/before equal parts
+def chunkTimes(index, chunks):
+	times = [index['pts_time'][0]]
+	for i in range(1, chunks):
+		time_s = index['pts_time'][mediaprobe.keyframeBefore(index, index['duration'] * i / chunks)]
+		if time_s > times[-1]:
+			times.append(time_s)
+	return times + [index['duration']]
+
+
+#function returns the ffmpeg command that encodes the video of one chunk
+# decoding starts at the chunk's keyframe, trim keeps the frames from start to end (file times, -copyts) so chunks don't overlap
+# -seek_timestamp makes -ss a file time too, else it counts from the file's start time (non-zero in e.g. MTS files)
+# timescale sets the mp4 track's time scale, so segments with other frame rates can be joined without rounding the time stamps
+def chunkCommand(input_file, start, end, out_file, threads=0, last=False, r=None, timescale=''):
+	if r is None:
+		r = rendition()
+	trim = 'trim=start=' + '%.6f'%start
+	if not last:
+		trim += ':end=' + '%.6f'%(end - 0.0005)
+	#the fps filter (not -r) keeps each chunk's frames inside the chunk, -r would add frames at the end
+	if r['fps'] > -1:
+		trim = 'fps=' + str(r['fps']) + ',' + trim
+	command = ['ffmpeg', '-nostats', '-y', '-seek_timestamp', '1', '-ss', '%.6f'%(start + 0.0005), '-noaccurate_seek', '-copyts', '-i', input_file, '-map', '0:v:0', '-an']
+	command += ['-vf', trim + ',setpts=PTS-STARTPTS,scale='+str(r['width'])+':'+str(r['height'])]
+	command += codecArgs(threads, r)
+	if timescale != '':
+		command += ['-video_track_timescale', timescale]
+	command.append(out_file)
+	return command
+
+
+#function checks that frame time stamps continue across the joins of a chunked encode, returns list of problems
+def checkJoins(out_file, joins, duration):
+	problems = []
+	times = mediaprobe.probeFrameTimes(out_file)
+	if len(times) < 2:
+		return ['no frames in ' + out_file]
+	step = statistics.median([b - a for a, b in zip(times, times[1:])])
+	if len(set(times)) < len(times):
+		problems.append(str(len(times) - len(set(times))) + ' frames with the same time stamp')
+	for join in joins:
+		i = bisect.bisect_left(times, join - times[0] - step / 2)
+		if i <= 0 or i >= len(times):
+			problems.append('join at ' + '%.3f'%join + 's: no frames')
+			continue
+		gap = times[i] - times[i-1]
+		if abs(gap - step) > step / 2:
+			problems.append('join at ' + '%.3f'%join + 's: ' + '%.1f'%(gap * 1000) + 'ms between frames, expected ' + '%.1f'%(step * 1000) + 'ms')
+	out_duration = mediaprobe.probeDuration(out_file)
+	if abs(out_duration - duration) > 2 * step:
+		problems.append('duration ' + '%.3f'%out_duration + 's, source ' + '%.3f'%duration + 's')
+	return problems
+
+
+#function encodes the segments of a file at the same time, each (start, end, rendition), then joins them and adds audio (encoded once)
+# with exact_durations the join places each segment at its length (end - start), not at the time of its last frame + one frame
+# returns ffmpeg's return code of the join (-1 if a segment failed) and the seconds it took
+def encodeSegments(input_file, segments, out_file, kind='chunk', exact_durations=False, out=print, timescale=''):
+	workers, threads = jobSplit(len(segments), len(segments))
+	out(' ' + str(len(segments)) + ' ' + kind + 's encoded at the same time, ' + str(threads or 'all') + ' threads each')
+	directory = tempfile.mkdtemp(prefix=kind + 's-', dir='.')
+	try:
+		t0 = time.time()
+		commands = []
+		for i, (start, end, r) in enumerate(segments):
+			segment_file = os.path.join(directory, kind + str(i) + os.path.splitext(out_file)[1])
+			commands.append(chunkCommand(input_file, start, end, segment_file, threads, i == len(segments) - 1, r, timescale))
+		out(' ' + kind.capitalize() + ' command: ' + subprocess.list2cmdline(commands[0]))
+		def encodeSegment(i):
+			lines = []
+			return ffprogress.runFFmpeg(commands[i], lines.append, input_file + ' ' + kind + ' ' + str(i), segments[i][1] - segments[i][0]), lines
+		with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+			results = list(executor.map(encodeSegment, range(len(commands))))
+		for i, (returncode, lines) in enumerate(results):
+			if returncode != 0:
+				out(' ' + kind.capitalize() + ' ' + str(i) + ' failed:')
+				for line in lines[-10:]:
+					out(line)
+				return -1, time.time() - t0
+		list_file = os.path.join(directory, kind + 's.txt')
+		with open(list_file, 'w') as file:
+			for (start, end, r), command in zip(segments, commands):
+				file.write("file '" + os.path.basename(command[-1]) + "'\n")
+				if exact_durations:
+					file.write('duration ' + '%.6f'%(end - start) + '\n')
+		command = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', list_file, '-i', input_file, '-map', '0:v', '-map', '1:a:0?', '-c:v', 'copy', out_file]
+		command[1:1] = overwriteArgs(input_file, [out_file], out)
+		out(' Join command: ' + subprocess.list2cmdline(command))
+		returncode = ffprogress.runFFmpeg(command, out, input_file + ' join')
+		return returncode, time.time() - t0
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+
+
+#function encodes one file in chunks that are encoded at the same time, then joins them and adds audio (encoded once)
+def encodeChunked(input_file, chunks, out=print):
+	index = mediaprobe.keyframeIndex(input_file)
+	if index is None:
+		out(input_file + ': no keyframe index, encoding in one piece')
+		return encodeFile(input_file, 0, out)
+	times = chunkTimes(index, chunks)
+	r = fileRendition(input_file, 0, out)
+	out_file = outputFile(input_file, r)
+	out(input_file + ': ' + str(len(times) - 1) + ' chunks at ' + ', '.join('%.1f'%x + 's' for x in times[:-1]))
+	returncode, chunked_s = encodeSegments(input_file, [(times[i], times[i+1], r) for i in range(len(times) - 1)], out_file, 'chunk', False, out)
+	if returncode < 0:
+		return
+	if returncode != 0:
+		out(' Joining the chunks failed (return code ' + str(returncode) + '), ' + out_file + ' is not complete')
+		return
+	duration = index['duration'] - index['pts_time'][0]
+	out(' Chunked encode: ' + '%.1f'%chunked_s + 's (' + '%.1f'%(duration / max(chunked_s, 0.001)) + 'x realtime)')
+	problems = checkJoins(out_file, times[1:-1], duration)
+	if len(problems) == 0:
+		out(' Time stamps continuous at ' + str(len(times) - 2) + ' joins')
+	for problem in problems:
+		out(' Time stamp problem: ' + problem)
+	if returncode == 0 and len(problems) == 0:
+		recordBuild(input_file, [out_file], out)
+	if compare_serial:
+		serial_file = os.path.join(tempfile.mkdtemp(prefix='serial-', dir='.'), os.path.basename(out_file))
+		t0 = time.time()
+		ffprogress.runFFmpeg(['ffmpeg', '-loglevel', 'error'] + encodeCommand(input_file, serial_file, 0, r)[1:], out, input_file + ' serial', duration)
+		serial_s = time.time() - t0
+		shutil.rmtree(os.path.dirname(serial_file), ignore_errors=True)
+		out(' Serial encode:  ' + '%.1f'%serial_s + 's, speedup ' + '%.2f'%(serial_s / max(chunked_s, 0.001)) + 'x')
 	
-	print('Run command:')	
-	print(' ' + command)	
-	os.system(command)	
+	#delete input file?
+	if delete_input_files and returncode == 0 and len(problems) == 0:
+		os.remove(input_file)
+
+
+#function returns the segments of a file as (start, end, rendition, 'active' or 'static'), None if there are no scene scores
+# active segments are the clips detect-motion.py would cut (same scene scores and analysis, see motionclips.py)
+# the time between them is static if it is at least min_static_s long, and gets static_fps and CRF + static_crf_offset
+def motionSegments(input_file, duration, r, out=print):
+	import scenescores #NumPy is only needed in motion-aware mode
+	import motionclips
+	f, f_pts, f_pts_time, f_scene_score = scenescores.sceneScores(input_file, motionclips.step_len_f, out=out, mode=motion_mode)
+	if len(f_pts_time) < 2:
+		return None
+	median = motionclips.medianScores(f_scene_score)
+	threshold = motionclips.fileThreshold(median, f_pts_time)
+	trigger = motionclips.triggerScores(median, threshold)
+	copy = motionclips.copyScores(f_pts_time, trigger)
+	active_start, active_end = motionclips.copyTimes(f_pts_time, copy)
+	static = []
+	t = 0.0
+	for start, end in zip(active_start + [duration], active_end + [duration]):
+		if start - t >= min_static_s:
+			static.append((t, start))
+		t = max(t, end)
+	source_fps = (media_info.get(input_file) or {}).get('fps') or mediaprobe.probeFrameRate(input_file)
+	highest = 63 if r['codec'] in ['libvpx-vp9', 'libaom-av1'] else 51
+	static_r = dict(r, crf=min(r['crf'] + static_crf_offset, highest), bframes=0) #at a low frame rate B-frames delay decoding by seconds, the joined time stamps would overlap the next segment
+	if static_fps > 0 and (r['fps'] <= 0 or static_fps < r['fps']) and static_fps < source_fps:
+		static_r['fps'] = static_fps
+	segments = []
+	t = 0.0
+	for start, end in static:
+		if start > t:
+			segments.append((t, start, r, 'active'))
+		segments.append((start, end, static_r, 'static'))
+		t = end
+	if duration > t:
+		segments.append((t, duration, r, 'active'))
+	return segments
+
+
+#function encodes one file with static segments at a lower frame rate and higher CRF, then joins the segments and adds audio
+# prints the time in static segments and the frames saved, with compare_serial also the size and time of a normal encode
+def encodeMotionAware(input_file, out=print):
+	r = rendition()
+	duration = durations.get(input_file) or mediaprobe.probeDuration(input_file)
+	t0 = time.time()
+	segments = motionSegments(input_file, duration, r, out)
+	analysis_s = time.time() - t0
+	if segments is None or len([x for x in segments if x[3] == 'static']) == 0:
+		out(input_file + ': no static segments of ' + str(min_static_s) + 's or longer, encoding in one piece')
+		return encodeFile(input_file, 0, out)
+	out_file = outputFile(input_file, r)
+	static_s = sum(end - start for start, end, x, kind in segments if kind == 'static')
+	static_r = [x for start, end, x, kind in segments if kind == 'static'][0]
+	out(input_file + ': ' + str(len(segments)) + ' segments, ' + '%.1f'%static_s + 's of ' + '%.1f'%duration + 's static (' + '%.0f'%(100 * static_s / max(duration, 0.001)) + '%), scene scores in ' + '%.1f'%analysis_s + 's')
+	for start, end, x, kind in segments:
+		out(' ' + kind.ljust(6) + ' ' + '%.1f'%start + 's-' + '%.1f'%end + 's' + (', ' + str(x['fps']) + 'fps CRF ' + str(x['crf']) if kind == 'static' else ''))
+	timescale = ''
+	if os.path.splitext(out_file)[1] in ['.mp4', '.mov']:
+		timescale = mediaprobe.probeVideoStream(input_file).get('time_base', '').partition('/')[2]
+	#the segments are in scene score times, which start at zero, the chunk commands trim on file times
+	start_s = mediaprobe.probeStartTime(input_file)
+	returncode, encode_s = encodeSegments(input_file, [(start_s + start, start_s + end, x) for start, end, x, kind in segments], out_file, 'segment', True, out, timescale)
+	if returncode != 0:
+		return
+	source_frames = len(mediaprobe.probeFrameTimes(input_file))
+	out_frames = len(mediaprobe.probeFrameTimes(out_file))
+	out(' Motion-aware encode: ' + '%.1f'%encode_s + 's, ' + str(out_frames) + ' of ' + str(source_frames) + ' frames encoded (' + '%.0f'%(100 - 100 * out_frames / max(source_frames, 1)) + '% fewer), ' + '%.2f'%(os.path.getsize(out_file) / 1e6) + 'MB')
+	recordBuild(input_file, [out_file], out)
+	if compare_serial:
+		serial_file = os.path.join(tempfile.mkdtemp(prefix='serial-', dir='.'), os.path.basename(out_file))
+		t0 = time.time()
+		ffprogress.runFFmpeg(['ffmpeg', '-loglevel', 'error'] + encodeCommand(input_file, serial_file, 0, r)[1:], out, input_file + ' normal', duration)
+		serial_s = time.time() - t0
+		serial_size = os.path.getsize(serial_file) if os.path.isfile(serial_file) else 0
+		shutil.rmtree(os.path.dirname(serial_file), ignore_errors=True)
+		out(' Normal encode:       ' + '%.1f'%serial_s + 's, ' + '%.2f'%(serial_size / 1e6) + 'MB. Motion-aware saves ' + '%.0f'%(100 - 100 * encode_s / max(serial_s, 0.001)) + '% time (' + '%.0f'%(100 - 100 * (encode_s + analysis_s) / max(serial_s, 0.001)) + '% with scene scores) and ' + '%.0f'%(100 - 100 * os.path.getsize(out_file) / max(serial_size, 1)) + '% size')
 	
 	#delete input file?
 	if delete_input_files:
 		os.remove(input_file)
+
+
+#function returns what to do with a file: ('skip', 'remux' or 'transcode', reason)
+# a file is kept (skipped, or remuxed if the container differs) if it is in the target codec at or below the target size, fps and bitrate
+def preflightAction(input_file, info, r=None):
+	if r is None:
+		r = rendition()
+	if info is None:
+		return 'transcode', 'not probed'
+	source = info['video_codec'] + ' ' + str(info['width']) + 'x' + str(info['height']) + ' ' + '%.2f'%info['fps'] + 'fps ' + '%.0f'%info['video_kbps'] + 'kbps'
+	if info['video_codec'] != codec_names.get(r['codec']):
+		return 'transcode', source
+	if (r['width'] > 0 and info['width'] > r['width']) or (r['height'] > 0 and info['height'] > r['height']):
+		return 'transcode', source + ', larger than target'
+	if r['fps'] > 0 and info['fps'] > r['fps'] + 0.01:
+		return 'transcode', source + ', fps above target'
+	if targetKbps(info['duration']) > 0:
+		file_kbps = os.path.getsize(input_file) / 125 / max(info['duration'], 0.001)
+		if file_kbps > targetKbps(info['duration']):
+			return 'transcode', source + ', ' + '%.0f'%file_kbps + 'kbps above target'
+		return keepAction(input_file, r, source)
+	bpp = info['video_kbps'] * 1000 / max(info['width'] * info['height'] * info['fps'], 1)
+	if bpp > preflight_max_bpp or info['video_kbps'] <= 0:
+		return 'transcode', source + ', ' + '%.2f'%bpp + ' bits/pixel'
+	return keepAction(input_file, r, source)
+
+
+#function returns how a file that is already in the target is kept: skipped if it is in the output's container, else remuxed
+def keepAction(input_file, r, source):
+	if os.path.splitext(input_file)[1].lower() == os.path.splitext(outputFile(input_file, r))[1]:
+		return 'skip', source + ', already in target'
+	return 'remux', source + ', ' + os.path.splitext(input_file)[1][1:] + ' to ' + os.path.splitext(outputFile(input_file, r))[1][1:]
+
+
+#function returns the estimated CPU-seconds to transcode a file, from the number of output pixels
+def transcodeCost(info, r=None):
+	if r is None:
+		r = rendition()
+	if info is None:
+		return 0.0
+	out_width, out_height = info['width'], info['height']
+	if r['width'] > 0 and r['height'] > 0:
+		out_width, out_height = r['width'], r['height']
+	elif r['height'] > 0:
+		out_width, out_height = out_width * r['height'] / max(out_height, 1), r['height']
+	elif r['width'] > 0:
+		out_width, out_height = r['width'], out_height * r['width'] / max(out_width, 1)
+	out_fps = r['fps'] if r['fps'] > 0 else info['fps']
+	return out_width * out_height * out_fps * info['duration'] / encode_speed.get(r['codec'], encode_speed['libx264'])
+
+
+#pre-flight: probe all files (in parallel, cached), decide what to do with each, and print the planned work
+# with a ladder every file is transcoded (the renditions are made from one decode)
+t0 = time.time()
+with concurrent.futures.ThreadPoolExecutor(max_workers=preflight_jobs) as executor:
+	media_info = dict(zip(input_files, executor.map(mediaprobe.mediaInfo, input_files)))
+preflight_plan = {}
+for input_file in input_files:
+	info = media_info[input_file]
+	if len(ladder) > 0:
+		preflight_plan[input_file] = ('transcode', 'ladder')
+		continue
+	action, reason = preflightAction(input_file, info)
+	if not preflight and action != 'transcode':
+		action, reason = 'transcode', reason + ', --no-preflight'
+	preflight_plan[input_file] = (action, reason)
+if len(input_files) > 0:
+	print('Pre-flight (' + str(len(input_files)) + ' files probed in ' + '%.1f'%(time.time() - t0) + 's):')
+	for input_file in input_files:
+		print(' ' + input_file + ': ' + preflight_plan[input_file][0] + ' (' + preflight_plan[input_file][1] + ')')
+	for action in ['transcode', 'remux', 'skip']:
+		files = [x for x in input_files if preflight_plan[x][0] == action]
+		if len(files) == 0:
+			continue
+		summary = ' ' + action + ': ' + str(len(files)) + ' files, ' + '%.1f'%sum((media_info[x] or {}).get('duration', 0) for x in files) + 's of video'
+		if action == 'transcode':
+			cost = sum(sum(transcodeCost(media_info[x], r) for r in (ladder or [rendition()])) for x in files)
+			summary += ', about ' + '%.0f'%cost + ' CPU-seconds'
+		print(summary)
+input_files = [x for x in input_files if preflight_plan[x][0] != 'skip']
+
+
+#do this for each video file
+# with chunks, files are encoded one after the other, each split into chunks that are encoded at the same time
+# with several jobs, files are encoded concurrently, longest first, and each file's output is printed when it is done
+t0 = time.time()
+durations = {input_file: (media_info[input_file] or {}).get('duration') or mediaprobe.probeDuration(input_file) for input_file in input_files}
+jobs, threads_per_job = jobSplit(len(input_files))
+ffprogress.planWork(sum(durations.values()) * (2 if (chunks > 1 or motion_aware) and compare_serial else 1))
+if chunks > 1 and len(ladder) > 0:
+	print('--chunks is not used with --ladder, the ladder already decodes each file once')
+if (target_size_mb > 0 or target_kbps > 0) and len(ladder) > 0:
+	print('--target-size and --target-bitrate are not used with --ladder, each rendition has its own CRF')
+if motion_aware and len(ladder) > 0:
+	print('--motion-aware is not used with --ladder')
+if motion_aware and len(ladder) == 0:
+	if chunks > 1 or target_size_mb > 0 or target_kbps > 0:
+		print('--chunks and --target-size are not used with --motion-aware, the segments are encoded at the same time with crf')
+	for input_file in input_files:
+		if preflight_plan[input_file][0] == 'transcode':
+			encodeMotionAware(input_file)
+		else:
+			encodeFile(input_file)
+elif chunks > 1 and len(ladder) == 0:
+	for input_file in input_files:
+		if preflight_plan[input_file][0] == 'transcode':
+			encodeChunked(input_file, chunks)
+		else:
+			encodeFile(input_file)
+elif jobs == 1:
+	for input_file in input_files:
+		encodeFile(input_file, threads_per_job)
+else:
+	print('Encoding ' + str(jobs) + ' files at the same time, ' + str(threads_per_job) + ' threads each')
+	def encodeJob(input_file):
+		lines = []
+		t1 = time.time()
+		encodeFile(input_file, threads_per_job, lines.append)
+		return lines, time.time() - t1
+	with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+		futures = {}
+		for input_file in sorted(input_files, key=lambda x: -durations[x]):
+			futures[executor.submit(encodeJob, input_file)] = input_file
+		for future in concurrent.futures.as_completed(futures):
+			lines, encode_s = future.result()
+			input_file = futures[future]
+			print(' ')
+			print(input_file + ' encoded in ' + '%.1f'%encode_s + 's (' + '%.1f'%(durations[input_file] / max(encode_s, 0.001)) + 'x)')
+			for line in lines:
+				print(line)
+
+
+#print aggregate throughput
+process_s = time.time() - t0
+if len(input_files) > 0:
+	print('Encoded ' + str(len(input_files)) + ' files, ' + '%.1f'%sum(durations.values()) + 's of video in ' + '%.1f'%process_s + 's (' + '%.1f'%(sum(durations.values()) / max(process_s, 0.001)) + 'x realtime), ' + '%.0f'%ffprogress.totals['cpu_s'] + ' CPU-seconds (' + ffprogress.metrics_log + ')')
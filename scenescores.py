@@ -0,0 +1,404 @@
+#Reads ffmpeg scene scores for detect-motion.py
+#Github: ...
+
+#default parameters
+ffmpeg_loglevel = 31 #see https://ffmpeg.org/ffmpeg.html#Generic-options
+cache_dir = 'scenescore-cache' #folder for cached scene scores, relative to the script's folder. '' disables the cache
+cache_max_mb = 500 #delete oldest cached scores when the cache is larger than this
+cache_max_days = 60 #delete cached scores not used for this many days
+detect_mode = 'full' #'full' scores full resolution frames, 'proxy' small gray frames (faster), 'keyframes' only decodes keyframes (fastest, coarse), 'diff' frame differencing (see below)
+proxy_width = 320 #width of frames scored in proxy and keyframes mode
+proxy_lowres = 0 #0-3, let the decoder output 1/2, 1/4 or 1/8 resolution in proxy and keyframes mode. only some codecs support this (e.g. mjpeg), others ignore it
+diff_width = 160 #diff mode: sampled frames are scaled to this size (gray) and piped to python
+diff_height = 90
+diff_background_rate = 0.2 #diff mode: how fast the background adapts to new frames (0-1). 1 compares each sample with the previous one
+chunk_overlap_steps = 2 #sampled frames decoded twice at each chunk join. the scene score depends on the two previous samples
+
+
+'''
+Copyright (c) 2018 JP Janssen
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+
+import os
+import io
+import time
+import math
+import hashlib
+import subprocess
+import threading
+import concurrent.futures
+import numpy
+import mediaprobe
+
+
+#binary layout of cached scores, one record per frame
+score_dtype = numpy.dtype([('frame', '<i4'), ('pts', '<i8'), ('pts_time', '<f8'), ('scene_score', '<f8')])
+
+
+#function returns the ffmpeg command (as argument list) that prints a scene score for every n-th frame
+# ffmpeg's scene change detection algo: https://www.luckydinosaur.com/u/ffmpeg-scene-change-detector
+# metadata is printed to stdout (pipe:1), log messages still go to stderr
+# in proxy mode the sampled frames are scaled down and converted to gray before scoring
+# in keyframes mode the decoder skips all other frames, and every keyframe is scored
+def sceneScoreCommand(input_file, step_len_f, loglevel=ffmpeg_loglevel, mode='full'):
+	input_args = []
+	vf = "select=not(mod(n\\,"+str(step_len_f)+")),"
+	if mode == 'keyframes':
+		input_args += ['-skip_frame', 'nokey']
+		vf = ''
+	if mode in ('proxy', 'keyframes'):
+		if proxy_lowres > 0:
+			input_args += ['-lowres', str(proxy_lowres)]
+		vf += "scale="+str(proxy_width)+":-2:flags=fast_bilinear,format=gray,"
+	elif mode != 'full':
+		raise ValueError('Unknown detect mode: ' + str(mode))
+	vf += "select=gte(scene\\,0),metadata=print:file=pipe\\\\:1"
+	return ['ffmpeg', '-loglevel', str(loglevel)] + input_args + ['-i', input_file, '-vf', vf, '-an', '-f', 'null', '-']
+
+
+#function turns an argument list into a printable command line
+def commandString(command):
+	return subprocess.list2cmdline(command)
+
+
+#function parses ffmpeg's metadata=print output line by line
+# yields (frame, pts, pts_time, scene_score) for each frame as soon as its score line is read
+#	frame:0    pts:0       pts_time:0
+#	lavfi.scene_score=0.000000
+def parseSceneScores(lines):
+	frame = None
+	for line in lines:
+		if line.startswith('frame:'):
+			frame = pts = pts_time = None
+			for part in line.split():
+				key, _, value = part.partition(':')
+				if key == 'frame':
+					frame = int(value)
+				elif key == 'pts':
+					pts = int(value)
+				elif key == 'pts_time':
+					pts_time = float(value)
+		elif line.startswith('lavfi.scene_score=') and frame is not None:
+			yield (frame, pts, pts_time, float(line[18:]))
+			frame = None
+
+
+#function runs ffmpeg and yields (frame, pts, pts_time, scene_score) while the video is still being decoded
+# when done, the generator returns ffmpeg's exit code
+# scores are streamed through a pipe, so no temp file is written and the full text is never held in memory
+# messages are passed to out(). if out is not print, ffmpeg's own log is also sent to out() instead of the console
+def readSceneScores(input_file, step_len_f, loglevel=ffmpeg_loglevel, command=None, out=print):
+	if command is None:
+		command = sceneScoreCommand(input_file, step_len_f, loglevel)
+	stderr = None
+	if out is not print:
+		stderr = subprocess.PIPE
+		command = command[:1] + ['-nostats'] + command[1:] #no progress lines in the collected log
+	process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr, universal_newlines=True, bufsize=1)
+	log_thread = None
+	if stderr is not None:
+		log_thread = threading.Thread(target=copyLines, args=(process.stderr, out), daemon=True)
+		log_thread.start()
+	try:
+		for record in parseSceneScores(process.stdout):
+			yield record
+	except BaseException:
+		#stopped early (e.g. ctrl+c or caller closed generator), don't leave ffmpeg running
+		process.kill()
+		raise
+	finally:
+		process.stdout.close()
+		process.wait()
+		if log_thread is not None:
+			log_thread.join()
+	if process.returncode != 0:
+		out(' FFmpeg exited with code ' + str(process.returncode))
+	return process.returncode
+
+
+#function passes each line from a pipe to out(), used to collect ffmpeg's log
+def copyLines(pipe, out):
+	for line in pipe:
+		out(line.rstrip('\n'))
+	pipe.close()
+
+
+#function returns the cache file for an input file and ffmpeg command
+# key includes file path, size and modification time, and every decode-affecting argument (filters, step length)
+# the detect mode that produced the scores is part of the file name
+def cacheFile(input_file, command, directory=cache_dir, mode='full', key_args=[]):
+	stat = os.stat(input_file)
+	decode_args = []
+	skip = False
+	for i, arg in enumerate(command):
+		if skip:
+			skip = False
+			continue
+		if arg == '-loglevel':
+			skip = True
+			continue
+		if i > 0 and command[i-1] == '-i':
+			continue
+		decode_args.append(arg)
+	key = '|'.join([os.path.abspath(input_file), str(stat.st_size), str(stat.st_mtime_ns)] + decode_args + key_args)
+	return os.path.join(directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '-' + mode + '.npy')
+
+
+#function deletes cached scores that are too old, then the least recently used until the cache is small enough
+def evictCache(directory=cache_dir, max_mb=cache_max_mb, max_days=cache_max_days):
+	if not os.path.isdir(directory):
+		return
+	now = time.time()
+	entries = []
+	for entry in os.scandir(directory):
+		if not entry.name.endswith('.npy'):
+			continue
+		try:
+			stat = entry.stat()
+			if now - stat.st_mtime > max_days * 86400:
+				os.remove(entry.path)
+				continue
+		except OSError: #removed by another job
+			continue
+		entries.append((stat.st_mtime, stat.st_size, entry.path))
+	total_bytes = sum(entry[1] for entry in entries)
+	for mtime, size, path in sorted(entries):
+		if total_bytes <= max_mb * 1024 * 1024:
+			break
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+		total_bytes -= size
+
+
+#function returns scene scores as numpy arrays (frame, pts, pts_time, scene_score)
+# scores are read from the cache if the same file was analysed before with the same decode parameters
+# otherwise ffmpeg is run and the scores are saved to the cache
+# in diff mode, mask_file is an optional image where white marks the area to watch
+def sceneScores(input_file, step_len_f, loglevel=ffmpeg_loglevel, command=None, directory=cache_dir, out=print, chunks=1, mode='full', mask_file=''):
+	key_args = []
+	if mode == 'diff':
+		if command is None:
+			command = diffScoreCommand(input_file, step_len_f, loglevel)
+		key_args = [str(diff_background_rate), mask_file]
+		if mask_file != '':
+			key_args.append(str(os.stat(mask_file).st_mtime_ns))
+	elif command is None:
+		command = sceneScoreCommand(input_file, step_len_f, loglevel, mode)
+	cache_file = ''
+	if directory != '':
+		cache_file = cacheFile(input_file, command, directory, mode, key_args)
+		if os.path.isfile(cache_file):
+			scores = numpy.load(cache_file)
+			os.utime(cache_file) #mark as recently used
+			out(' Scene scores (' + mode + ' mode) read from cache')
+			return scores['frame'], scores['pts'], scores['pts_time'], scores['scene_score']
+	records = None
+	if chunks > 1 and mode in ('full', 'proxy'): #keyframes can't be split in phase with a serial run, diff needs the background from earlier frames
+		records = chunkedSceneScores(input_file, step_len_f, chunks, loglevel, out, mode)
+		returncode = 0
+	if mode == 'diff':
+		out(' Run command: ' + commandString(command))
+		records, returncode = collectDiffScores(command, mask_file, loglevel, out)
+	elif records is None:
+		out(' Run command: ' + commandString(command))
+		records, returncode = collectSceneScores(input_file, step_len_f, loglevel, command, out)
+	scores = numpy.array(records, dtype=score_dtype)
+	if cache_file != '' and len(scores) > 0 and returncode == 0: #don't cache scores of a failed decode
+		os.makedirs(directory, exist_ok=True)
+		temp_file = cache_file + '.' + str(os.getpid()) + '.tmp'
+		with open(temp_file, 'wb') as file:
+			numpy.save(file, scores)
+		os.replace(temp_file, cache_file)
+		evictCache(directory)
+	return scores['frame'], scores['pts'], scores['pts_time'], scores['scene_score']
+
+
+#function runs ffmpeg and returns all scores as a list, and ffmpeg's exit code
+def collectSceneScores(input_file, step_len_f, loglevel=ffmpeg_loglevel, command=None, out=print):
+	records = []
+	reader = readSceneScores(input_file, step_len_f, loglevel, command, out)
+	while True:
+		try:
+			records.append(next(reader))
+		except StopIteration as stop:
+			return records, stop.value
+
+
+#function returns the ffmpeg arguments that start decoding at a sampled frame (sample number times step_len_f)
+# start_s is the time of the first video frame (see mediaprobe.probeVideoStart), the sample's frame is at start_s + frame / fps
+# the seek is half a frame early, so rounding can't land on the next frame and select's frame counter n stays in phase with a serial run
+# -copyts -start_at_zero keeps the timestamps of a serial run
+def seekArgs(sample, step_len_f, fps, start_s=0):
+	return ['-ss', '%.6f'%(start_s + (sample * step_len_f - 0.5) / fps), '-copyts', '-start_at_zero']
+
+
+#function returns ffmpeg commands that each decode a time chunk of the file
+# chunk boundaries are on sampled frames (see seekArgs)
+# each chunk (except the first) starts chunk_overlap_steps samples early, so the scene scores at the join are the same as in a serial run
+def chunkCommands(input_file, step_len_f, chunks, fps, duration, loglevel=ffmpeg_loglevel, mode='full', start_s=0):
+	samples = math.ceil(duration * fps / step_len_f)
+	chunk_samples = max(math.ceil(samples / chunks), chunk_overlap_steps + 1)
+	commands = []
+	first_sample = 0
+	while first_sample < samples:
+		command = sceneScoreCommand(input_file, step_len_f, loglevel, mode)
+		if first_sample > 0:
+			command[3:3] = seekArgs(first_sample - chunk_overlap_steps, step_len_f, fps, start_s)
+		if first_sample + chunk_samples < samples:
+			count = chunk_samples
+			if first_sample > 0:
+				count += chunk_overlap_steps
+			command[-3:-3] = ['-frames:v', str(count)]
+		commands.append(command)
+		first_sample += chunk_samples
+	return commands
+
+
+#function decodes the file in overlapping time chunks at the same time, and joins the scores
+# returns None if the chunks don't line up (e.g. variable frame rate), then the caller should decode the file serially
+def chunkedSceneScores(input_file, step_len_f, chunks, loglevel=ffmpeg_loglevel, out=print, mode='full'):
+	fps = mediaprobe.probeFrameRate(input_file)
+	duration = mediaprobe.probeDuration(input_file)
+	if fps <= 0 or duration <= 0:
+		out(' Frame rate or duration unknown, decode file in one piece')
+		return None
+	commands = chunkCommands(input_file, step_len_f, chunks, fps, duration, loglevel, mode, mediaprobe.probeVideoStart(input_file))
+	lines = [[] for command in commands]
+	with concurrent.futures.ThreadPoolExecutor(max_workers=len(commands)) as pool:
+		results = list(pool.map(collectSceneScores, [input_file]*len(commands), [step_len_f]*len(commands), [loglevel]*len(commands), commands, [line.append for line in lines]))
+	for i, command in enumerate(commands):
+		out(' Run command: ' + commandString(command))
+		for line in lines[i]:
+			out(line)
+	records = []
+	for i, (chunk_records, returncode) in enumerate(results):
+		if returncode != 0:
+			return None
+		if i > 0:
+			#overlapping samples must be the same frames as the end of previous chunk
+			overlap = chunk_records[:chunk_overlap_steps]
+			if len(overlap) < chunk_overlap_steps or [record[1] for record in overlap] != [record[1] for record in records[-chunk_overlap_steps:]]:
+				out(' Chunks do not line up, decode file in one piece')
+				return None
+			chunk_records = chunk_records[chunk_overlap_steps:]
+		for record in chunk_records:
+			records.append((len(records),) + record[1:])
+	return records
+
+
+#function returns ffmpeg command that writes every n-th frame as small raw gray frames to stdout
+# nearest neighbor scaling is used, it costs next to nothing compared to decoding, unlike the scene filter on full frames
+# frame numbers and timestamps are printed to stderr by the metadata filter (it only prints frames that have metadata, so a key is added)
+def diffScoreCommand(input_file, step_len_f, loglevel=ffmpeg_loglevel):
+	vf = "select=not(mod(n\\,"+str(step_len_f)+")),metadata=add:key=sample:value=1,metadata=print:file=pipe\\\\:2,scale="+str(diff_width)+":"+str(diff_height)+":flags=neighbor,format=gray"
+	return ['ffmpeg', '-nostats', '-loglevel', str(loglevel), '-i', input_file, '-vf', vf, '-an', '-fps_mode', 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1']
+
+
+#function returns a mask as numpy array of weights that add up to 1, white (255) in the mask image = full weight
+# the image is read and scaled with ffmpeg, so any format ffmpeg can read works
+def readMask(mask_file, loglevel=ffmpeg_loglevel):
+	command = ['ffmpeg', '-loglevel', str(loglevel), '-i', mask_file, '-vf', 'scale='+str(diff_width)+':'+str(diff_height)+',format=gray', '-frames:v', '1', '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1']
+	result = subprocess.run(command, stdout=subprocess.PIPE)
+	mask = numpy.frombuffer(result.stdout, dtype=numpy.uint8)
+	if len(mask) != diff_width * diff_height or mask.sum() == 0:
+		raise ValueError('Could not read mask image: ' + mask_file)
+	mask = mask.astype(numpy.float32)
+	return mask / mask.sum()
+
+
+#function collects frame numbers and timestamps from ffmpeg's stderr, other lines are passed to out()
+def collectTimestamps(pipe, timestamps, out):
+	for line in pipe:
+		if line.startswith('frame:'):
+			timestamps.append(next(parseSceneScores([line, 'lavfi.scene_score=0'])))
+		elif not line.startswith('sample='):
+			out(line.rstrip('\n'))
+	pipe.close()
+
+
+#function scores each sampled frame by how much it differs from a slowly updated background
+# a pixel only counts as changed as much as it differs from both the background and the previous sample,
+# so the score drops as soon as a moving object is gone, even if the background hasn't caught up yet
+# score is the (masked) mean absolute difference / 100, like ffmpeg's scene score, so thresholds are in the same range
+# frames are read into one reusable buffer and all arithmetic is done in place, nothing is allocated per frame
+# returns a list of (frame, pts, pts_time, score) and ffmpeg's exit code
+def collectDiffScores(command, mask_file='', loglevel=ffmpeg_loglevel, out=print):
+	weights = None
+	if mask_file != '':
+		weights = readMask(mask_file, loglevel)
+	frame_bytes = diff_width * diff_height
+	buffer = bytearray(frame_bytes)
+	view = memoryview(buffer)
+	frame = numpy.frombuffer(buffer, dtype=numpy.uint8)
+	background = numpy.zeros(frame_bytes, dtype=numpy.float32)
+	previous = numpy.zeros(frame_bytes, dtype=numpy.float32)
+	delta = numpy.zeros(frame_bytes, dtype=numpy.float32)
+	work = numpy.zeros(frame_bytes, dtype=numpy.float32)
+	work_previous = numpy.zeros(frame_bytes, dtype=numpy.float32)
+	scores = []
+	timestamps = []
+	process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=False)
+	#stderr is read in its own thread, ffmpeg would block when the stderr pipe is full
+	log_thread = threading.Thread(target=collectTimestamps, args=(io.TextIOWrapper(process.stderr), timestamps, out), daemon=True)
+	log_thread.start()
+	try:
+		while True:
+			read = 0
+			while read < frame_bytes:
+				n = process.stdout.readinto(view[read:])
+				if not n:
+					break
+				read += n
+			if read < frame_bytes:
+				break
+			if len(scores) == 0:
+				background[:] = frame
+				previous[:] = frame
+				scores.append(0.0)
+				continue
+			numpy.subtract(frame, previous, out=work_previous)
+			numpy.abs(work_previous, out=work_previous)
+			numpy.subtract(frame, background, out=delta)
+			numpy.abs(delta, out=work)
+			numpy.minimum(work, work_previous, out=work)
+			previous[:] = frame
+			if weights is None:
+				scores.append(float(work.mean()) / 100)
+			else:
+				scores.append(float(numpy.dot(work, weights)) / 100)
+			numpy.multiply(delta, diff_background_rate, out=delta)
+			numpy.add(background, delta, out=background)
+	except BaseException:
+		process.kill()
+		raise
+	finally:
+		process.stdout.close()
+		process.wait()
+		log_thread.join()
+	if process.returncode != 0:
+		out(' FFmpeg exited with code ' + str(process.returncode))
+	records = []
+	for timestamp, score in zip(timestamps, scores):
+		records.append(timestamp[:3] + (score,))
+	return records, process.returncode